@@ -0,0 +1,153 @@
+'''
+Run benchmarks and compare them with stored baselines.
+
+Run from the repository root:
+
+    python -m benchmarks                          # Run all, and show the change from baseline.json.
+    python -m benchmarks -k parse                 # Run benchmarks whose name contains "parse".
+    python -m benchmarks --save                   # Store results as the new baseline.
+    python -m benchmarks --check                  # Fail on regressions against the baseline.
+    python -m benchmarks --check --threshold 0.5  # Allow 50 % slowdown.
+
+Timings are only comparable on the same machine and Python, so the baseline
+records where it was measured, and --check is meant for a baseline stored on
+the machine that checks it. Runs on one machine still vary by about 25 %.
+'''
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Optional
+
+from .suite import BENCHMARKS, Run
+
+
+_BASELINE = Path(__file__).with_name('baseline.json')
+
+
+class Result:
+
+    __slots__ = ('events', 'ns_per_event', 'peak_alloc_bytes')
+
+    def __init__(self, events: int, ns_per_event: float, peak_alloc_bytes: int) -> None:
+        self.events = events
+        self.ns_per_event = ns_per_event
+        self.peak_alloc_bytes = peak_alloc_bytes
+
+    @property
+    def events_per_sec(self) -> float:
+        return 1e9 / self.ns_per_event if self.ns_per_event else 0.0
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            'events': self.events,
+            'ns_per_event': round(self.ns_per_event, 1),
+            'peak_alloc_bytes': self.peak_alloc_bytes
+        }
+
+
+def measure(run: Run, repeat: int) -> Result:
+    '''
+    Args:
+        run (Run): Benchmark to measure.
+        repeat (int): Number of timed runs. The fastest one is reported.
+
+    Returns:
+        Result: Measurement. Allocation is the peak of memory traced by tracemalloc during a run.
+    '''
+
+    events = run()  # Warm up.
+
+    best = float('inf')
+    for _ in range(repeat):
+        started_at = time.perf_counter_ns()
+        run()
+        best = min(best, time.perf_counter_ns() - started_at)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Result(events, best / events, peak)
+
+
+def environment() -> dict[str, str]:
+    '''Where benchmarks run, which has to match for timings to be comparable.'''
+
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'host': platform.node()
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='pattern', default='', help='run benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs (default: 5)')
+    parser.add_argument('--baseline', type=Path, default=_BASELINE, help='baseline file')
+    parser.add_argument('--save', action='store_true', help='store results as the baseline')
+    parser.add_argument('--check', action='store_true', help='fail if a benchmark regressed against the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown of ns/event as a ratio with --check (default: 0.25)')
+    args = parser.parse_args(argv)
+
+    current = environment()
+    baseline: dict[str, dict[str, Any]] = {}
+    if args.baseline.exists():
+        stored = json.loads(args.baseline.read_text())
+        baseline = stored['benchmarks']
+        if stored['environment'] != current:
+            differences = ', '.join(
+                f'{key} {stored["environment"].get(key)} (now {value})'
+                for key, value in current.items() if stored['environment'].get(key) != value
+            )
+            print(f'The baseline was measured elsewhere: {differences}', file=sys.stderr)
+
+    results: dict[str, Result] = {}
+    regressions: list[str] = []
+
+    print(f'{"benchmark":<24} {"events/s":>12} {"ns/event":>10} {"peak KiB":>9} {"baseline":>10}')
+    for name, factory in BENCHMARKS.items():
+        if args.pattern not in name:
+            continue
+
+        result = results[name] = measure(factory(), args.repeat)
+
+        compared = ''
+        base = baseline.get(name)
+        if base is not None:
+            ratio = result.ns_per_event / base['ns_per_event'] - 1
+            compared = f'{ratio:+.0%}'
+            if args.check and ratio > args.threshold:
+                regressions.append(name)
+                compared += ' !'
+
+        print(
+            f'{name:<24} {result.events_per_sec:>12,.0f} {result.ns_per_event:>10.1f} '
+            f'{result.peak_alloc_bytes / 1024:>9.1f} {compared:>10}'
+        )
+
+    if args.save:
+        baseline.update({name: result.to_json() for name, result in results.items()})
+        stored = {'environment': current, 'benchmarks': baseline}
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + '\n')
+        print(f'Saved baseline to {args.baseline}')
+        return 0
+
+    if regressions:
+        print(f'Regressed by more than {args.threshold:.0%}: {", ".join(regressions)}', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,370 @@
+'''
+Benchmarks of the input pipeline.
+
+Each benchmark is a factory, which prepares its workload and returns a callable.
+The callable processes the workload once and returns the number of events.
+'''
+
+import atexit
+import io
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from time import monotonic
+from typing import Callable, Sequence
+
+from clikeyboard import KeyEvent, Listener, Poller, RateLimit, RateLimitPolicy, Recorder, replay
+from clikeyboard._parser import Parser
+
+from . import workloads
+
+
+Run = Callable[[], int]
+
+_SIZE = 100000
+_HANDLER_COUNTS = (1, 10, 100, 1000, 10000)
+_SEQUENCE_COUNTS = (10, 10000)
+
+
+def _parse(reads: Sequence[str]) -> Run:
+    def run() -> int:
+        parser = Parser()
+        parse = parser.parse
+        count = 0
+        for data in reads:
+            for _ in parse(data):
+                count += 1
+        for _ in parser.flush():
+            count += 1
+        return count
+
+    return run
+
+
+def parse_ascii() -> Run:
+    return _parse(workloads.chunks(workloads.ascii_typing(_SIZE)))
+
+
+def parse_navigation() -> Run:
+    return _parse(workloads.chunks(workloads.navigation(_SIZE // 5)))
+
+
+def parse_paste() -> Run:
+    return _parse(workloads.chunks(workloads.paste(_SIZE * 10)))
+
+
+def parse_bracketed_paste() -> Run:
+    '''A 1 MB paste, which is a single event.'''
+
+    return _parse(workloads.chunks(workloads.bracketed_paste(_SIZE * 10)))
+
+
+def parse_utf8() -> Run:
+    return _parse(workloads.chunks(workloads.mixed_utf8(_SIZE)))
+
+
+def _handler(event: KeyEvent) -> None:
+    pass
+
+
+def _dispatch(handlers: int) -> Callable[[], Run]:
+    def factory() -> Run:
+        listener = Listener()
+        for i in range(handlers):
+            listener.add_handler(_handler, f'key{i}')
+
+        # Every event hits one bound handler, plus events with unbound keys.
+        keys = [f'key{i % handlers}' for i in range(_SIZE // 2)] + ['unbound'] * (_SIZE // 2)
+        batches = [
+            [KeyEvent(key) for key in keys[i:i + workloads.READ_SIZE]]
+            for i in range(0, len(keys), workloads.READ_SIZE)
+        ]
+
+        def run() -> int:
+            dispatch = listener._dispatch
+            for batch in batches:
+                dispatch(batch)
+            return len(keys)
+
+        return run
+
+    return factory
+
+
+def _sequences(sequences: int) -> Callable[[], Run]:
+    def factory() -> Run:
+        listener = Listener()
+        for i in range(sequences):
+            listener.add_sequence(('ctrl+x', f'key{i}'), _handler)
+
+        # Every other event completes a sequence, the rest are unbound keys.
+        keys = [key for i in range(_SIZE // 4) for key in ('ctrl+x', f'key{i % sequences}', 'a', 'b')]
+        batches = [
+            [KeyEvent(key) for key in keys[i:i + workloads.READ_SIZE]]
+            for i in range(0, len(keys), workloads.READ_SIZE)
+        ]
+
+        def run() -> int:
+            dispatch = listener._dispatch
+            for batch in batches:
+                dispatch(batch)
+            return len(keys)
+
+        return run
+
+    return factory
+
+
+def dispatch_rate_limited() -> Run:
+    '''Auto-repeat of a key bound to a throttled handler, with its timers expired after each read.'''
+
+    listener = Listener()
+    listener.add_handler(_handler, 'a', rate_limit=RateLimit(RateLimitPolicy.THROTTLE, 0.01))
+    batches = [[KeyEvent('a')] * workloads.READ_SIZE for _ in range(_SIZE // workloads.READ_SIZE)]
+
+    def run() -> int:
+        dispatch = listener._dispatch
+        for batch in batches:
+            dispatch(batch)
+            listener._expire(monotonic())
+        return _SIZE // workloads.READ_SIZE * workloads.READ_SIZE
+
+    return run
+
+
+def replay_mixed() -> Run:
+    '''Replay a recording as fast as possible through parser and handlers.'''
+
+    data = workloads.ascii_typing(_SIZE) + workloads.navigation(_SIZE // 10)
+
+    file = io.BytesIO()
+    recorder = Recorder(file)
+    for i, read in enumerate(workloads.chunks(data)):
+        recorder.record(read, i * 1000000)
+    recording = file.getvalue()
+
+    listener = Listener()
+    listener.add_handler(_handler, 'a')
+    listener.add_handler(_handler)
+
+    def run() -> int:
+        return replay(io.BytesIO(recording), listener)
+
+    return run
+
+
+def pipeline_ascii() -> Run:
+    '''Read from a pipe, parse, queue and dispatch on the listener threads.'''
+
+    from clikeyboard._posix import PosixInput
+
+    data = workloads.ascii_typing(_SIZE).encode()
+    reader, writer = os.pipe()
+
+    done = threading.Event()
+    count = 0
+
+    def handler(event: KeyEvent) -> None:
+        nonlocal count
+        count += 1
+        if count == len(data):
+            done.set()
+
+    listener = Listener(PosixInput(reader))
+    listener.add_handler(handler)
+    listener.start()
+
+    def write() -> None:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(writer, view):]
+
+    def run() -> int:
+        nonlocal count
+        count = 0
+        done.clear()
+        write()
+        done.wait()
+        return count
+
+    return run
+
+
+def pipeline_hotkey() -> Run:
+    '''Like pipeline_ascii, but only ctrl+q has a handler, so other keys are dropped by the parser.'''
+
+    from clikeyboard import Keys
+    from clikeyboard._posix import PosixInput
+
+    text = workloads.ascii_typing(_SIZE)
+    data = (text + '\x11').encode()
+    reader, writer = os.pipe()
+
+    done = threading.Event()
+    listener = Listener(PosixInput(reader))
+    listener.add_handler(lambda event: done.set(), Keys.CONTROL_Q)
+    listener.start()
+
+    def run() -> int:
+        done.clear()
+        view = memoryview(data)
+        while view:
+            view = view[os.write(writer, view):]
+        done.wait()
+        return len(data)
+
+    return run
+
+
+def poll_ascii() -> Run:
+    '''Like pipeline_ascii, but read and parsed by a poller on the calling thread.'''
+
+    from clikeyboard._posix import PosixInput
+
+    data = workloads.ascii_typing(_SIZE).encode()
+    reader, writer = os.pipe()
+    # The workload is larger than the pipe, so it is written as the poller reads it.
+    os.set_blocking(writer, False)
+    poller = Poller(PosixInput(reader))
+    poller.start()
+
+    def run() -> int:
+        count = 0
+        view = memoryview(data)
+        while count < len(data):
+            if view:
+                try:
+                    view = view[os.write(writer, view):]
+                except BlockingIOError:
+                    pass
+            count += len(poller.poll_events())
+        return count
+
+    return run
+
+
+def poll_idle() -> Run:
+    '''Poll an input with nothing to read. One event is one poll.'''
+
+    from clikeyboard._posix import PosixInput
+
+    reader, _ = os.pipe()
+    poller = Poller(PosixInput(reader))
+    poller.start()
+    polls = 10000
+
+    def run() -> int:
+        poll = poller.poll_events
+        for _ in range(polls):
+            poll()
+        return polls
+
+    return run
+
+
+def listener_lifecycle() -> Run:
+    '''Start and stop listeners on an idle pipe. One event is one start and stop.'''
+
+    from clikeyboard._posix import PosixInput
+
+    reader, _ = os.pipe()
+
+    def run() -> int:
+        for _ in range(100):
+            with Listener(PosixInput(reader)):
+                pass
+        return 100
+
+    return run
+
+
+def multiplex_sources() -> Run:
+    '''Read from 100 pipes, parse and dispatch on the single thread of a multiplexing listener.'''
+
+    from clikeyboard import MultiplexListener
+
+    data = workloads.ascii_typing(_SIZE // 100).encode()
+    pipes = [os.pipe() for _ in range(100)]
+
+    done = threading.Event()
+    count = 0
+    total = len(data) * len(pipes)
+
+    def handler(event: KeyEvent) -> None:
+        nonlocal count
+        count += 1
+        if count == total:
+            done.set()
+
+    listener = MultiplexListener()
+    for reader, _ in pipes:
+        listener.add_source(reader).add_handler(handler)
+    listener.start()
+
+    def run() -> int:
+        nonlocal count
+        count = 0
+        done.clear()
+        for _, writer in pipes:
+            os.write(writer, data)
+        done.wait()
+        return count
+
+    return run
+
+
+def ring_roundtrip() -> Run:
+    '''Publish events to a shared-memory ring and take them on the consumer side, in one process.'''
+
+    from clikeyboard import EventRing, RingConsumer
+
+    events = list(Parser().parse(workloads.ascii_typing(workloads.READ_SIZE), 0))
+    ring = EventRing(len(events))
+    consumer = RingConsumer(ring.name)
+    atexit.register(ring.close)
+
+    def run() -> int:
+        count = 0
+        for _ in range(_SIZE // len(events)):
+            ring.put(events)
+            count += len(consumer._take())
+        return count
+
+    return run
+
+
+def import_package() -> Run:
+    '''Import the package in a new interpreter, including the interpreter startup.'''
+
+    root = Path(__file__).resolve().parent.parent
+
+    def run() -> int:
+        subprocess.run([sys.executable, '-c', 'import clikeyboard'], cwd=root, check=True)
+        return 1
+
+    return run
+
+
+BENCHMARKS: dict[str, Callable[[], Run]] = {
+    'parse_ascii': parse_ascii,
+    'parse_navigation': parse_navigation,
+    'parse_paste': parse_paste,
+    'parse_bracketed_paste': parse_bracketed_paste,
+    'parse_utf8': parse_utf8,
+    **{f'dispatch_{n}_handlers': _dispatch(n) for n in _HANDLER_COUNTS},
+    **{f'match_{n}_sequences': _sequences(n) for n in _SEQUENCE_COUNTS},
+    'dispatch_rate_limited': dispatch_rate_limited,
+    'replay_mixed': replay_mixed,
+    'ring_roundtrip': ring_roundtrip,
+    'import_package': import_package,
+}
+
+if os.name == 'posix':
+    BENCHMARKS['pipeline_ascii'] = pipeline_ascii
+    BENCHMARKS['pipeline_hotkey'] = pipeline_hotkey
+    BENCHMARKS['poll_ascii'] = poll_ascii
+    BENCHMARKS['poll_idle'] = poll_idle
+    BENCHMARKS['multiplex_sources'] = multiplex_sources
+    BENCHMARKS['listener_lifecycle'] = listener_lifecycle
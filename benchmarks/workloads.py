@@ -0,0 +1,75 @@
+'''Synthetic terminal input for benchmarks. Every workload is deterministic.'''
+
+import random
+
+
+# Size of a read from the terminal, as the POSIX backend does.
+READ_SIZE = 1024
+
+# Arrows, home/end, editing and function keys, each without and with xterm modifiers.
+_NAVIGATION_SEQUENCES = [
+    f'\x1b[{modifier}{final}' for final in 'ABCDFHPQS' for modifier in ['', '1;2', '1;3', '1;5', '1;6']
+] + [
+    f'\x1b[{code}{modifier}~' for code in (2, 3, 5, 6, 15, 17, 18, 19, 20, 21, 23, 24)
+    for modifier in ['', ';2', ';3', ';5', ';6']
+]
+_WORDS = [
+    'the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'keyboard',
+    'terminal', 'escape', 'sequence', 'listener', 'handler', 'parser'
+]
+_NON_ASCII = ['é', 'ü', 'ß', 'あ', 'い', '漢', '字', '한', '😀', '🚀']
+
+
+def ascii_typing(size: int) -> str:
+    '''Words separated by spaces and occasional enter keys.'''
+
+    rng = random.Random(0)
+    words: list[str] = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS) + (' ' if rng.random() < 0.9 else '\r')
+        words.append(word)
+        length += len(word)
+    return ''.join(words)[:size]
+
+
+def navigation(count: int) -> str:
+    '''Escape sequences of arrows, function keys and modifiers.'''
+
+    rng = random.Random(0)
+    return ''.join(rng.choice(_NAVIGATION_SEQUENCES) for _ in range(count))
+
+
+def paste(size: int) -> str:
+    '''A large block of text with newlines and tabs, as pasted without bracketed paste.'''
+
+    rng = random.Random(0)
+    lines: list[str] = []
+    length = 0
+    while length < size:
+        line = '\t' * rng.randrange(3) + ' '.join(rng.choice(_WORDS) for _ in range(8)) + '\n'
+        lines.append(line)
+        length += len(line)
+    return ''.join(lines)[:size]
+
+
+def bracketed_paste(size: int) -> str:
+    '''The paste workload wrapped in bracketed paste markers.'''
+
+    return '\x1b[200~' + paste(size) + '\x1b[201~'
+
+
+def mixed_utf8(size: int) -> str:
+    '''ASCII text mixed with multi-byte characters.'''
+
+    rng = random.Random(0)
+    return ''.join(
+        rng.choice(_NON_ASCII) if rng.random() < 0.3 else rng.choice('abcdefghij ')
+        for _ in range(size)
+    )
+
+
+def chunks(data: str, size: int = READ_SIZE) -> list[str]:
+    '''Split data into reads.'''
+
+    return [data[i:i + size] for i in range(0, len(data), size)]
@@ -1,32 +1,144 @@
-from typing import Callable
+import importlib
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence, Union
 
+from ._batch import NO_TIMESTAMP, EventBatch
+from ._executors import ExecutionPolicy, ExecutorStats
+from ._handlers import AsyncHandler, BatchHandler, ErrorHook, HandlerStats, report_error
+from ._instrumentation import Histogram, Instrumentation
+from ._interning import NO_KEY_ID, intern_key, key_from_id
+from ._handlers import Registry as _Registry
 from ._listener import Handler, Listener
-from .keys import Keys
-from .event import KeyEvent
+from ._multiplex import MultiplexListener, Source
+from ._polling import Poller
+from ._queue import OverflowPolicy, QueueStats
+from ._rate_limits import RateLimit, RateLimitPolicy, RateLimitStats
+from ._recording import Recorder, ReplayInput, read_recording, replay
+from ._ring import EventRing, RingConsumer
+from ._sequences import DEFAULT_SEQUENCE_TIMEOUT
+from .keys import Keys, Modifiers
+from .event import KeyEvent, MouseAction, MouseButton, MouseEvent, PasteEvent
 
+if TYPE_CHECKING:
+    from ._asyncio import AsyncListener, events
 
-_listener = Listener()
 
+# asyncio is slow to import, so its integration is imported on first access.
+_LAZY_ATTRIBUTES = {
+    'AsyncListener': ('._asyncio', 'AsyncListener'),
+    'events': ('._asyncio', 'events'),
+    '_get_async_listener': ('._asyncio', 'get_listener')
+}
 
-def on_press(key: str, handler: Handler) -> Callable[[], None]:
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    module, attribute = _LAZY_ATTRIBUTES[name]
+    return getattr(importlib.import_module(module, __name__), attribute)
+
+
+# Created on first use, so importing this package has no side effects.
+_default_listener: Optional[Listener] = None
+_default_listener_lock = Lock()
+
+
+def _get_listener() -> Listener:
+    '''Get the started listener of the terminal of this process.'''
+
+    global _default_listener
+
+    with _default_listener_lock:
+        if _default_listener is None:
+            _default_listener = Listener()
+    _default_listener.start()
+    return _default_listener
+
+
+def _get_listener_for(handler: Callable[..., Any]) -> _Registry:
+    # Imported on first use, as they are slow to import.
+    import inspect
+    if inspect.iscoroutinefunction(handler):
+        from ._asyncio import get_listener
+        return get_listener()
+    return _get_listener()
+
+
+def on_press(
+    key: str,
+    handler: Union[Handler, AsyncHandler],
+    execution: ExecutionPolicy = ExecutionPolicy.INLINE,
+    rate_limit: Optional[RateLimit] = None
+) -> Callable[[], None]:
     '''
     Invoke handler when pressed key.
 
+    A coroutine function handler runs on the running asyncio event loop, so it
+    must be registered from a coroutine.
+
     Args:
         key (str): String indicating key.
-        handler (Handler): Handler to invoke.
+        handler (Union[Handler, AsyncHandler]): Handler to invoke.
+        execution (ExecutionPolicy): Where handler runs. Coroutine function handlers must be INLINE.
+        rate_limit (Optional[RateLimit]): How often handler may be invoked (e.g.
+            `RateLimit(RateLimitPolicy.THROTTLE, 0.1)`). Every press invokes it if None.
 
     Returns:
         Callable[[], None]: A callable for removing handler.
     '''
 
-    _listener.start()
+    listener = _get_listener_for(handler)
+    entry = listener.add_handler(handler, key, execution, rate_limit)  # type: ignore[arg-type]
+
+    def remove() -> None:
+        listener._remove_entry(entry, key)
+
+    return remove
+
+
+def on_sequence(
+    keys: Union[str, Sequence[str]],
+    handler: Union[Handler, AsyncHandler],
+    timeout: float = DEFAULT_SEQUENCE_TIMEOUT,
+    execution: ExecutionPolicy = ExecutionPolicy.INLINE
+) -> Callable[[], None]:
+    '''
+    Invoke handler when keys are pressed one after another (e.g. 'ctrl+x ctrl+s' or 'g g').
+
+    Args:
+        keys (Union[str, Sequence[str]]): Keys separated by spaces, or a sequence of keys.
+        handler (Union[Handler, AsyncHandler]): Handler to invoke with the event of the last key.
+        timeout (float): Maximum seconds between two keys of the sequence.
+        execution (ExecutionPolicy): Where handler runs. Coroutine function handlers must be INLINE.
+
+    Returns:
+        Callable[[], None]: A callable for removing handler.
+    '''
+
+    listener = _get_listener_for(handler)
+    entry = listener.add_sequence(keys, handler, timeout, execution)  # type: ignore[arg-type]
+
+    def remove() -> None:
+        listener._remove_sequence_entry(keys, entry)
+
+    return remove
+
+
+def on_batch(handler: BatchHandler) -> Callable[[], None]:
+    '''
+    Invoke handler once per read with all events parsed from it.
+
+    Args:
+        handler (BatchHandler): Handler to invoke with an `EventBatch`.
+
+    Returns:
+        Callable[[], None]: A callable for removing handler.
+    '''
 
-    handler_checking_key: Handler = lambda event: (
-        key in [Keys.ANY, event.key] or None) and handler(event)
-    _listener.add_handler(handler_checking_key)
+    listener = _get_listener()
+    listener.add_batch_handler(handler)
 
     def remove() -> None:
-        _listener.remove_handler(handler_checking_key)
+        listener.remove_batch_handler(handler)
 
     return remove
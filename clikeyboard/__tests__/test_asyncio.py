@@ -0,0 +1,187 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+from typing import Any, Callable, Optional
+
+from clikeyboard import ExecutionPolicy, KeyEvent, Keys
+from clikeyboard._asyncio import AsyncListener, _listeners, events
+
+if sys.platform != 'win32':
+    import pty
+
+    from clikeyboard._posix import PosixInput
+
+
+class ThreadedInput:
+    '''Input without a file descriptor, which the listener has to read on a thread.'''
+
+    def __init__(self, input: 'PosixInput') -> None:
+        self._input = input
+
+    def enable(self) -> Callable[[], None]:
+        return self._input.enable()
+
+    def listen(self, handler: Callable[[list[str]], None], timeout: Optional[float] = None) -> None:
+        self._input.listen(handler, timeout)
+
+    def wakeup(self) -> None:
+        self._input.wakeup()
+
+    def close(self) -> None:
+        self._input.close()
+
+
+@unittest.skipIf(sys.platform == 'win32', 'POSIX only')
+class TestAsyncListener(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.master, self.slave = pty.openpty()
+        self.input = PosixInput(self.slave)
+        self.events: list[KeyEvent] = []
+        self.received = asyncio.Event()
+
+    def tearDown(self) -> None:
+        self.input.close()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def handler(self, event: KeyEvent) -> None:
+        self.events.append(event)
+        self.received.set()
+
+    async def receive(self, count: int) -> None:
+        while len(self.events) < count:
+            await asyncio.wait_for(self.received.wait(), 1.0)
+            self.received.clear()
+
+    async def test_keys_read_on_loop(self) -> None:
+        listener = AsyncListener(self.input)
+        listener.add_handler(self.handler)
+        listener.start()
+        try:
+            # Read by the loop itself rather than by a thread.
+            self.assertIsNone(listener._listening_thread)
+            os.write(self.master, b'a\x1b[A')
+            await self.receive(2)
+        finally:
+            listener.stop()
+
+        self.assertEqual([event.key for event in self.events], ['a', Keys.UP])
+
+    async def test_keys_read_on_thread(self) -> None:
+        listener = AsyncListener(ThreadedInput(self.input))  # type: ignore[arg-type]
+        listener.add_handler(self.handler)
+        listener.start()
+        try:
+            self.assertIsNotNone(listener._listening_thread)
+            os.write(self.master, b'ab')
+            await self.receive(2)
+        finally:
+            listener.stop()
+
+        self.assertEqual([event.key for event in self.events], ['a', 'b'])
+
+    async def test_coroutine_handlers_run_as_tasks(self) -> None:
+        errors: list[tuple[Exception, Callable[..., Any], Any]] = []
+        listener = AsyncListener(self.input, on_error=lambda *error: errors.append(error))
+        release = asyncio.Event()
+
+        async def handler(event: KeyEvent) -> None:
+            self.handler(event)
+            await release.wait()
+
+        async def failing(event: KeyEvent) -> None:
+            raise ValueError(event)
+
+        listener.add_handler(handler, 'a')
+        listener.add_handler(failing, 'b')
+        listener.start()
+        try:
+            os.write(self.master, b'aa')
+            # Both run at once, as neither blocks dispatch of the other event.
+            await self.receive(2)
+            self.assertEqual(len(listener._tasks), 2)
+            release.set()
+
+            os.write(self.master, b'b')
+            while not errors:
+                await asyncio.sleep(0.01)
+        finally:
+            listener.stop()
+
+        error, failed_handler, event = errors[0]
+        self.assertIsInstance(error, ValueError)
+        self.assertIs(failed_handler, failing)
+        self.assertEqual(event.key, 'b')
+        self.assertEqual(listener.handler_stats[failing].failures, 1)
+        self.assertFalse(listener._tasks)
+
+    async def test_escape_flushed_after_timeout(self) -> None:
+        listener = AsyncListener(self.input)
+        listener.add_handler(self.handler)
+        listener.start()
+        try:
+            written_at = time.monotonic()
+            os.write(self.master, b'\x1b')
+            await self.receive(1)
+            elapsed = time.monotonic() - written_at
+        finally:
+            listener.stop()
+
+        self.assertEqual([event.key for event in self.events], [Keys.ESCAPE])
+        # Held back until the rest of a sequence can no longer arrive.
+        self.assertGreaterEqual(elapsed, 0.05)
+
+    async def test_events_removes_its_handler(self) -> None:
+        listener = _listeners[asyncio.get_running_loop()] = AsyncListener(self.input)
+        listener.add_handler(self.handler, 'a')
+        try:
+            iterator = events('a')
+            os.write(self.master, b'a')
+            event = await asyncio.wait_for(iterator.__anext__(), 1.0)
+            self.assertEqual(event.key, 'a')
+            self.assertEqual(len(listener._handlers.by_key['a']), 2)
+
+            await iterator.aclose()
+            # Only its own handler is removed.
+            self.assertEqual(listener._handlers.by_key['a'], (self.handler,))
+        finally:
+            listener.stop()
+
+    async def test_close_releases_resources(self) -> None:
+        received = threading.Event()
+        fds = len(os.listdir('/dev/fd'))
+        threads = threading.active_count()
+        for _ in range(50):
+            async with AsyncListener(PosixInput(self.slave)) as listener:
+                listener.add_handler(lambda event: received.set(), 'a', ExecutionPolicy.SERIAL)
+                listener.add_handler(lambda event: received.set(), 'b', ExecutionPolicy.POOL)
+                for key in (b'a', b'b'):
+                    received.clear()
+                    os.write(self.master, key)
+                    while not received.is_set():
+                        await asyncio.sleep(0.001)
+
+        # The wakeup pipe and selector of each input are closed.
+        self.assertEqual(len(os.listdir('/dev/fd')), fds)
+        deadline = time.monotonic() + 1.0
+        while threading.active_count() > threads and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        self.assertEqual(threading.active_count(), threads)
+
+    async def test_started_again_after_close(self) -> None:
+        listener = AsyncListener(self.input)
+        listener.add_handler(self.handler)
+        for key in ('a', 'b'):
+            async with listener:
+                os.write(self.master, key.encode())
+                await self.receive(1)
+            self.assertEqual([event.key for event in self.events], [key])
+            self.events.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
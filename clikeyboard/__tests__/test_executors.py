@@ -0,0 +1,114 @@
+import threading
+import unittest
+
+from clikeyboard import ExecutionPolicy, KeyEvent
+from clikeyboard._executors import SerialWorker
+from clikeyboard._handlers import Registry
+
+
+def handler(event: KeyEvent) -> None:
+    pass
+
+
+async def coroutine_handler(event: KeyEvent) -> None:
+    pass
+
+
+def serial_worker(registry: Registry, key: str) -> SerialWorker:
+    worker = registry._handlers.by_key[key][0]
+    assert isinstance(worker, SerialWorker)
+    return worker
+
+
+class TestExecutionPolicy(unittest.TestCase):
+
+    def test_serial_runs_in_order_off_thread(self) -> None:
+        registry = Registry()
+        threads: list[threading.Thread] = []
+        keys: list[str] = []
+        done = threading.Event()
+
+        def record(event: KeyEvent) -> None:
+            threads.append(threading.current_thread())
+            keys.append(event.key)
+            if len(keys) == 3:
+                done.set()
+
+        registry.add_handler(record, 'a', ExecutionPolicy.SERIAL)
+        registry.add_handler(record, 'b', ExecutionPolicy.SERIAL)
+        registry._dispatch([KeyEvent('a'), KeyEvent('a'), KeyEvent('b')])
+
+        self.assertTrue(done.wait(1.0))
+        self.assertEqual(sorted(keys), ['a', 'a', 'b'])
+        self.assertNotIn(threading.current_thread(), threads)
+        registry.remove_handler(record, 'a')
+        registry.remove_handler(record, 'b')
+
+    def test_remove_closes_serial_worker(self) -> None:
+        registry = Registry()
+        registry.add_handler(handler, 'a', ExecutionPolicy.SERIAL)
+        worker = serial_worker(registry, 'a')
+        self.assertTrue(worker._thread.is_alive())
+
+        registry.remove_handler(handler, 'a')
+        worker._thread.join(1.0)
+        self.assertFalse(worker._thread.is_alive())
+
+    def test_remove_sequence_closes_serial_worker(self) -> None:
+        registry = Registry()
+        registry.add_sequence('a b', handler, execution=ExecutionPolicy.SERIAL)
+        worker = registry._handlers.sequences.children['a'].children['b'].handlers[0]
+        assert isinstance(worker, SerialWorker)
+
+        registry.remove_sequence('a b', handler)
+        worker._thread.join(1.0)
+        self.assertFalse(worker._thread.is_alive())
+
+    def test_disable_closes_serial_worker(self) -> None:
+        registry = Registry(on_error=lambda error, handler, event: None, max_failures=1)
+        failed = threading.Event()
+
+        def fail(event: KeyEvent) -> None:
+            failed.set()
+            raise ValueError()
+
+        registry.add_handler(fail, 'a', ExecutionPolicy.SERIAL)
+        worker = serial_worker(registry, 'a')
+        registry._dispatch([KeyEvent('a')])
+
+        self.assertTrue(failed.wait(1.0))
+        worker._thread.join(1.0)
+        self.assertFalse(worker._thread.is_alive())
+        self.assertNotIn('a', registry._handlers.by_key)
+
+    def test_coroutine_handler_must_be_inline(self) -> None:
+        registry = Registry()
+        for execution in (ExecutionPolicy.POOL, ExecutionPolicy.SERIAL):
+            with self.assertRaises(ValueError):
+                registry.add_handler(coroutine_handler, 'a', execution)  # type: ignore[arg-type]
+            with self.assertRaises(ValueError):
+                registry.add_sequence('a b', coroutine_handler, execution=execution)  # type: ignore[arg-type]
+        self.assertEqual(registry._handlers.by_key, {})
+        self.assertEqual(registry._handlers.sequences.children, {})
+
+    def test_pool(self) -> None:
+        registry = Registry()
+        done = threading.Event()
+        keys: list[str] = []
+
+        def record(event: KeyEvent) -> None:
+            keys.append(event.key)
+            if len(keys) == 3:
+                done.set()
+
+        registry.add_handler(record, 'a', ExecutionPolicy.POOL)
+        registry._dispatch([KeyEvent('a')] * 3)
+        self.assertTrue(done.wait(1.0))
+
+        # Waits are recorded before the handler runs.
+        self.assertEqual(registry.executor_stats[ExecutionPolicy.POOL].count, 3)
+        self.assertEqual(keys, ['a', 'a', 'a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+import unittest
+from typing import Any, Callable
+from unittest import mock
+
+from clikeyboard import HandlerStats, KeyEvent, Keys, RateLimit, RateLimitPolicy
+from clikeyboard._handlers import Registry
+
+
+class Failing:
+    '''Handler failing while `fail` is set.'''
+
+    def __init__(self) -> None:
+        self.fail = True
+        self.calls = 0
+
+    def __call__(self, event: Any) -> None:
+        self.calls += 1
+        if self.fail:
+            raise ValueError(event)
+
+
+def stats(registry: Registry, handler: Callable[..., Any]) -> tuple[int, int, bool]:
+    handler_stats: HandlerStats = registry.handler_stats[handler]
+    return handler_stats.failures, handler_stats.consecutive_failures, handler_stats.disabled
+
+
+class TestHandlerErrors(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.errors: list[tuple[Exception, Callable[..., Any], Any]] = []
+
+    def on_error(self, error: Exception, handler: Callable[..., Any], event: Any) -> None:
+        self.errors.append((error, handler, event))
+
+    def test_error_hook(self) -> None:
+        registry = Registry(on_error=self.on_error)
+        failing = Failing()
+        keys: list[str] = []
+        registry.add_handler(failing, 'a')
+        registry.add_handler(lambda event: keys.append(event.key), 'a')
+
+        event = KeyEvent('a')
+        registry._dispatch([event, KeyEvent('a')])
+
+        # Other handlers and later events are dispatched as usual.
+        self.assertEqual(keys, ['a', 'a'])
+        self.assertEqual(len(self.errors), 2)
+        error, handler, failed_event = self.errors[0]
+        self.assertIsInstance(error, ValueError)
+        self.assertIs(handler, failing)
+        self.assertIs(failed_event, event)
+
+    def test_failing_error_hook_is_reported(self) -> None:
+        def on_error(error: Exception, handler: Callable[..., Any], event: Any) -> None:
+            raise RuntimeError()
+
+        registry = Registry(on_error=on_error)
+        registry.add_handler(Failing(), 'a')
+        with mock.patch('sys.excepthook') as excepthook:
+            registry._dispatch([KeyEvent('a')])
+
+        excepthook.assert_called_once()
+        self.assertIs(excepthook.call_args[0][0], RuntimeError)
+
+    def test_failure_counts(self) -> None:
+        registry = Registry(on_error=self.on_error)
+        failing = Failing()
+        registry.add_handler(failing, 'a')
+
+        registry._dispatch([KeyEvent('a')] * 3)
+        self.assertEqual(stats(registry, failing), (3, 3, False))
+
+        # A success resets the consecutive failures only.
+        failing.fail = False
+        registry._dispatch([KeyEvent('a')])
+        self.assertEqual(stats(registry, failing), (3, 0, False))
+        self.assertEqual(registry._failing, {})
+
+        failing.fail = True
+        registry._dispatch([KeyEvent('a')])
+        self.assertEqual(stats(registry, failing), (4, 1, False))
+
+    def test_removed_after_max_failures(self) -> None:
+        registry = Registry(on_error=self.on_error, max_failures=3)
+        failing = Failing()
+        registry.add_handler(failing, 'a')
+        registry.add_handler(failing, 'b')
+        registry.add_sequence('x y', failing)
+
+        registry._dispatch([KeyEvent('a'), KeyEvent('b')])
+        self.assertEqual(stats(registry, failing), (2, 2, False))
+        registry._dispatch([KeyEvent('a')])
+        self.assertEqual(stats(registry, failing), (3, 3, True))
+
+        # Removed from every key and sequence.
+        self.assertEqual(registry._handlers.by_key, {})
+        self.assertEqual(registry._handlers.sequences.children, {})
+        registry._dispatch([KeyEvent('a'), KeyEvent('b'), KeyEvent('x'), KeyEvent('y')])
+        self.assertEqual(failing.calls, 3)
+
+    def test_success_keeps_handler(self) -> None:
+        registry = Registry(on_error=self.on_error, max_failures=2)
+        failing = Failing()
+        registry.add_handler(failing, 'a')
+
+        for _ in range(3):
+            failing.fail = True
+            registry._dispatch([KeyEvent('a')])
+            failing.fail = False
+            registry._dispatch([KeyEvent('a')])
+
+        self.assertEqual(stats(registry, failing), (3, 0, False))
+        self.assertIn('a', registry._handlers.by_key)
+
+    def test_added_again_after_removal(self) -> None:
+        registry = Registry(on_error=self.on_error, max_failures=1)
+        failing = Failing()
+        registry.add_handler(failing, 'a')
+        registry._dispatch([KeyEvent('a')])
+        self.assertEqual(stats(registry, failing), (1, 1, True))
+
+        registry.add_handler(failing, 'a')
+        self.assertEqual(stats(registry, failing), (1, 0, False))
+        registry._dispatch([KeyEvent('a')])
+        self.assertEqual(stats(registry, failing), (2, 1, True))
+
+    def test_batch_handler(self) -> None:
+        registry = Registry(on_error=self.on_error, max_failures=2)
+        failing = Failing()
+        registry.add_batch_handler(failing)
+
+        registry._dispatch([KeyEvent('a'), KeyEvent('b')])
+        self.assertEqual([event.key for event in self.errors[0][2]], ['a', 'b'])
+        registry._dispatch([KeyEvent('c')])
+
+        self.assertEqual(stats(registry, failing), (2, 2, True))
+        self.assertEqual(registry._handlers.for_batch, ())
+
+
+def handler(event: KeyEvent) -> None:
+    pass
+
+
+class TestInterest(unittest.TestCase):
+
+    def test_keys_with_handlers(self) -> None:
+        registry = Registry()
+        self.assertEqual(registry._handlers.interest, frozenset())
+        registry.add_handler(handler, 'a')
+        registry.add_handler(handler, Keys.UP)
+        self.assertEqual(registry._handlers.interest, {'a', Keys.UP})
+
+        registry.remove_handler(handler, 'a')
+        self.assertEqual(registry._handlers.interest, {Keys.UP})
+
+    def test_every_key_matters(self) -> None:
+        registry = Registry()
+        registry.add_handler(handler, 'a')
+        for add, remove in (
+            (lambda: registry.add_handler(handler), lambda: registry.remove_handler(handler, Keys.ANY)),
+            (lambda: registry.add_batch_handler(handler), lambda: registry.remove_batch_handler(handler)),
+            (lambda: registry.add_sequence('x y', handler), lambda: registry.remove_sequence('x y', handler)),
+        ):
+            add()
+            self.assertIsNone(registry._handlers.interest)
+            remove()
+            self.assertEqual(registry._handlers.interest, {'a'})
+
+    def test_updated_incrementally(self) -> None:
+        registry = Registry()
+        registry.add_handler(handler, 'a')
+        keys = registry._handlers.keys
+
+        # The set is passed on while no key gets its first handler or loses its last one.
+        registry.add_handler(lambda event: None, 'a')
+        registry.add_handler(handler)
+        registry.remove_handler(handler, Keys.ANY)
+        self.assertIs(registry._handlers.keys, keys)
+        self.assertIs(registry._handlers.interest, keys)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestRemoveEntry(unittest.TestCase):
+
+    def test_removes_only_its_binding(self) -> None:
+        registry = Registry()
+        keys: list[str] = []
+        handler = keys.append
+        first = registry.add_handler(lambda event: handler(event.key), 'a')
+        second = registry.add_handler(lambda event: handler(event.key), 'a')
+
+        registry._remove_entry(first, 'a')
+        registry._dispatch([KeyEvent('a')])
+        self.assertEqual(keys, ['a'])
+
+        registry._remove_entry(second, 'a')
+        registry._dispatch([KeyEvent('a')])
+        self.assertEqual(keys, ['a'])
+        self.assertEqual(registry._handlers.keys, frozenset())
+
+    def test_same_handler_added_twice(self) -> None:
+        registry = Registry()
+        events: list[KeyEvent] = []
+        first = registry.add_handler(events.append, 'a')
+        registry.add_handler(events.append, 'a', rate_limit=RateLimit(RateLimitPolicy.THROTTLE, 60.0))
+
+        registry._remove_entry(first, 'a')
+        registry._dispatch([KeyEvent('a')])
+        self.assertEqual(len(events), 1)
+
+    def test_same_sequence_added_twice(self) -> None:
+        registry = Registry()
+        events: list[KeyEvent] = []
+        first = registry.add_sequence('x y', events.append)
+        registry.add_sequence('x y', events.append)
+
+        registry._remove_sequence_entry('x y', first)
+        registry._dispatch([KeyEvent('x'), KeyEvent('y')])
+        self.assertEqual(len(events), 1)
+
+        # Removing all occurrences still removes every binding.
+        registry.remove_sequence('x y', events.append)
+        registry._dispatch([KeyEvent('x'), KeyEvent('y')])
+        self.assertEqual(len(events), 1)
@@ -0,0 +1,115 @@
+import os
+import queue
+import sys
+import time
+import unittest
+
+from clikeyboard import KeyEvent, Keys, MultiplexListener
+from clikeyboard.event import shared_key_event
+
+
+def wait_until(condition, timeout: float = 1.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@unittest.skipIf(sys.platform == 'win32', 'POSIX only')
+class TestMultiplexListener(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.listener = MultiplexListener()
+        self.addCleanup(self.listener.close)
+        self.events: 'queue.Queue[tuple[object, str]]' = queue.Queue()
+
+    def pipe(self, id: str) -> int:
+        reader, writer = os.pipe()
+        self.addCleanup(os.close, reader)
+        source = self.listener.add_source(reader, id)
+        source.add_handler(self.record)
+        return writer
+
+    def record(self, event: KeyEvent) -> None:
+        self.events.put((event.source, event.key))
+
+    def get(self) -> tuple[object, str]:
+        return self.events.get(timeout=1.0)
+
+    def test_sources(self) -> None:
+        a = self.pipe('a')
+        b = self.pipe('b')
+        self.addCleanup(os.close, a)
+        self.addCleanup(os.close, b)
+        self.listener.start()
+
+        os.write(a, b'x')
+        self.assertEqual(self.get(), ('a', 'x'))
+        os.write(b, b'\x1b[A')
+        self.assertEqual(self.get(), ('b', Keys.UP))
+
+    def test_add_source_while_running(self) -> None:
+        self.listener.start()
+        a = self.pipe('a')
+        self.addCleanup(os.close, a)
+
+        os.write(a, b'x')
+        self.assertEqual(self.get(), ('a', 'x'))
+
+    def test_remove_source_while_running(self) -> None:
+        a = self.pipe('a')
+        b = self.pipe('b')
+        self.addCleanup(os.close, a)
+        self.addCleanup(os.close, b)
+        self.listener.start()
+
+        self.listener.remove_source(self.listener.sources[0])
+        self.assertEqual([source.id for source in self.listener.sources], ['b'])
+        os.write(a, b'x')
+        os.write(b, b'y')
+        self.assertEqual(self.get(), ('b', 'y'))
+        self.assertTrue(self.events.empty())
+
+    def test_eof_removes_source(self) -> None:
+        a = self.pipe('a')
+        self.listener.start()
+        source = self.listener.sources[0]
+
+        # A lone escape pending at the end of input is flushed.
+        os.write(a, b'\x1b')
+        os.close(a)
+        self.assertEqual(self.get(), ('a', Keys.ESCAPE))
+        self.assertTrue(wait_until(lambda: not self.listener.sources))
+        self.assertTrue(source.at_eof)
+
+    def test_escape_flushed_after_timeout(self) -> None:
+        a = self.pipe('a')
+        self.addCleanup(os.close, a)
+        self.listener.start()
+
+        os.write(a, b'\x1b')
+        self.assertEqual(self.get(), ('a', Keys.ESCAPE))
+
+    def test_shared_events_are_not_stamped(self) -> None:
+        self.addCleanup(os.close, self.pipe('a'))
+        source = self.listener.sources[0]
+        shared = shared_key_event('x')
+        events = [shared]
+
+        source._stamp(events)
+        self.assertEqual(events[0].source, 'a')
+        self.assertIsNone(shared.source)
+        self.assertIs(shared_key_event('x'), shared)
+
+    def test_close_twice(self) -> None:
+        self.addCleanup(os.close, self.pipe('a'))
+        self.listener.start()
+        self.listener.close()
+        self.listener.close()
+        self.assertEqual(self.listener.sources, ())
+
+
+if __name__ == '__main__':
+    unittest.main()
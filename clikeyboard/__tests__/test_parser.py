@@ -0,0 +1,249 @@
+import os
+import sys
+import unittest
+from typing import Iterable
+
+from clikeyboard import KeyEvent, Keys, Modifiers, MouseAction, MouseButton, MouseEvent, PasteEvent
+from clikeyboard._ansi_sequences import common_sequences, decode_csi, decode_sgr_mouse, decode_ss3
+from clikeyboard._parser import Parser
+
+
+def keys(events: Iterable[KeyEvent]) -> list[str]:
+    return [event.key for event in events]
+
+
+class TestParser(unittest.TestCase):
+
+    def test_parse(self) -> None:
+        parser = Parser()
+        self.assertEqual(keys(parser.parse('a\x1b[A\x1bOP\x03')), ['a', Keys.UP, Keys.F1, Keys.CONTROL_C])
+        self.assertFalse(parser.pending)
+
+    def test_sequence_split_across_reads(self) -> None:
+        parser = Parser()
+        self.assertEqual(keys(parser.parse('\x1b')), [])
+        self.assertTrue(parser.pending)
+        self.assertEqual(keys(parser.parse('[1;')), [])
+        self.assertEqual(keys(parser.parse('5')), [])
+        self.assertEqual(keys(parser.parse('Ab')), [Keys.CONTROL_UP, 'b'])
+        self.assertFalse(parser.pending)
+
+    def test_split_sequence_keeps_first_timestamp(self) -> None:
+        parser = Parser()
+        self.assertEqual(list(parser.parse('\x1b[', 1)), [])
+        events = list(parser.parse('A', 2))
+        self.assertEqual(keys(events), [Keys.UP])
+        self.assertEqual(events[0].timestamp, 1)
+
+    def test_flush_lone_escape(self) -> None:
+        parser = Parser()
+        self.assertEqual(keys(parser.parse('\x1b')), [])
+        self.assertEqual(keys(parser.flush()), [Keys.ESCAPE])
+        self.assertFalse(parser.pending)
+        self.assertEqual(keys(parser.flush()), [])
+
+    def test_flush_incomplete_sequence(self) -> None:
+        parser = Parser()
+        self.assertEqual(keys(parser.parse('\x1b[1;')), [])
+        self.assertEqual(keys(parser.flush()), [Keys.ESCAPE, '[', '1', ';'])
+
+    def test_dead_end_falls_back_to_longest_match(self) -> None:
+        parser = Parser()
+        # '\x1b' is escape, and no sequence continues with 'x'.
+        self.assertEqual(keys(parser.parse('\x1bx')), [Keys.ESCAPE, 'x'])
+        # The rest is parsed again, so a sequence following the dead end is found.
+        self.assertEqual(keys(parser.parse('\x1bx\x1b[B')), [Keys.ESCAPE, 'x', Keys.DOWN])
+
+    def test_malformed_control_sequence(self) -> None:
+        parser = Parser()
+        self.assertEqual(
+            keys(parser.parse('\x1b[1;5\x03')),
+            [Keys.ESCAPE, '[', '1', ';', '5', Keys.CONTROL_C]
+        )
+
+    def test_common_sequences_match_decoder(self) -> None:
+        parser = Parser()
+        for sequence, expected in common_sequences().items():
+            decode = decode_ss3 if sequence.startswith('\x1bO') else decode_csi
+            self.assertEqual(decode(sequence), expected)
+            self.assertEqual(keys(parser.parse(sequence)), list(expected))
+
+    def test_sequence_leaving_tree_is_decoded(self) -> None:
+        parser = Parser()
+        self.assertEqual(keys(parser.parse('\x1b[1;13A')), ['ctrl+meta+up'])
+        self.assertEqual(keys(parser.parse('\x1b[15;11~')), ['alt+meta+f5'])
+        self.assertEqual(keys(parser.parse('\x1b[[A')), [Keys.F1])
+        self.assertEqual(keys(parser.parse('\x1bO5A')), [Keys.CONTROL_UP])
+        # Cursor position reports and device attributes aren't keys.
+        self.assertEqual(keys(parser.parse('\x1b[12;40R\x1b[?1;2c')), ['\x1b[12;40R', '\x1b[?1;2c'])
+
+    def test_shifted_function_keys(self) -> None:
+        parser = Parser()
+        # xterm names F1 to F12 with shift F13 to F24.
+        self.assertEqual(
+            keys(parser.parse('\x1b[1;2P\x1b[1;2S\x1b[15;2~\x1b[24;2~\x1bO2Q')),
+            [Keys.F13, Keys.F16, Keys.F17, Keys.F24, Keys.F14]
+        )
+        self.assertEqual(
+            keys(parser.parse('\x1b[1;6P\x1b[24;6~\x1b[24;5~')),
+            [Keys.CONTROL_F13, Keys.CONTROL_F24, Keys.CONTROL_F12]
+        )
+        # Other modifiers keep shift.
+        self.assertEqual(keys(parser.parse('\x1b[1;4P\x1b[25;2~')), ['alt+shift+f1', 'shift+f13'])
+
+    def test_interest(self) -> None:
+        parser = Parser(interest=frozenset({'a', Keys.UP}))
+        self.assertEqual(keys(parser.parse('xa\x1b[A\x1b[B')), ['a', Keys.UP])
+        # Dropped keys still end a pending sequence.
+        self.assertEqual(keys(parser.parse('\x1b[1;5')), [])
+        self.assertEqual(keys(parser.parse('x')), [])
+        self.assertFalse(parser.pending)
+
+        parser.interest = None
+        self.assertEqual(keys(parser.parse('xa\x1b[B')), ['x', 'a', Keys.DOWN])
+
+    def test_coalesce_repeats(self) -> None:
+        parser = Parser(coalesce_repeats=True)
+        events = list(parser.parse('aaab'))
+        self.assertEqual([(event.key, event.repeat) for event in events], [('a', 3), ('b', 1)])
+
+    @unittest.skipIf(sys.platform == 'win32', 'POSIX only')
+    def test_invalid_utf8(self) -> None:
+        from clikeyboard._posix import PosixInput
+
+        reader, writer = os.pipe()
+        input = PosixInput(reader)
+        parser = Parser()
+        try:
+            os.write(writer, b'a\xffb\xc3')
+            self.assertEqual(keys(parser.parse(input.read())), ['a', '�', 'b'])
+            # The rest of a character split across reads is joined.
+            os.write(writer, b'\xa9')
+            self.assertEqual(keys(parser.parse(input.read())), ['é'])
+        finally:
+            os.close(reader)
+            os.close(writer)
+
+
+def mouse(event: KeyEvent) -> tuple[int, int, MouseButton, MouseAction, Modifiers]:
+    assert isinstance(event, MouseEvent)
+    return event.x, event.y, event.button, event.action, event.modifiers
+
+
+class TestMouse(unittest.TestCase):
+
+    def test_decode(self) -> None:
+        cases = {
+            '\x1b[<0;1;1M': (0, 0, MouseButton.LEFT, MouseAction.PRESS, Modifiers.NONE),
+            '\x1b[<2;10;5m': (9, 4, MouseButton.RIGHT, MouseAction.RELEASE, Modifiers.NONE),
+            # Dragging with the middle button held, with shift and control.
+            '\x1b[<53;3;4M': (2, 3, MouseButton.MIDDLE, MouseAction.MOVE, Modifiers.SHIFT | Modifiers.CONTROL),
+            '\x1b[<35;3;4M': (2, 3, MouseButton.NONE, MouseAction.MOVE, Modifiers.NONE),
+            '\x1b[<65;1;1M': (0, 0, MouseButton.WHEEL_DOWN, MouseAction.SCROLL, Modifiers.NONE),
+            '\x1b[<72;1;1M': (0, 0, MouseButton.WHEEL_UP, MouseAction.SCROLL, Modifiers.ALT),
+            # Outside the window.
+            '\x1b[<0;0;0M': (0, 0, MouseButton.LEFT, MouseAction.PRESS, Modifiers.NONE),
+        }
+        for sequence, expected in cases.items():
+            with self.subTest(sequence=sequence):
+                event = decode_sgr_mouse(sequence, 7)
+                assert event is not None
+                self.assertEqual(mouse(event), expected)
+                self.assertEqual(event.key, Keys.MOUSE)
+                self.assertEqual(event.timestamp, 7)
+
+    def test_decode_unsupported(self) -> None:
+        self.assertIsNone(decode_sgr_mouse('\x1b[<128;1;1M'))
+        self.assertIsNone(decode_sgr_mouse('\x1b[<0;1M'))
+        self.assertIsNone(decode_sgr_mouse('\x1b[<0;x;1M'))
+
+    def test_parse(self) -> None:
+        parser = Parser()
+        events = list(parser.parse('a\x1b[<0;5;6M\x1b[<0;5;6mb', 3))
+        self.assertEqual(keys(events), ['a', Keys.MOUSE, Keys.MOUSE, 'b'])
+        self.assertEqual(mouse(events[1]), (4, 5, MouseButton.LEFT, MouseAction.PRESS, Modifiers.NONE))
+        self.assertEqual(mouse(events[2]), (4, 5, MouseButton.LEFT, MouseAction.RELEASE, Modifiers.NONE))
+        self.assertEqual(events[1].timestamp, 3)
+
+        # Split across reads.
+        self.assertEqual(list(parser.parse('\x1b[<0;1')), [])
+        self.assertEqual(keys(parser.parse('2;3M')), [Keys.MOUSE])
+        # A malformed report is delivered as it is.
+        self.assertEqual(keys(parser.parse('\x1b[<0;1;2;3M')), ['\x1b[<0;1;2;3M'])
+
+    def test_coalesce_motion(self) -> None:
+        parser = Parser(coalesce_motion=True)
+        events = list(parser.parse(
+            '\x1b[<35;1;1M\x1b[<35;2;1M\x1b[<35;3;1M'
+            # A different button, and a key, end a run.
+            '\x1b[<32;4;1M\x1b[<32;5;1Ma\x1b[<35;6;1M'
+        ))
+        self.assertEqual(
+            [(event.key, getattr(event, 'x', None)) for event in events],
+            [(Keys.MOUSE, 2), (Keys.MOUSE, 4), ('a', None), (Keys.MOUSE, 5)]
+        )
+
+        # Every motion without coalescing.
+        self.assertEqual(len(list(Parser().parse('\x1b[<35;1;1M\x1b[<35;2;1M'))), 2)
+
+
+
+def pastes(events: Iterable[KeyEvent]) -> list[tuple[str, bool, bool]]:
+    return [(event.text, event.final, event.truncated) for event in events if isinstance(event, PasteEvent)]
+
+
+class TestPaste(unittest.TestCase):
+
+    def test_paste(self) -> None:
+        parser = Parser()
+        events = list(parser.parse('a\x1b[200~b\x1b[Ac\x1b[201~d', 5))
+        self.assertEqual(keys(events), ['a', Keys.BRACKETED_PASTE, 'd'])
+        self.assertEqual(pastes(events), [('b\x1b[Ac', True, False)])
+        self.assertEqual(events[1].timestamp, 5)
+
+    def test_markers_split_across_reads(self) -> None:
+        parser = Parser()
+        self.assertEqual(list(parser.parse('\x1b[20')), [])
+        self.assertEqual(list(parser.parse('0~ab\x1b[2')), [])
+        # Escape in the text which isn't the end marker.
+        self.assertEqual(list(parser.parse('x\x1b[201')), [])
+        events = list(parser.parse('~c'))
+        self.assertEqual(keys(events), [Keys.BRACKETED_PASTE, 'c'])
+        self.assertEqual(pastes(events), [('ab\x1b[2x', True, False)])
+
+    def test_marker_cuts_pending_sequence(self) -> None:
+        parser = Parser()
+        events = list(parser.parse('\x1b[1;\x1b[200~a\x1b[201~'))
+        self.assertEqual(keys(events), [Keys.ESCAPE, '[', '1', ';', Keys.BRACKETED_PASTE])
+
+    def test_limit(self) -> None:
+        parser = Parser(paste_limit=4)
+        self.assertEqual(list(parser.parse('\x1b[200~abc')), [])
+        self.assertEqual(pastes(parser.parse('def\x1b[201~')), [('abcd', True, True)])
+        # The next paste starts from scratch.
+        self.assertEqual(pastes(parser.parse('\x1b[200~xy\x1b[201~')), [('xy', True, False)])
+
+    def test_chunks(self) -> None:
+        parser = Parser(paste_chunk_size=8)
+        self.assertEqual(pastes(parser.parse('\x1b[200~' + 'a' * 10)), [('a' * 10, False, False)])
+        self.assertEqual(pastes(parser.parse('abc')), [])
+        # The text before the end marker is in the final event, not in a chunk before an empty one.
+        self.assertEqual(pastes(parser.parse('b' * 10 + '\x1b[201~')), [('abc' + 'b' * 10, True, False)])
+
+        # The end marker read alone has nothing left to deliver.
+        self.assertEqual(pastes(parser.parse('\x1b[200~' + 'c' * 8)), [('c' * 8, False, False)])
+        self.assertEqual(pastes(parser.parse('\x1b[201~')), [('', True, False)])
+
+    def test_chunks_with_limit(self) -> None:
+        parser = Parser(paste_limit=10, paste_chunk_size=4)
+        events = pastes(parser.parse('\x1b[200~abcde'))
+        events += pastes(parser.parse('fghijklm\x1b[201~'))
+        self.assertEqual(events, [('abcde', False, False), ('fghij', True, True)])
+
+    def test_interest(self) -> None:
+        parser = Parser(interest=frozenset({'a'}))
+        self.assertEqual(keys(parser.parse('\x1b[200~abc\x1b[201~a')), ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import select
+import sys
+import time
+import unittest
+from io import UnsupportedOperation
+from typing import Callable, Optional, Sequence
+
+from clikeyboard import KeyEvent, Keys, Poller
+
+if sys.platform != 'win32':
+    import pty
+
+    from clikeyboard._posix import PosixInput
+
+
+def keys(events: Sequence[KeyEvent]) -> list[str]:
+    return [event.key for event in events]
+
+
+@unittest.skipIf(sys.platform == 'win32', 'POSIX only')
+class TestPoller(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.master, self.slave = pty.openpty()
+        self.poller = Poller(PosixInput(self.slave))
+        self.poller.start()
+
+    def tearDown(self) -> None:
+        self.poller.close()
+        if self.master >= 0:
+            os.close(self.master)
+        os.close(self.slave)
+
+    def test_idle(self) -> None:
+        self.assertEqual(self.poller.poll_events(), ())
+        self.assertIsNone(self.poller.next_timeout)
+
+    def test_poll_events(self) -> None:
+        os.write(self.master, b'a\x1b[Ab')
+        # Written to the master, so wait until the slave is readable.
+        select.select([self.poller.fileno()], [], [], 1.0)
+        self.assertEqual(keys(self.poller.poll_events()), ['a', Keys.UP, 'b'])
+        self.assertEqual(self.poller.poll_events(), ())
+
+    def test_read_key(self) -> None:
+        os.write(self.master, b'ab')
+        event = self.poller.read_key(1.0)
+        assert event is not None
+        self.assertEqual(event.key, 'a')
+        # Parsed with the first one, so it is returned without waiting.
+        self.assertEqual(self.poller.next_timeout, 0.0)
+        event = self.poller.read_key(0)
+        assert event is not None
+        self.assertEqual(event.key, 'b')
+
+    def test_read_key_times_out(self) -> None:
+        started_at = time.monotonic()
+        self.assertIsNone(self.poller.read_key(0.05))
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.05)
+
+    def test_lone_escape_flushed_after_timeout(self) -> None:
+        os.write(self.master, b'\x1b')
+        select.select([self.poller.fileno()], [], [], 1.0)
+        self.assertEqual(self.poller.poll_events(), ())
+        timeout = self.poller.next_timeout
+        assert timeout is not None
+        self.assertGreater(timeout, 0.0)
+
+        time.sleep(timeout)
+        self.assertEqual(keys(self.poller.poll_events()), [Keys.ESCAPE])
+        self.assertIsNone(self.poller.next_timeout)
+
+    def test_read_key_waits_for_lone_escape(self) -> None:
+        os.write(self.master, b'\x1b')
+        event = self.poller.read_key(1.0)
+        assert event is not None
+        self.assertEqual(event.key, Keys.ESCAPE)
+
+    def test_fileno(self) -> None:
+        self.assertEqual(self.poller.fileno(), self.slave)
+
+        poller = Poller(FilelessInput())  # type: ignore[arg-type]
+        poller.start()
+        with self.assertRaises(UnsupportedOperation):
+            poller.fileno()
+        poller.close()
+
+    def test_end_of_input(self) -> None:
+        os.write(self.master, b'a\x1b')
+        event = self.poller.read_key(1.0)
+        assert event is not None
+        self.assertEqual(event.key, 'a')
+        # Closing the master discards input the slave hasn't read, so close it once it has.
+        os.close(self.master)
+        self.master = -1
+
+        # The pending escape is flushed at the end of input, and then nothing is waited for.
+        started_at = time.monotonic()
+        event = self.poller.read_key(1.0)
+        assert event is not None
+        self.assertEqual(event.key, Keys.ESCAPE)
+        self.assertIsNone(self.poller.read_key(1.0))
+        self.assertLess(time.monotonic() - started_at, 0.5)
+        self.assertEqual(self.poller.poll_events(), ())
+
+
+class FilelessInput:
+    '''Input without a file descriptor.'''
+
+    def enable(self) -> Callable[[], None]:
+        return lambda: None
+
+    def listen(self, handler: Callable[[list[str]], None], timeout: Optional[float] = None) -> None:
+        pass
+
+    def wakeup(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+if __name__ == '__main__':
+    unittest.main()
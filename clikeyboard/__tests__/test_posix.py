@@ -0,0 +1,176 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from typing import Callable
+
+from clikeyboard import ExecutionPolicy, KeyEvent, Keys, Listener
+
+if sys.platform != 'win32':
+    import pty
+    import termios
+
+    from clikeyboard._posix import PosixInput
+
+
+@unittest.skipIf(sys.platform == 'win32', 'POSIX only')
+class TestPosixInput(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.master, self.slave = pty.openpty()
+
+    def tearDown(self) -> None:
+        os.close(self.master)
+        os.close(self.slave)
+
+    def test_raw_mode(self) -> None:
+        previous = termios.tcgetattr(self.slave)
+        input = PosixInput(self.slave)
+
+        restore = input.enable()
+        try:
+            lflag = termios.tcgetattr(self.slave)[3]
+            self.assertFalse(lflag & termios.ICANON)
+            self.assertFalse(lflag & termios.ECHO)
+        finally:
+            restore()
+            input.close()
+
+        self.assertEqual(termios.tcgetattr(self.slave), previous)
+
+    def test_read(self) -> None:
+        input = PosixInput(self.slave)
+        restore = input.enable()
+        try:
+            os.write(self.master, 'aé'.encode())
+            received: list[str] = []
+            input.listen(received.extend, 1.0)
+            self.assertEqual(''.join(received), 'aé')
+        finally:
+            restore()
+            input.close()
+
+    def test_modes_written_to_terminal(self) -> None:
+        input = PosixInput(self.slave, mouse=True, paste=True)
+        restore = input.enable()
+        try:
+            self.assertEqual(os.read(self.master, 1024), b'\x1b[?1000h\x1b[?1003h\x1b[?1006h\x1b[?2004h')
+        finally:
+            restore()
+            input.close()
+        self.assertEqual(os.read(self.master, 1024), b'\x1b[?2004l\x1b[?1006l\x1b[?1003l\x1b[?1000l')
+
+
+@unittest.skipIf(sys.platform == 'win32', 'POSIX only')
+class TestListener(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.master, self.slave = pty.openpty()
+        self.events: list[KeyEvent] = []
+        self.received = threading.Event()
+
+    def tearDown(self) -> None:
+        os.close(self.master)
+        os.close(self.slave)
+
+    def handler(self, event: KeyEvent) -> None:
+        self.events.append(event)
+        self.received.set()
+
+    def test_keys(self) -> None:
+        with Listener(PosixInput(self.slave)) as listener:
+            listener.add_handler(self.handler)
+            os.write(self.master, b'a\x1b[A')
+            while len(self.events) < 2:
+                self.assertTrue(self.received.wait(1.0))
+                self.received.clear()
+
+        self.assertEqual([event.key for event in self.events], ['a', Keys.UP])
+
+    def test_escape_flushed_after_timeout(self) -> None:
+        with Listener(PosixInput(self.slave)) as listener:
+            listener.add_handler(self.handler)
+            written_at = time.monotonic()
+            os.write(self.master, b'\x1b')
+            self.assertTrue(self.received.wait(1.0))
+            elapsed = time.monotonic() - written_at
+
+        self.assertEqual([event.key for event in self.events], [Keys.ESCAPE])
+        # Held back until the rest of a sequence can no longer arrive.
+        self.assertGreaterEqual(elapsed, 0.05)
+
+    def test_stop_wakes_up_listener(self) -> None:
+        listener = Listener(PosixInput(self.slave))
+        listener.start()
+        # Let the listening thread block on the selector.
+        time.sleep(0.05)
+        threads = [listener._listening_thread, listener._processing_thread]
+
+        started_at = time.monotonic()
+        listener.close()
+        self.assertLess(time.monotonic() - started_at, 0.5)
+        for thread in threads:
+            assert thread is not None
+            self.assertFalse(thread.is_alive())
+
+    def test_close_releases_handler_threads(self) -> None:
+        threads = threading.active_count()
+        for _ in range(50):
+            with Listener(PosixInput(self.slave)) as listener:
+                listener.add_handler(self.handler, 'a', ExecutionPolicy.SERIAL)
+                listener.add_handler(self.handler, 'b', ExecutionPolicy.POOL)
+                os.write(self.master, b'ab')
+                while len(self.events) < 2:
+                    self.assertTrue(self.received.wait(1.0))
+                    self.received.clear()
+                self.events.clear()
+
+        deadline = time.monotonic() + 1.0
+        while threading.active_count() > threads and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_handler_threads_start_again(self) -> None:
+        listener = Listener(PosixInput(self.slave))
+        listener.add_handler(self.handler, 'a', ExecutionPolicy.SERIAL)
+        listener.add_handler(self.handler, 'b', ExecutionPolicy.POOL)
+        for _ in range(2):
+            with listener:
+                os.write(self.master, b'ab')
+                while len(self.events) < 2:
+                    self.assertTrue(self.received.wait(1.0))
+                    self.received.clear()
+            self.assertEqual(sorted(event.key for event in self.events), ['a', 'b'])
+            self.events.clear()
+
+    def test_failed_start_can_be_retried(self) -> None:
+        input = PosixInput(self.slave)
+        enable = input.enable
+        failures = [OSError()]
+
+        def enable_once() -> Callable[[], None]:
+            if failures:
+                raise failures.pop()
+            return enable()
+
+        input.enable = enable_once  # type: ignore[method-assign]
+        listener = Listener(input)
+        with self.assertRaises(OSError):
+            listener.start()
+        self.assertFalse(listener._running)
+
+        with listener:
+            listener.add_handler(self.handler)
+            os.write(self.master, b'a')
+            self.assertTrue(self.received.wait(1.0))
+
+    def test_terminal_restored_on_close(self) -> None:
+        previous = termios.tcgetattr(self.slave)
+        with Listener(PosixInput(self.slave)):
+            self.assertNotEqual(termios.tcgetattr(self.slave), previous)
+        self.assertEqual(termios.tcgetattr(self.slave), previous)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import threading
+import time
+import unittest
+
+from clikeyboard import KeyEvent, OverflowPolicy
+from clikeyboard._queue import EventQueue
+
+
+def drain(queue: EventQueue) -> list[tuple[str, int]]:
+    events = []
+    while True:
+        batch = queue.get(0)
+        if batch is None:
+            return events
+        events.extend((event.key, event.repeat) for event in batch[0])
+
+
+def batch(keys: str) -> list[KeyEvent]:
+    return [KeyEvent(key) for key in keys]
+
+
+class TestEventQueue(unittest.TestCase):
+
+    def test_unbounded(self) -> None:
+        queue = EventQueue()
+        queue.put(batch('ab'))
+        queue.put([])
+        queue.put(batch('c'))
+        self.assertEqual(drain(queue), [('a', 1), ('b', 1), ('c', 1)])
+
+        stats = queue.stats
+        self.assertEqual((stats.enqueued, stats.dropped, stats.coalesced, stats.high_water), (3, 0, 0, 3))
+
+    def test_drop_oldest(self) -> None:
+        queue = EventQueue(3, OverflowPolicy.DROP_OLDEST)
+        queue.put(batch('ab'))
+        queue.put(batch('cd'))
+        self.assertEqual(drain(queue), [('b', 1), ('c', 1), ('d', 1)])
+
+        # A batch larger than the queue keeps its newest events.
+        queue.put(batch('efghi'))
+        self.assertEqual(drain(queue), [('g', 1), ('h', 1), ('i', 1)])
+
+        stats = queue.stats
+        self.assertEqual((stats.enqueued, stats.dropped, stats.high_water), (7, 3, 3))
+
+    def test_drop_newest(self) -> None:
+        queue = EventQueue(3, OverflowPolicy.DROP_NEWEST)
+        queue.put(batch('ab'))
+        queue.put(batch('cd'))
+        queue.put(batch('e'))
+        self.assertEqual(drain(queue), [('a', 1), ('b', 1), ('c', 1)])
+
+        stats = queue.stats
+        self.assertEqual((stats.enqueued, stats.dropped, stats.high_water), (3, 2, 3))
+
+    def test_coalesce(self) -> None:
+        queue = EventQueue(2, OverflowPolicy.COALESCE)
+        queue.put(batch('ab'))
+        queue.put(batch('bbb'))
+        self.assertEqual(drain(queue), [('a', 1), ('b', 4)])
+
+        stats = queue.stats
+        self.assertEqual((stats.enqueued, stats.dropped, stats.coalesced), (2, 0, 3))
+
+    def test_coalesce_waits_for_other_keys(self) -> None:
+        queue = EventQueue(2, OverflowPolicy.COALESCE)
+        queue.put(batch('ab'))
+        put = threading.Thread(target=queue.put, args=(batch('bc'),))
+        put.start()
+        time.sleep(0.05)
+        # 'b' is merged, while 'c' waits for room.
+        self.assertTrue(put.is_alive())
+
+        self.assertEqual(drain(queue), [('a', 1), ('b', 2)])
+        put.join(1.0)
+        self.assertFalse(put.is_alive())
+        self.assertEqual(drain(queue), [('c', 1)])
+
+    def test_block(self) -> None:
+        queue = EventQueue(2, OverflowPolicy.BLOCK)
+        queue.put(batch('ab'))
+        put = threading.Thread(target=queue.put, args=(batch('cd'),))
+        put.start()
+        time.sleep(0.05)
+        self.assertTrue(put.is_alive())
+
+        received = []
+        while len(received) < 4:
+            got = queue.get(1.0)
+            assert got is not None
+            received.extend(event.key for event in got[0])
+        put.join(1.0)
+
+        self.assertEqual(received, ['a', 'b', 'c', 'd'])
+        stats = queue.stats
+        self.assertEqual((stats.enqueued, stats.dropped, stats.high_water), (4, 0, 2))
+
+    def test_close_wakes_up_blocked_put(self) -> None:
+        queue = EventQueue(1, OverflowPolicy.BLOCK)
+        queue.put(batch('a'))
+        put = threading.Thread(target=queue.put, args=(batch('b'),))
+        put.start()
+        time.sleep(0.05)
+
+        queue.close()
+        put.join(1.0)
+        self.assertFalse(put.is_alive())
+        self.assertIsNone(queue.get(0))
+
+    def test_get_timeout(self) -> None:
+        queue = EventQueue()
+        started_at = time.monotonic()
+        self.assertIsNone(queue.get(0.05))
+        self.assertGreaterEqual(time.monotonic() - started_at, 0.04)
+
+
+if __name__ == '__main__':
+    unittest.main()
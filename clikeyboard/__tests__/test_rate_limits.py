@@ -0,0 +1,189 @@
+import unittest
+from typing import Any
+from unittest import mock
+
+from clikeyboard import KeyEvent, RateLimit, RateLimitPolicy
+from clikeyboard._handlers import Registry
+from clikeyboard._rate_limits import Timers
+
+
+class TestRateLimit(unittest.TestCase):
+
+    def test_interval(self) -> None:
+        with self.assertRaises(ValueError):
+            RateLimit(RateLimitPolicy.DEBOUNCE)
+        with self.assertRaises(ValueError):
+            RateLimit(RateLimitPolicy.THROTTLE, -1.0)
+        self.assertEqual(RateLimit(RateLimitPolicy.LATEST).interval, 0.0)
+
+
+class TestRateLimiters(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.now = 0.0
+        patcher = mock.patch('clikeyboard._rate_limits.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.registry = Registry()
+        self.invoked: list[tuple[str, float]] = []
+
+    def limit(self, policy: RateLimitPolicy, interval: float = 0.0) -> None:
+        self.registry.add_handler(self.handler, rate_limit=RateLimit(policy, interval))
+
+    def handler(self, event: KeyEvent) -> None:
+        self.invoked.append((event.key, self.now))
+
+    def run_until(self, now: float) -> None:
+        '''Run timers due by now, as a listener would.'''
+
+        deadline = self.registry._next_deadline()
+        while deadline is not None and deadline <= now:
+            self.now = deadline
+            self.registry._expire(deadline)
+            deadline = self.registry._next_deadline()
+        self.now = now
+
+    def press(self, keys: str, at: float) -> None:
+        self.run_until(at)
+        self.registry._dispatch([KeyEvent(key) for key in keys])
+
+    def stats(self) -> tuple[int, int]:
+        stats = self.registry.rate_limit_stats[self.handler]
+        return stats.received, stats.suppressed
+
+    def test_debounce(self) -> None:
+        self.limit(RateLimitPolicy.DEBOUNCE, 0.5)
+        self.press('a', 0.0)
+        self.press('b', 0.3)
+        self.press('c', 0.6)
+        self.assertEqual(self.registry._next_deadline(), 1.1)
+        self.run_until(1.0)
+        self.assertEqual(self.invoked, [])
+
+        self.run_until(1.1)
+        self.assertEqual(self.invoked, [('c', 1.1)])
+        self.press('d', 2.0)
+        self.run_until(3.0)
+        self.assertEqual(self.invoked, [('c', 1.1), ('d', 2.5)])
+        self.assertEqual(self.stats(), (4, 2))
+
+    def test_debounce_leading(self) -> None:
+        self.limit(RateLimitPolicy.DEBOUNCE_LEADING, 0.5)
+        self.press('a', 0.0)
+        self.press('b', 0.3)
+        # Each event restarts the interval, so this is still dropped.
+        self.press('c', 0.7)
+        self.press('d', 1.2)
+        self.assertIsNone(self.registry._next_deadline())
+
+        self.assertEqual(self.invoked, [('a', 0.0), ('d', 1.2)])
+        self.assertEqual(self.stats(), (4, 2))
+
+    def test_throttle(self) -> None:
+        self.limit(RateLimitPolicy.THROTTLE, 1.0)
+        self.press('a', 0.0)
+        self.press('b', 0.2)
+        self.press('c', 0.4)
+        self.assertEqual(self.invoked, [('a', 0.0)])
+        self.assertEqual(self.registry._next_deadline(), 1.0)
+
+        # The last event dropped in the interval is delivered at its end.
+        self.run_until(1.0)
+        self.assertEqual(self.invoked, [('a', 0.0), ('c', 1.0)])
+        # The next interval starts then.
+        self.press('d', 1.5)
+        self.run_until(2.0)
+        self.press('e', 3.5)
+        self.assertEqual(self.invoked, [('a', 0.0), ('c', 1.0), ('d', 2.0), ('e', 3.5)])
+        self.assertEqual(self.stats(), (5, 1))
+
+    def test_latest(self) -> None:
+        self.limit(RateLimitPolicy.LATEST)
+        self.press('abc', 0.0)
+        self.assertEqual(self.invoked, [])
+        self.assertEqual(self.registry._next_deadline(), 0.0)
+
+        # Runs once dispatch of the events at hand is done.
+        self.run_until(0.0)
+        self.press('d', 1.0)
+        self.run_until(1.0)
+        self.assertEqual(self.invoked, [('c', 0.0), ('d', 1.0)])
+        self.assertEqual(self.stats(), (4, 2))
+
+    def test_removed_limiter_drops_pending_event(self) -> None:
+        self.limit(RateLimitPolicy.DEBOUNCE, 0.5)
+        self.press('a', 0.0)
+        self.registry.remove_handler(self.handler)
+        self.run_until(1.0)
+        self.assertEqual(self.invoked, [])
+
+    def test_failures_of_delayed_invocations(self) -> None:
+        errors: list[Exception] = []
+        registry = self.registry = Registry(on_error=lambda error, handler, event: errors.append(error))
+
+        def fail(event: KeyEvent) -> None:
+            raise ValueError()
+
+        registry.add_handler(fail, rate_limit=RateLimit(RateLimitPolicy.DEBOUNCE, 0.5))
+        self.press('a', 0.0)
+        self.press('b', 0.1)
+        self.run_until(1.0)
+
+        # Suppressed events don't count as successes of the handler.
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(registry.handler_stats[fail].consecutive_failures, 1)
+
+
+class FakeLimiter:
+    '''Records expiry like a limiter, for testing the heap alone.'''
+
+    def __init__(self, name: str, expired: list[tuple[str, float]]) -> None:
+        self.name = name
+        self.expired = expired
+        self._due: Any = None
+
+    def _expire(self, now: float) -> None:
+        self.expired.append((self.name, now))
+
+
+class TestTimers(unittest.TestCase):
+
+    def test_expire_in_order(self) -> None:
+        timers = Timers()
+        expired: list[tuple[str, float]] = []
+        a, b, c = (FakeLimiter(name, expired) for name in 'abc')
+        self.assertIsNone(timers.deadline)
+
+        timers.schedule(b, 2.0)  # type: ignore[arg-type]
+        timers.schedule(a, 1.0)  # type: ignore[arg-type]
+        timers.schedule(c, 2.0)  # type: ignore[arg-type]
+        self.assertEqual(timers.deadline, 1.0)
+
+        timers.expire(1.5)
+        self.assertEqual(expired, [('a', 1.5)])
+        self.assertEqual(timers.deadline, 2.0)
+        timers.expire(2.0)
+        self.assertEqual(expired, [('a', 1.5), ('b', 2.0), ('c', 2.0)])
+        self.assertIsNone(timers.deadline)
+
+    def test_rescheduled_entries_are_skipped(self) -> None:
+        timers = Timers()
+        expired: list[tuple[str, float]] = []
+        a = FakeLimiter('a', expired)
+
+        timers.schedule(a, 1.0)  # type: ignore[arg-type]
+        timers.schedule(a, 3.0)  # type: ignore[arg-type]
+        # The replaced deadline is dropped from the heap.
+        self.assertEqual(timers.deadline, 3.0)
+        self.assertEqual(len(timers._heap), 1)
+
+        timers.expire(2.0)
+        self.assertEqual(expired, [])
+        timers.expire(3.0)
+        self.assertEqual(expired, [('a', 3.0)])
+        self.assertIsNone(a._due)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import io
+import threading
+import unittest
+
+from clikeyboard import (
+    KeyEvent, Keys, Listener, RateLimit, RateLimitPolicy, Recorder, ReplayInput, read_recording, replay
+)
+from clikeyboard._handlers import Registry
+
+
+def recording(reads: list[tuple[int, str]]) -> bytes:
+    '''Record reads, each after its delay in nanoseconds.'''
+
+    file = io.BytesIO()
+    with Recorder(file) as recorder:
+        timestamp = recorder._last_timestamp
+        for delay, data in reads:
+            timestamp += delay
+            recorder.record(data, timestamp)
+    return file.getvalue()
+
+
+class TestRecording(unittest.TestCase):
+
+    def test_read_back(self) -> None:
+        reads = [(5, 'a'), (300, '\x1b[Aé'), (1 << 40, '')]
+        self.assertEqual(list(read_recording(io.BytesIO(recording(reads)))), reads)
+
+    def test_replay_into_listener(self) -> None:
+        data = recording([(0, 'a'), (1000, '\x1b[A'), (1000, 'b')])
+        keys: list[str] = []
+        received = threading.Event()
+
+        def handler(event: KeyEvent) -> None:
+            keys.append(event.key)
+            if len(keys) == 3:
+                received.set()
+
+        input = ReplayInput(io.BytesIO(data), speed=None)
+        listener = Listener(input)
+        listener.add_handler(handler)
+        with listener:
+            self.assertTrue(received.wait(1.0))
+
+        self.assertEqual(keys, ['a', Keys.UP, 'b'])
+        self.assertTrue(input.at_eof)
+
+    def test_replay(self) -> None:
+        registry = Registry()
+        keys: list[str] = []
+        registry.add_handler(lambda event: keys.append(event.key))
+
+        # The lone escape at the end is flushed.
+        count = replay(io.BytesIO(recording([(0, 'ab'), (10, '\x1b[B\x1b')])), registry)
+
+        self.assertEqual(count, 4)
+        self.assertEqual(keys, ['a', 'b', Keys.DOWN, Keys.ESCAPE])
+
+    def test_truncated(self) -> None:
+        data = recording([(0, 'abc')])
+        for end in (len(data) - 1, len(data) - 4):
+            with self.subTest(end=end), self.assertRaisesRegex(ValueError, 'Truncated'):
+                list(read_recording(io.BytesIO(data[:end])))
+
+        # In the middle of a varint.
+        with self.assertRaisesRegex(ValueError, 'Truncated'):
+            list(read_recording(io.BytesIO(recording([]) + b'\x80')))
+
+    def test_bad_header(self) -> None:
+        with self.assertRaisesRegex(ValueError, 'Not a recording'):
+            list(read_recording(io.BytesIO(b'RIFF\x00\x00\x00')))
+        with self.assertRaisesRegex(ValueError, 'version 9'):
+            list(read_recording(io.BytesIO(b'CKBREC\x09')))
+
+    def test_replay_runs_timers(self) -> None:
+        registry = Registry()
+        fired: list[str] = []
+        registry.add_sequence('g', lambda event: fired.append('g'))
+        registry.add_sequence('g g', lambda event: fired.append('g g'), timeout=0.1)
+        for policy in RateLimitPolicy:
+            registry.add_handler(
+                lambda event, policy=policy: fired.append(policy.value), 'a', rate_limit=RateLimit(policy, 0.05)
+            )
+
+        # Replayed as fast as possible, but the keys were read a second apart.
+        replay(io.BytesIO(recording([(0, 'g'), (10 ** 9, 'g'), (10 ** 9, 'a')])), registry)
+
+        self.assertEqual(sorted(fired), sorted(['g', 'g'] + [policy.value for policy in RateLimitPolicy]))
+        self.assertIsNone(registry._next_deadline())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+
+from clikeyboard import (
+    EventRing, KeyEvent, Keys, Modifiers, MouseAction, MouseButton, MouseEvent, PasteEvent, RingConsumer
+)
+from clikeyboard._ansi_sequences import decode_sgr_mouse
+from clikeyboard._interning import PINNED_KEY_IDS, intern_key
+from clikeyboard._ring import _HEADER_SIZE, _PAYLOAD_SIZE, _SLOT_HEADER, _SLOT_SIZE
+
+
+class TestEventRing(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.ring = EventRing(16)
+        self.addCleanup(self.ring.close)
+        self.consumer = RingConsumer(self.ring.name)
+        self.addCleanup(self.consumer.close)
+
+    def roundtrip(self, events: list[KeyEvent]) -> list[KeyEvent]:
+        self.ring.put(events)
+        return self.consumer._take()
+
+    def test_keys(self) -> None:
+        event = KeyEvent('é', 3, 42)
+        event._source = 7
+        received = self.roundtrip([KeyEvent('a'), KeyEvent(Keys.CONTROL_UP), event])
+
+        self.assertEqual([event.key for event in received], ['a', Keys.CONTROL_UP, 'é'])
+        self.assertEqual((received[2].repeat, received[2].timestamp, received[2].source), (3, 42, 7))
+        self.assertIsNone(received[0].timestamp)
+
+    def test_pinned_keys_are_sent_as_ids(self) -> None:
+        received = self.roundtrip([KeyEvent(Keys.F5), KeyEvent('~'), KeyEvent('ctrl+alt+x')])
+
+        self.assertEqual([event.key for event in received], [Keys.F5, '~', 'ctrl+alt+x'])
+        self.assertLess(intern_key('~'), PINNED_KEY_IDS)
+        key_ids = [
+            _SLOT_HEADER.unpack_from(self.consumer._buffer, _HEADER_SIZE + i * _SLOT_SIZE)[6] for i in range(3)
+        ]
+        self.assertEqual(key_ids, [intern_key(Keys.F5) + 1, intern_key('~') + 1, 0])
+        self.assertEqual([event.key_id for event in received[:2]], [key_id - 1 for key_id in key_ids[:2]])
+
+    def test_mouse(self) -> None:
+        event = MouseEvent(12, 34, MouseButton.RIGHT, MouseAction.RELEASE, Modifiers.CONTROL | Modifiers.SHIFT, 5)
+        outside = MouseEvent(-1, -2, MouseButton.NONE, MouseAction.MOVE)
+        received = self.roundtrip([event, outside])
+
+        self.assertEqual(len(received), 2)
+        for sent, got in zip([event, outside], received):
+            assert isinstance(got, MouseEvent)
+            self.assertEqual(
+                (got.x, got.y, got.button, got.action, got.modifiers, got.timestamp),
+                (sent.x, sent.y, sent.button, sent.action, sent.modifiers, sent.timestamp)
+            )
+
+    def test_mouse_outside_window(self) -> None:
+        event = decode_sgr_mouse('\x1b[<0;0;0M')
+        assert event is not None
+        self.assertEqual((event.x, event.y), (0, 0))
+
+        received = self.roundtrip([event])
+        assert isinstance(received[0], MouseEvent)
+        self.assertEqual((received[0].x, received[0].y), (0, 0))
+
+    def test_paste_across_slots(self) -> None:
+        # Multi-byte characters fall on slot boundaries.
+        text = 'aé€😀' * _PAYLOAD_SIZE
+        received = self.roundtrip([PasteEvent(text, False, True, 9), KeyEvent('b')])
+
+        self.assertEqual(len(received), 2)
+        paste = received[0]
+        assert isinstance(paste, PasteEvent)
+        self.assertEqual((paste.text, paste.final, paste.truncated, paste.timestamp), (text, False, True, 9))
+        self.assertEqual(received[1].key, 'b')
+
+    def test_key_larger_than_slot(self) -> None:
+        key = '\x1b[' + 'é' * _PAYLOAD_SIZE
+        received = self.roundtrip([KeyEvent(key)])
+
+        # Truncated on a character boundary.
+        self.assertTrue(key.startswith(received[0].key))
+        self.assertLessEqual(len(received[0].key.encode('utf-8')), _PAYLOAD_SIZE)
+
+    def test_overwritten_events_are_dropped(self) -> None:
+        received = self.roundtrip([KeyEvent(str(i % 10)) for i in range(20)])
+
+        self.assertEqual([event.key for event in received], [str(i % 10) for i in range(4, 20)])
+        self.assertEqual(self.consumer.dropped, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
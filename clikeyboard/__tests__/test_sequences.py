@@ -0,0 +1,102 @@
+import unittest
+from unittest import mock
+
+from clikeyboard import KeyEvent
+from clikeyboard._handlers import Registry
+
+
+class TestSequences(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.now = 0.0
+        patcher = mock.patch('clikeyboard._sequences.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.registry = Registry()
+        self.fired: list[str] = []
+
+    def bind(self, keys: str, timeout: float) -> None:
+        self.registry.add_sequence(keys, lambda event: self.fired.append(keys), timeout)
+
+    def press(self, key: str, at: float) -> None:
+        self.now = at
+        self.registry._expire(at)
+        self.registry._dispatch([KeyEvent(key)])
+
+    def test_sequence(self) -> None:
+        self.bind('ctrl+x ctrl+s', 1.0)
+        self.press('ctrl+x', 0.0)
+        self.press('ctrl+s', 0.5)
+        self.assertEqual(self.fired, ['ctrl+x ctrl+s'])
+
+    def test_timeout(self) -> None:
+        self.bind('g g', 0.1)
+        self.press('g', 0.0)
+        self.assertEqual(self.registry._next_deadline(), 0.1)
+        self.press('g', 0.5)
+        self.assertEqual(self.fired, [])
+        # The second key starts the sequence again.
+        self.press('g', 0.55)
+        self.assertEqual(self.fired, ['g g'])
+
+    def test_shared_prefix_with_longer_timeout(self) -> None:
+        self.bind('g g', 0.1)
+        self.bind('g x', 5.0)
+        self.press('g', 0.0)
+        self.press('g', 0.5)
+        self.assertEqual(self.fired, [])
+
+        self.press('x', 1.0)
+        self.assertEqual(self.fired, ['g x'])
+
+    def test_shared_prefix_within_both_timeouts(self) -> None:
+        self.bind('g g', 0.1)
+        self.bind('g x', 5.0)
+        self.press('g', 0.0)
+        self.press('g', 0.05)
+        self.assertEqual(self.fired, ['g g'])
+
+    def test_every_gap_is_within_timeout(self) -> None:
+        self.bind('a b c', 0.1)
+        self.bind('a b d', 5.0)
+        self.press('a', 0.0)
+        self.press('b', 1.0)
+        self.press('c', 1.05)
+        self.assertEqual(self.fired, [])
+
+    def test_prefix_fires_after_longer_timeout(self) -> None:
+        self.bind('g', 1.0)
+        self.bind('g g', 0.5)
+        self.press('g', 0.0)
+        self.registry._expire(0.4)
+        self.assertEqual(self.fired, [])
+        self.registry._expire(0.5)
+        self.assertEqual(self.fired, ['g'])
+
+    def test_prefix_fires_when_continued_too_late(self) -> None:
+        self.bind('g', 1.0)
+        self.bind('g g', 0.1)
+        self.bind('g x', 5.0)
+        self.press('g', 0.0)
+        self.press('g', 0.5)
+        # The first key fires alone, and the second one waits for its next key.
+        self.assertEqual(self.fired, ['g'])
+        self.registry._expire(6.0)
+        self.assertEqual(self.fired, ['g', 'g'])
+
+    def test_gaps_measured_from_read_time(self) -> None:
+        self.bind('g g', 0.1)
+        # Dispatched late, e.g. after waiting in the queue, but read in time.
+        self.now = 5.0
+        self.registry._dispatch([KeyEvent('g', timestamp=0), KeyEvent('g', timestamp=50_000_000)])
+        self.assertEqual(self.fired, ['g g'])
+
+        # Dispatched together, but read too far apart.
+        self.registry._dispatch([KeyEvent('g', timestamp=1_000_000_000), KeyEvent('g', timestamp=2_000_000_000)])
+        self.assertEqual(self.fired, ['g g'])
+        self.assertEqual(self.registry._next_deadline(), 2.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
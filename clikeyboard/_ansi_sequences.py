@@ -1,4 +1,7 @@
-from .keys import Keys
+from typing import Optional
+
+from .event import MouseAction, MouseButton, MouseEvent
+from .keys import Keys, Modifiers
 
 
 # Adapted from Textual https://github.com/Textualize/textual/blob/main/src/textual/_ansi_sequences.py.
@@ -52,255 +55,323 @@ ANSI_SEQUENCES: dict[str, tuple[Keys, ...]] = {
     # support it. (Most terminals send ControlH when backspace is pressed.)
     # See: http://www.ibb.net/~anne/keyboard.html
     '\x7f': (Keys.CONTROL_H,),
-    # --
-    # Various
-    '\x1b[1~': (Keys.HOME,),  # tmux
-    '\x1b[2~': (Keys.INSERT,),
-    '\x1b[3~': (Keys.DELETE,),
-    '\x1b[4~': (Keys.END,),  # tmux
-    '\x1b[5~': (Keys.PAGE_UP,),
-    '\x1b[6~': (Keys.PAGE_DOWN,),
-    '\x1b[7~': (Keys.HOME,),  # xrvt
-    '\x1b[8~': (Keys.END,),  # xrvt
-    '\x1b[Z': (Keys.BACK_TAB,),  # shift + tab
     '\x1b\x09': (Keys.BACK_TAB,),  # Linux console
-    '\x1b[~': (Keys.BACK_TAB,),  # Windows console
-    # --
-    # Function keys.
-    '\x1bOP': (Keys.F1,),
-    '\x1bOQ': (Keys.F2,),
-    '\x1bOR': (Keys.F3,),
-    '\x1bOS': (Keys.F4,),
-    '\x1b[[A': (Keys.F1,),  # Linux console.
-    '\x1b[[B': (Keys.F2,),  # Linux console.
-    '\x1b[[C': (Keys.F3,),  # Linux console.
-    '\x1b[[D': (Keys.F4,),  # Linux console.
-    '\x1b[[E': (Keys.F5,),  # Linux console.
-    '\x1b[11~': (Keys.F1,),  # rxvt-unicode
-    '\x1b[12~': (Keys.F2,),  # rxvt-unicode
-    '\x1b[13~': (Keys.F3,),  # rxvt-unicode
-    '\x1b[14~': (Keys.F4,),  # rxvt-unicode
-    '\x1b[15~': (Keys.F5,),
-    '\x1b[17~': (Keys.F6,),
-    '\x1b[18~': (Keys.F7,),
-    '\x1b[19~': (Keys.F8,),
-    '\x1b[20~': (Keys.F9,),
-    '\x1b[21~': (Keys.F10,),
-    '\x1b[23~': (Keys.F11,),
-    '\x1b[24~': (Keys.F12,),
-    '\x1b[25~': (Keys.F13,),
-    '\x1b[26~': (Keys.F14,),
-    '\x1b[28~': (Keys.F15,),
-    '\x1b[29~': (Keys.F16,),
-    '\x1b[31~': (Keys.F17,),
-    '\x1b[32~': (Keys.F18,),
-    '\x1b[33~': (Keys.F19,),
-    '\x1b[34~': (Keys.F20,),
-    # Xterm
-    '\x1b[1;2P': (Keys.F13,),
-    '\x1b[1;2Q': (Keys.F14,),
-    # '\x1b[1;2R': (Keys.F15,),  # Conflicts with CPR response.
-    '\x1b[1;2S': (Keys.F16,),
-    '\x1b[15;2~': (Keys.F17,),
-    '\x1b[17;2~': (Keys.F18,),
-    '\x1b[18;2~': (Keys.F19,),
-    '\x1b[19;2~': (Keys.F20,),
-    '\x1b[20;2~': (Keys.F21,),
-    '\x1b[21;2~': (Keys.F22,),
-    '\x1b[23;2~': (Keys.F23,),
-    '\x1b[24;2~': (Keys.F24,),
-    # --
-    # Control + function keys.
-    '\x1b[1;5P': (Keys.CONTROL_F1,),
-    '\x1b[1;5Q': (Keys.CONTROL_F2,),
-    # '\x1b[1;5R': (Keys.CONTROL_F3,),  # Conflicts with CPR response.
-    '\x1b[1;5S': (Keys.CONTROL_F4,),
-    '\x1b[15;5~': (Keys.CONTROL_F5,),
-    '\x1b[17;5~': (Keys.CONTROL_F6,),
-    '\x1b[18;5~': (Keys.CONTROL_F7,),
-    '\x1b[19;5~': (Keys.CONTROL_F8,),
-    '\x1b[20;5~': (Keys.CONTROL_F9,),
-    '\x1b[21;5~': (Keys.CONTROL_F10,),
-    '\x1b[23;5~': (Keys.CONTROL_F11,),
-    '\x1b[24;5~': (Keys.CONTROL_F12,),
-    '\x1b[1;6P': (Keys.CONTROL_F13,),
-    '\x1b[1;6Q': (Keys.CONTROL_F14,),
-    # '\x1b[1;6R': (Keys.CONTROL_F15,),  # Conflicts with CPR response.
-    '\x1b[1;6S': (Keys.CONTROL_F16,),
-    '\x1b[15;6~': (Keys.CONTROL_F17,),
-    '\x1b[17;6~': (Keys.CONTROL_F18,),
-    '\x1b[18;6~': (Keys.CONTROL_F19,),
-    '\x1b[19;6~': (Keys.CONTROL_F20,),
-    '\x1b[20;6~': (Keys.CONTROL_F21,),
-    '\x1b[21;6~': (Keys.CONTROL_F22,),
-    '\x1b[23;6~': (Keys.CONTROL_F23,),
-    '\x1b[24;6~': (Keys.CONTROL_F24,),
-    # --
+    # CSI ('\x1b[') and SS3 ('\x1bO') sequences are in common_sequences(), or decoded by decode_csi and decode_ss3.
+}
+
+
+CSI = '\x1b['
+SS3 = '\x1bO'
+SGR_MOUSE = '\x1b[<'
+PASTE_START = '\x1b[200~'
+PASTE_END = '\x1b[201~'
+
+# Keys of `CSI code ; modifier ~`.
+_TILDE_KEYS: dict[int, str] = {
+    1: Keys.HOME,  # tmux
+    2: Keys.INSERT,
+    3: Keys.DELETE,
+    4: Keys.END,  # tmux
+    5: Keys.PAGE_UP,
+    6: Keys.PAGE_DOWN,
+    7: Keys.HOME,  # xrvt
+    8: Keys.END,  # xrvt
+    11: Keys.F1,  # rxvt-unicode
+    12: Keys.F2,  # rxvt-unicode
+    13: Keys.F3,  # rxvt-unicode
+    14: Keys.F4,  # rxvt-unicode
+    15: Keys.F5,
+    17: Keys.F6,
+    18: Keys.F7,
+    19: Keys.F8,
+    20: Keys.F9,
+    21: Keys.F10,
+    23: Keys.F11,
+    24: Keys.F12,
+    25: Keys.F13,
+    26: Keys.F14,
+    28: Keys.F15,
+    29: Keys.F16,
+    31: Keys.F17,
+    32: Keys.F18,
+    33: Keys.F19,
+    34: Keys.F20,
     # Tmux (Win32 subsystem) sends the following scroll events.
-    '\x1b[62~': (Keys.SCROLL_UP,),
-    '\x1b[63~': (Keys.SCROLL_DOWN,),
-    '\x1b[200~': (Keys.BRACKETED_PASTE,),  # Start of bracketed paste.
-    # --
+    62: Keys.SCROLL_UP,
+    63: Keys.SCROLL_DOWN,
+    200: Keys.BRACKETED_PASTE,  # Start of bracketed paste.
+}
+
+# Keys of `CSI 1 ; modifier letter` and `SS3 modifier letter`.
+_LETTER_KEYS: dict[str, str] = {
+    'A': Keys.UP,
+    'B': Keys.DOWN,
+    'C': Keys.RIGHT,
+    'D': Keys.LEFT,
+    'F': Keys.END,
+    'H': Keys.HOME,
+    'P': Keys.F1,
+    'Q': Keys.F2,
+    'R': Keys.F3,
+    'S': Keys.F4,
     # Sequences generated by numpad 5. Not sure what it means. (It doesn't
     # appear in 'infocmp'. Just ignore.
-    '\x1b[E': (Keys.IGNORE,),  # Xterm.
-    '\x1b[G': (Keys.IGNORE,),  # Linux console.
-    # --
-    # Meta/control/escape + pageup/pagedown/insert/delete.
-    '\x1b[3;2~': (Keys.SHIFT_DELETE,),  # xterm, gnome-terminal.
-    '\x1b[5;2~': (Keys.SHIFT_PAGE_UP,),
-    '\x1b[6;2~': (Keys.SHIFT_PAGE_DOWN,),
-    '\x1b[2;3~': (Keys.ESCAPE, Keys.INSERT,),
-    '\x1b[3;3~': (Keys.ESCAPE, Keys.DELETE,),
-    '\x1b[5;3~': (Keys.ESCAPE, Keys.PAGE_UP,),
-    '\x1b[6;3~': (Keys.ESCAPE, Keys.PAGE_DOWN,),
-    '\x1b[2;4~': (Keys.ESCAPE, Keys.SHIFT_INSERT,),
-    '\x1b[3;4~': (Keys.ESCAPE, Keys.SHIFT_DELETE,),
-    '\x1b[5;4~': (Keys.ESCAPE, Keys.SHIFT_PAGE_UP,),
-    '\x1b[6;4~': (Keys.ESCAPE, Keys.SHIFT_PAGE_DOWN,),
-    '\x1b[3;5~': (Keys.CONTROL_DELETE,),  # xterm, gnome-terminal.
-    '\x1b[5;5~': (Keys.CONTROL_PAGE_UP,),
-    '\x1b[6;5~': (Keys.CONTROL_PAGE_DOWN,),
-    '\x1b[3;6~': (Keys.CONTROL_SHIFT_DELETE,),
-    '\x1b[5;6~': (Keys.CONTROL_SHIFT_PAGE_UP,),
-    '\x1b[6;6~': (Keys.CONTROL_SHIFT_PAGE_DOWN,),
-    '\x1b[2;7~': (Keys.ESCAPE, Keys.CONTROL_INSERT,),
-    '\x1b[5;7~': (Keys.ESCAPE, Keys.CONTROL_PAGE_DOWN,),
-    '\x1b[6;7~': (Keys.ESCAPE, Keys.CONTROL_PAGE_DOWN,),
-    '\x1b[2;8~': (Keys.ESCAPE, Keys.CONTROL_SHIFT_INSERT,),
-    '\x1b[5;8~': (Keys.ESCAPE, Keys.CONTROL_SHIFT_PAGE_DOWN,),
-    '\x1b[6;8~': (Keys.ESCAPE, Keys.CONTROL_SHIFT_PAGE_DOWN,),
-    # --
-    # Arrows.
-    # (Normal cursor mode).
-    '\x1b[A': (Keys.UP,),
-    '\x1b[B': (Keys.DOWN,),
-    '\x1b[C': (Keys.RIGHT,),
-    '\x1b[D': (Keys.LEFT,),
-    '\x1b[H': (Keys.HOME,),
-    '\x1b[F': (Keys.END,),
-    # Tmux sends following keystrokes when control+arrow is pressed, but for
-    # Emacs ansi-term sends the same sequences for normal arrow keys. Consider
-    # it a normal arrow press, because that's more important.
-    # (Application cursor mode).
-    '\x1bOA': (Keys.UP,),
-    '\x1bOB': (Keys.DOWN,),
-    '\x1bOC': (Keys.RIGHT,),
-    '\x1bOD': (Keys.LEFT,),
-    '\x1bOF': (Keys.END,),
-    '\x1bOH': (Keys.HOME,),
-    # Shift + arrows.
-    '\x1b[1;2A': (Keys.SHIFT_UP,),
-    '\x1b[1;2B': (Keys.SHIFT_DOWN,),
-    '\x1b[1;2C': (Keys.SHIFT_RIGHT,),
-    '\x1b[1;2D': (Keys.SHIFT_LEFT,),
-    '\x1b[1;2F': (Keys.SHIFT_END,),
-    '\x1b[1;2H': (Keys.SHIFT_HOME,),
-    # Meta + arrow keys. Several terminals handle this differently.
-    # The following sequences are for xterm and gnome-terminal.
-    #     (Iterm sends ESC followed by the normal arrow_up/down/left/right
-    #     sequences, and the OSX Terminal sends ESCb and ESCf for 'alt
-    #     arrow_left' and 'alt arrow_right.' We don't handle these
-    #     explicitly, in here, because would could not distinguish between
-    #     pressing ESC (to go to Vi navigation mode), followed by just the
-    #     'b' or 'f' key. These combinations are handled in
-    #     the input processor.)
-    '\x1b[1;3A': (Keys.ESCAPE, Keys.UP,),
-    '\x1b[1;3B': (Keys.ESCAPE, Keys.DOWN,),
-    '\x1b[1;3C': (Keys.ESCAPE, Keys.RIGHT,),
-    '\x1b[1;3D': (Keys.ESCAPE, Keys.LEFT,),
-    '\x1b[1;3F': (Keys.ESCAPE, Keys.END,),
-    '\x1b[1;3H': (Keys.ESCAPE, Keys.HOME,),
-    # Alt+shift+number.
-    '\x1b[1;4A': (Keys.ESCAPE, Keys.SHIFT_DOWN,),
-    '\x1b[1;4B': (Keys.ESCAPE, Keys.SHIFT_UP,),
-    '\x1b[1;4C': (Keys.ESCAPE, Keys.SHIFT_RIGHT,),
-    '\x1b[1;4D': (Keys.ESCAPE, Keys.SHIFT_LEFT,),
-    '\x1b[1;4F': (Keys.ESCAPE, Keys.SHIFT_END,),
-    '\x1b[1;4H': (Keys.ESCAPE, Keys.SHIFT_HOME,),
-    # Control + arrows.
-    '\x1b[1;5A': (Keys.CONTROL_UP,),  # Cursor Mode
-    '\x1b[1;5B': (Keys.CONTROL_DOWN,),  # Cursor Mode
-    '\x1b[1;5C': (Keys.CONTROL_RIGHT,),  # Cursor Mode
-    '\x1b[1;5D': (Keys.CONTROL_LEFT,),  # Cursor Mode
-    '\x1b[1;5F': (Keys.CONTROL_END,),
-    '\x1b[1;5H': (Keys.CONTROL_HOME,),
-    # Tmux sends following keystrokes when control+arrow is pressed, but for
-    # Emacs ansi-term sends the same sequences for normal arrow keys. Consider
-    # it a normal arrow press, because that's more important.
-    '\x1b[5A': (Keys.CONTROL_UP,),
-    '\x1b[5B': (Keys.CONTROL_DOWN,),
-    '\x1b[5C': (Keys.CONTROL_RIGHT,),
-    '\x1b[5D': (Keys.CONTROL_LEFT,),
-    '\x1bOc': (Keys.CONTROL_RIGHT,),  # rxvt
-    '\x1bOd': (Keys.CONTROL_LEFT,),  # rxvt
-    # Control + shift + arrows.
-    '\x1b[1;6A': (Keys.CONTROL_SHIFT_DOWN,),
-    '\x1b[1;6B': (Keys.CONTROL_SHIFT_UP,),
-    '\x1b[1;6C': (Keys.CONTROL_SHIFT_RIGHT,),
-    '\x1b[1;6D': (Keys.CONTROL_SHIFT_LEFT,),
-    '\x1b[1;6F': (Keys.CONTROL_SHIFT_END,),
-    '\x1b[1;6H': (Keys.CONTROL_SHIFT_HOME,),
-    # Control + Meta + arrows.
-    '\x1b[1;7A': (Keys.ESCAPE, Keys.CONTROL_DOWN,),
-    '\x1b[1;7B': (Keys.ESCAPE, Keys.CONTROL_UP,),
-    '\x1b[1;7C': (Keys.ESCAPE, Keys.CONTROL_RIGHT,),
-    '\x1b[1;7D': (Keys.ESCAPE, Keys.CONTROL_LEFT,),
-    '\x1b[1;7F': (Keys.ESCAPE, Keys.CONTROL_END,),
-    '\x1b[1;7H': (Keys.ESCAPE, Keys.CONTROL_HOME,),
-    # Meta + Shift + arrows.
-    '\x1b[1;8A': (Keys.ESCAPE, Keys.CONTROL_SHIFT_DOWN,),
-    '\x1b[1;8B': (Keys.ESCAPE, Keys.CONTROL_SHIFT_UP,),
-    '\x1b[1;8C': (Keys.ESCAPE, Keys.CONTROL_SHIFT_RIGHT,),
-    '\x1b[1;8D': (Keys.ESCAPE, Keys.CONTROL_SHIFT_LEFT,),
-    '\x1b[1;8F': (Keys.ESCAPE, Keys.CONTROL_SHIFT_END,),
-    '\x1b[1;8H': (Keys.ESCAPE, Keys.CONTROL_SHIFT_HOME,),
-    # Meta + arrow on (some?) Macs when using iTerm defaults (see issue #483).
-    '\x1b[1;9A': (Keys.ESCAPE, Keys.UP,),
-    '\x1b[1;9B': (Keys.ESCAPE, Keys.DOWN,),
-    '\x1b[1;9C': (Keys.ESCAPE, Keys.RIGHT,),
-    '\x1b[1;9D': (Keys.ESCAPE, Keys.LEFT,),
-    # --
-    # Control/shift/meta + number in mintty.
-    # (c-2 will actually send c-@ and c-6 will send c-^.)
-    '\x1b[1;5p': (Keys.CONTROL_0,),
-    '\x1b[1;5q': (Keys.CONTROL_1,),
-    '\x1b[1;5r': (Keys.CONTROL_2,),
-    '\x1b[1;5s': (Keys.CONTROL_3,),
-    '\x1b[1;5t': (Keys.CONTROL_4,),
-    '\x1b[1;5u': (Keys.CONTROL_5,),
-    '\x1b[1;5v': (Keys.CONTROL_6,),
-    '\x1b[1;5w': (Keys.CONTROL_7,),
-    '\x1b[1;5x': (Keys.CONTROL_8,),
-    '\x1b[1;5y': (Keys.CONTROL_9,),
-    '\x1b[1;6p': (Keys.CONTROL_SHIFT_0,),
-    '\x1b[1;6q': (Keys.CONTROL_SHIFT_1,),
-    '\x1b[1;6r': (Keys.CONTROL_SHIFT_2,),
-    '\x1b[1;6s': (Keys.CONTROL_SHIFT_3,),
-    '\x1b[1;6t': (Keys.CONTROL_SHIFT_4,),
-    '\x1b[1;6u': (Keys.CONTROL_SHIFT_5,),
-    '\x1b[1;6v': (Keys.CONTROL_SHIFT_6,),
-    '\x1b[1;6w': (Keys.CONTROL_SHIFT_7,),
-    '\x1b[1;6x': (Keys.CONTROL_SHIFT_8,),
-    '\x1b[1;6y': (Keys.CONTROL_SHIFT_9,),
-    '\x1b[1;7p': (Keys.ESCAPE, Keys.CONTROL_0,),
-    '\x1b[1;7q': (Keys.ESCAPE, Keys.CONTROL_1,),
-    '\x1b[1;7r': (Keys.ESCAPE, Keys.CONTROL_2,),
-    '\x1b[1;7s': (Keys.ESCAPE, Keys.CONTROL_3,),
-    '\x1b[1;7t': (Keys.ESCAPE, Keys.CONTROL_4,),
-    '\x1b[1;7u': (Keys.ESCAPE, Keys.CONTROL_5,),
-    '\x1b[1;7v': (Keys.ESCAPE, Keys.CONTROL_6,),
-    '\x1b[1;7w': (Keys.ESCAPE, Keys.CONTROL_7,),
-    '\x1b[1;7x': (Keys.ESCAPE, Keys.CONTROL_8,),
-    '\x1b[1;7y': (Keys.ESCAPE, Keys.CONTROL_9,),
-    '\x1b[1;8p': (Keys.ESCAPE, Keys.CONTROL_SHIFT_0,),
-    '\x1b[1;8q': (Keys.ESCAPE, Keys.CONTROL_SHIFT_1,),
-    '\x1b[1;8r': (Keys.ESCAPE, Keys.CONTROL_SHIFT_2,),
-    '\x1b[1;8s': (Keys.ESCAPE, Keys.CONTROL_SHIFT_3,),
-    '\x1b[1;8t': (Keys.ESCAPE, Keys.CONTROL_SHIFT_4,),
-    '\x1b[1;8u': (Keys.ESCAPE, Keys.CONTROL_SHIFT_5,),
-    '\x1b[1;8v': (Keys.ESCAPE, Keys.CONTROL_SHIFT_6,),
-    '\x1b[1;8w': (Keys.ESCAPE, Keys.CONTROL_SHIFT_7,),
-    '\x1b[1;8x': (Keys.ESCAPE, Keys.CONTROL_SHIFT_8,),
-    '\x1b[1;8y': (Keys.ESCAPE, Keys.CONTROL_SHIFT_9,)
+    'E': Keys.IGNORE,  # Xterm.
+    'G': Keys.IGNORE,  # Linux console.
+}
+
+# Keys of `CSI [ letter`.
+_LINUX_CONSOLE_KEYS: dict[str, str] = {
+    'A': Keys.F1,
+    'B': Keys.F2,
+    'C': Keys.F3,
+    'D': Keys.F4,
+    'E': Keys.F5,
 }
+
+_MODIFIER_PREFIXES = (
+    (Modifiers.CONTROL, 'ctrl+'),
+    (Modifiers.ALT, 'alt+'),
+    (Modifiers.SHIFT, 'shift+'),
+    (Modifiers.META, 'meta+'),
+)
+
+_KEYS: dict[str, Keys] = {key.value: key for key in Keys}
+
+# xterm names F1 to F12 with shift F13 to F24, and so did the table this decoder replaced.
+_SHIFTED_FUNCTION_KEYS: dict[str, str] = {
+    Keys.F1: Keys.F13,
+    Keys.F2: Keys.F14,
+    Keys.F3: Keys.F15,
+    Keys.F4: Keys.F16,
+    Keys.F5: Keys.F17,
+    Keys.F6: Keys.F18,
+    Keys.F7: Keys.F19,
+    Keys.F8: Keys.F20,
+    Keys.F9: Keys.F21,
+    Keys.F10: Keys.F22,
+    Keys.F11: Keys.F23,
+    Keys.F12: Keys.F24,
+}
+
+# Decoded sequences. Bounded, as unknown sequences (e.g. cursor position reports) vary.
+_cache: dict[str, tuple[str, ...]] = {}
+_CACHE_SIZE = 1024
+
+
+def _with_modifiers(key: str, modifier: int) -> str:
+    '''
+    Name key pressed with modifiers (e.g. 'ctrl+shift+left').
+
+    F1 to F12 with shift or control+shift are named F13 to F24 and ctrl+f13 to
+    ctrl+f24, as xterm does.
+
+    Args:
+        key (str): Key without modifiers.
+        modifier (int): xterm modifier parameter, which is 1 plus a bitmask of `Modifiers`.
+
+    Returns:
+        str: `Keys` member if there is one, otherwise the name.
+    '''
+
+    modifiers = (modifier - 1) & 0xf if modifier > 1 else 0
+    if not modifiers:
+        return key
+    if modifiers in (Modifiers.SHIFT, Modifiers.SHIFT | Modifiers.CONTROL) and key in _SHIFTED_FUNCTION_KEYS:
+        key = _SHIFTED_FUNCTION_KEYS[key]
+        modifiers &= ~Modifiers.SHIFT
+
+    name = ''.join(prefix for flag, prefix in _MODIFIER_PREFIXES if modifiers & flag) + key
+    return _KEYS.get(name, name)
+
+
+def decode_csi(sequence: str) -> tuple[str, ...]:
+    '''
+    Decode a complete CSI sequence from its parameters and final character.
+
+    Args:
+        sequence (str): `CSI`, parameter characters and a final character.
+
+    Returns:
+        tuple[str, ...]: Keys. A well-formed sequence which isn't a key (e.g. a
+            cursor position report) is returned as it is as a single key.
+    '''
+
+    keys = _cache.get(sequence)
+    if keys is None:
+        keys = _decode_csi(sequence)
+        if len(_cache) < _CACHE_SIZE:
+            _cache[sequence] = keys
+    return keys
+
+
+def decode_ss3(sequence: str) -> Optional[tuple[str, ...]]:
+    '''
+    Decode a complete SS3 sequence.
+
+    Args:
+        sequence (str): `SS3`, an optional modifier and a final character.
+
+    Returns:
+        Optional[tuple[str, ...]]: Keys, or None if it isn't a key (e.g. escape
+            followed by 'O' typed by hand).
+    '''
+
+    keys = _cache.get(sequence)
+    if keys is None:
+        keys = _decode_ss3(sequence)
+        if keys is not None and len(_cache) < _CACHE_SIZE:
+            _cache[sequence] = keys
+    return keys
+
+
+def _decode_csi(sequence: str) -> tuple[str, ...]:
+    body = sequence[2:-1]
+    final = sequence[-1]
+
+    if body.startswith('['):
+        key = _LINUX_CONSOLE_KEYS.get(final) if body == '[' else None
+        return (sequence,) if key is None else (key,)
+
+    try:
+        params = [int(param) if param else 1 for param in body.split(';')] if body else []
+    except ValueError:
+        # Private (e.g. '?') or sub-parameters (':'), so not a key.
+        return (sequence,)
+
+    if final == '~':
+        if not params:
+            return (Keys.BACK_TAB,)  # Windows console
+        key = _TILDE_KEYS.get(params[0])
+        if key is None:
+            return (sequence,)
+        return (_with_modifiers(key, params[1] if len(params) > 1 else 1),)
+
+    if final == 'Z':
+        # Shift + tab, possibly with more modifiers.
+        modifier = params[1] if len(params) > 1 else 1
+        return (_with_modifiers('tab', ((modifier - 1) | Modifiers.SHIFT) + 1),)
+
+    if 'p' <= final <= 'y' and len(params) == 2 and params[0] == 1:
+        # Control/shift/meta + number in mintty.
+        # (c-2 will actually send c-@ and c-6 will send c-^.)
+        return (_with_modifiers(str(ord(final) - ord('p')), params[1]),)
+
+    if final == 'R' and params:
+        # Cursor position report, which conflicts with F3 with modifiers.
+        return (sequence,)
+
+    key = _LETTER_KEYS.get(final)
+    if key is None or len(params) > 2:
+        return (sequence,)
+    # Tmux sends `CSI modifier letter` when control+arrow is pressed.
+    return (_with_modifiers(key, params[-1] if params else 1),)
+
+
+def _decode_ss3(sequence: str) -> Optional[tuple[str, ...]]:
+    body = sequence[2:-1]
+    final = sequence[-1]
+
+    if body and not body.isdigit():
+        return None
+
+    # rxvt sends lower case letters when control+arrow is pressed.
+    if final == 'c':
+        return (Keys.CONTROL_RIGHT,)
+    if final == 'd':
+        return (Keys.CONTROL_LEFT,)
+
+    key = _LETTER_KEYS.get(final)
+    if key is None:
+        return None
+    return (_with_modifiers(key, int(body) if body else 1),)
+
+
+# Built on first use, so importing the package decodes no sequences.
+_common_sequences: Optional[dict[str, tuple[str, ...]]] = None
+
+
+def common_sequences() -> dict[str, tuple[str, ...]]:
+    '''
+    Get sequences of arrows, home/end, editing and function keys, alone and with
+    shift, alt and control, decoding them on first use.
+
+    The parser matches them in its prefix tree without decoding them. Other CSI
+    and SS3 sequences are decoded by decode_csi and decode_ss3.
+
+    Returns:
+        dict[str, tuple[str, ...]]: Mapping of sequences to keys.
+    '''
+
+    global _common_sequences
+
+    if _common_sequences is None:
+        _common_sequences = _decode_common_sequences()
+    return _common_sequences
+
+
+def _decode_common_sequences() -> dict[str, tuple[str, ...]]:
+    modifiers = [''] + [str(modifier) for modifier in range(2, 9)]
+    sequences: dict[str, tuple[str, ...]] = {CSI + 'Z': _decode_csi(CSI + 'Z')}
+    for final in 'ABCDFHPQS':
+        for modifier in modifiers:
+            sequence = f'{CSI}1;{modifier}{final}' if modifier else CSI + final
+            sequences[sequence] = _decode_csi(sequence)
+    for final in 'ABCDFHPQRS':
+        keys = _decode_ss3(SS3 + final)
+        assert keys is not None
+        sequences[SS3 + final] = keys
+    for code in _TILDE_KEYS:
+        # Leave out scroll events and the start of bracketed paste.
+        if code < 62:
+            for modifier in modifiers:
+                sequence = f'{CSI}{code};{modifier}~' if modifier else f'{CSI}{code}~'
+                sequences[sequence] = _decode_csi(sequence)
+    return sequences
+
+
+_MOUSE_BUTTONS = (MouseButton.LEFT, MouseButton.MIDDLE, MouseButton.RIGHT, MouseButton.NONE)
+_WHEEL_BUTTONS = (MouseButton.WHEEL_UP, MouseButton.WHEEL_DOWN, MouseButton.WHEEL_LEFT, MouseButton.WHEEL_RIGHT)
+
+
+def decode_sgr_mouse(sequence: str, timestamp: Optional[int] = None) -> Optional[MouseEvent]:
+    '''
+    Decode a complete SGR (1006) mouse report, `CSI < code ; x ; y M` (or `m` for release).
+
+    Args:
+        sequence (str): The report.
+        timestamp (Optional[int]): `time.monotonic_ns()` when it was read.
+
+    Returns:
+        Optional[MouseEvent]: The event, or None if it is malformed or reports an unsupported button.
+    '''
+
+    try:
+        code, x, y = (int(param) for param in sequence[3:-1].split(';'))
+    except ValueError:
+        return None
+
+    modifiers = Modifiers.NONE
+    if code & 4:
+        modifiers |= Modifiers.SHIFT
+    if code & 8:
+        modifiers |= Modifiers.ALT
+    if code & 16:
+        modifiers |= Modifiers.CONTROL
+
+    if code & 128:
+        return None  # Buttons 8 to 11.
+    if code & 64:
+        button = _WHEEL_BUTTONS[code & 3]
+        action = MouseAction.SCROLL
+    else:
+        button = _MOUSE_BUTTONS[code & 3]
+        if code & 32:
+            action = MouseAction.MOVE
+        elif sequence[-1] == 'M':
+            action = MouseAction.PRESS
+        else:
+            action = MouseAction.RELEASE
+
+    # Positions are 1-based, though some terminals report 0 outside the window.
+    return MouseEvent(max(x - 1, 0), max(y - 1, 0), button, action, modifiers, timestamp)
@@ -0,0 +1,288 @@
+import asyncio
+import atexit
+from threading import Event, Thread
+from time import monotonic, monotonic_ns
+from types import TracebackType
+from typing import Any, AsyncIterator, Callable, Optional, Type
+from weakref import WeakKeyDictionary
+
+from .event import KeyEvent
+from .keys import Keys
+from ._handlers import ErrorHook, Registry, report_error
+from ._input import Input, SelectableInput
+from ._instrumentation import Instrumentation
+from ._listener import _ESCAPE_TIMEOUT, default_input
+from ._parser import Parser
+from ._recording import Recorder
+
+
+class AsyncListener(Registry):
+    '''
+    Listener dispatching events on an asyncio event loop.
+
+    When input has a file descriptor and the loop supports `add_reader`, input is
+    read, parsed and dispatched on the loop without helper threads. Otherwise
+    (e.g. Windows console), input is read on a thread and handed to the loop.
+
+    Handlers may be coroutine functions. Each returned coroutine runs as a task.
+    Batch handlers must be plain functions.
+    '''
+
+    def __init__(
+        self,
+        input: Optional[Input] = None,
+        coalesce_repeats: bool = False,
+        instrumentation: Optional[Instrumentation] = None,
+        recorder: Optional[Recorder] = None,
+        mouse: bool = False,
+        paste: bool = False,
+        paste_limit: Optional[int] = None,
+        paste_chunk_size: Optional[int] = None,
+        on_error: ErrorHook = report_error,
+        max_failures: Optional[int] = None
+    ) -> None:
+        '''
+        Args:
+            input (Optional[Input]): Input to listen. Defaults to the terminal of this process.
+            coalesce_repeats (bool): Whether to deliver runs of the same key within one read
+                as a single event with `repeat` count.
+            instrumentation (Optional[Instrumentation]): Where to record latency. Disabled if None.
+                There is no queue, so parse_to_dequeue is not recorded.
+            recorder (Optional[Recorder]): Where to record raw input. Disabled if None.
+            mouse (bool): Whether the default input reports mouse input as `MouseEvent`.
+                Motion within one read is coalesced into the last position.
+            paste (bool): Whether the default input turns on bracketed paste mode, so a paste
+                is delivered as a `PasteEvent` instead of a key per character.
+            paste_limit (Optional[int]): Maximum characters kept from a paste. Unlimited if None.
+            paste_chunk_size (Optional[int]): Deliver pastes in events of about this many characters
+                as they arrive, rather than in one event. Disabled if None.
+            on_error (ErrorHook): Called with exceptions raised by handlers and their tasks.
+                Reports them like uncaught ones by default.
+            max_failures (Optional[int]): Remove a handler once it raises this many times in a row. Disabled if None.
+        '''
+
+        super().__init__(instrumentation, on_error, max_failures)
+        self._recorder = recorder
+        self._mouse = mouse
+        self._paste = paste
+        self._input: Optional[Input] = input
+        # The default input is created on start, and dropped by `close`.
+        self._owns_input = input is None
+        self._restore: Optional[Callable[[], None]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._parser = Parser(coalesce_repeats, mouse, paste_limit, paste_chunk_size)
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._timer_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Future[Any]] = set()
+        self._stop_event = Event()
+        self._listening_thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        '''Start listener on the running event loop if it hasn't started.'''
+
+        if self._loop is not None:
+            return
+
+        loop = asyncio.get_running_loop()
+
+        if self._input is None:
+            self._input = default_input(self._mouse, self._paste)
+        self._restore = self._input.enable()
+        atexit.register(self._restore)
+
+        self._loop = loop
+        self._stop_event.clear()
+
+        if isinstance(self._input, SelectableInput):
+            try:
+                loop.add_reader(self._input.fileno(), self._on_readable, self._input)
+                return
+            except NotImplementedError:
+                pass  # e.g. ProactorEventLoop.
+
+        self._listening_thread = Thread(target=self._listen, args=(self._input, loop))
+        self._listening_thread.daemon = True
+        self._listening_thread.start()
+
+    def stop(self) -> None:
+        '''Stop running listener. Must be called on the loop it was started on.'''
+
+        if self._loop is None:
+            return
+
+        if self._listening_thread is not None:
+            self._stop_event.set()
+            if self._input is not None:
+                self._input.wakeup()
+            self._listening_thread.join()
+            self._listening_thread = None
+        elif isinstance(self._input, SelectableInput):
+            self._loop.remove_reader(self._input.fileno())
+
+        self._cancel_flush()
+        self._cancel_timer()
+        self._loop = None
+
+        if self._restore is not None:
+            atexit.unregister(self._restore)
+            self._restore()
+            self._restore = None
+
+    def close(self) -> None:
+        '''
+        Stop listener, and release resources of its input (e.g. the wakeup pipe) and
+        threads of its handlers. It can be started again. Must be called on the loop
+        it was started on.
+        '''
+
+        self.stop()
+        self._close()
+        if self._input is not None:
+            self._input.close()
+            if self._owns_input:
+                self._input = None
+
+    async def __aenter__(self) -> 'AsyncListener':
+        self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        self.close()
+
+    def _on_readable(self, input: SelectableInput) -> None:
+        data = input.read()
+        if input.at_eof and self._loop is not None:
+            self._loop.remove_reader(input.fileno())
+        if data:
+            self._feed([data])
+
+    def _listen(self, input: Input, loop: asyncio.AbstractEventLoop) -> None:
+        def feed(keys: list[str]) -> None:
+            loop.call_soon_threadsafe(self._feed, keys)
+
+        while not self._stop_event.is_set():
+            input.listen(feed)
+
+    def _feed(self, keys: list[str]) -> None:
+        self._cancel_flush()
+
+        read_at = monotonic_ns()
+        data = ''.join(keys)
+        if self._recorder is not None:
+            self._recorder.record(data, read_at)
+        self._parser.interest = self._handlers.interest
+        events = list(self._parser.parse(data, read_at))
+        if self._instrumentation is not None:
+            self._instrumentation.record_read_to_parse(monotonic_ns() - read_at)
+        if events:
+            self._dispatch(events)
+            self._schedule_timer()
+
+        if self._parser.pending and self._loop is not None:
+            self._flush_handle = self._loop.call_later(_ESCAPE_TIMEOUT, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        self._parser.interest = self._handlers.interest
+        events = list(self._parser.flush())
+        if events:
+            self._dispatch(events)
+            self._schedule_timer()
+
+    def _cancel_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    def _schedule_timer(self) -> None:
+        self._cancel_timer()
+        deadline = self._next_deadline()
+        if deadline is not None and self._loop is not None:
+            self._timer_handle = self._loop.call_later(max(deadline - monotonic(), 0), self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer_handle = None
+        self._expire(monotonic())
+        self._schedule_timer()
+
+    def _cancel_timer(self) -> None:
+        if self._timer_handle is not None:
+            self._timer_handle.cancel()
+            self._timer_handle = None
+
+    def _invoke_handlers(self, event: KeyEvent) -> None:
+        handlers = self._handlers
+        for handler in handlers.by_key.get(event.key, ()):
+            self._invoke_handler(handler, event)
+        for handler in handlers.for_any:
+            self._invoke_handler(handler, event)
+
+    def _invoke_handler(self, handler: Callable[[KeyEvent], Any], event: KeyEvent) -> None:
+        try:
+            result = handler(event)
+        except Exception as error:
+            self._outcome(handler, event, error)
+            return
+
+        if result is None:
+            if self._failing:
+                self._outcome(handler, event, None)
+            return
+
+        task = asyncio.ensure_future(result)
+        self._tasks.add(task)
+        task.add_done_callback(lambda task: self._on_task_done(task, handler, event))
+
+    def _on_task_done(self, task: 'asyncio.Future[Any]', handler: Callable[[KeyEvent], Any], event: KeyEvent) -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+
+        error = task.exception()
+        if error is None or isinstance(error, Exception):
+            self._outcome(handler, event, error)
+
+
+_listeners: 'WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncListener]' = WeakKeyDictionary()
+
+
+def get_listener() -> AsyncListener:
+    '''
+    Get the started listener of the running event loop.
+
+    Returns:
+        AsyncListener: The listener.
+    '''
+
+    loop = asyncio.get_running_loop()
+    listener = _listeners.get(loop)
+    if listener is None:
+        listener = _listeners[loop] = AsyncListener()
+    listener.start()
+    return listener
+
+
+async def events(key: str = Keys.ANY) -> AsyncIterator[KeyEvent]:
+    '''
+    Iterate over key press events on the running event loop.
+
+    Args:
+        key (str): String indicating key. `Keys.ANY` matches every key.
+
+    Yields:
+        KeyEvent: Pressed keys.
+    '''
+
+    queue: asyncio.Queue[KeyEvent] = asyncio.Queue()
+    listener = get_listener()
+    entry = listener.add_handler(queue.put_nowait, key)
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        listener._remove_entry(entry, key)
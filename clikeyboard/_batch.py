@@ -0,0 +1,77 @@
+from array import array
+from typing import Iterator, Optional, Sequence, Union, overload
+
+from .event import KeyEvent
+from ._interning import intern_key
+
+
+# Timestamp in `EventBatch.timestamps` of events without one.
+NO_TIMESTAMP = -1
+
+
+class EventBatch(Sequence[KeyEvent]):
+    '''
+    Events parsed from one read, with their fields as arrays for bulk consumers.
+
+    The arrays are built on first access, and their memoryviews can be wrapped
+    without copying (e.g. by `numpy.frombuffer`). Batch handlers receive this.
+    '''
+
+    __slots__ = ('_events', '_key_ids', '_timestamps', '_repeats')
+
+    def __init__(self, events: Sequence[KeyEvent]) -> None:
+        '''
+        Args:
+            events (Sequence[KeyEvent]): Events. Not copied, so they must not be modified afterwards.
+        '''
+
+        self._events = events
+        self._key_ids: Optional[array] = None
+        self._timestamps: Optional[array] = None
+        self._repeats: Optional[array] = None
+
+    @property
+    def key_ids(self) -> memoryview:
+        '''`KeyEvent.key_id` of each event, as signed 32-bit integers.'''
+
+        if self._key_ids is None:
+            self._key_ids = array('i', [intern_key(event.key) for event in self._events])
+        return memoryview(self._key_ids)
+
+    @property
+    def timestamps(self) -> memoryview:
+        '''`KeyEvent.timestamp` of each event, as signed 64-bit integers. `NO_TIMESTAMP` if None.'''
+
+        if self._timestamps is None:
+            self._timestamps = array('q', [
+                NO_TIMESTAMP if event.timestamp is None else event.timestamp for event in self._events
+            ])
+        return memoryview(self._timestamps)
+
+    @property
+    def repeats(self) -> memoryview:
+        '''`KeyEvent.repeat` of each event, as unsigned 32-bit integers.'''
+
+        if self._repeats is None:
+            self._repeats = array('I', [event.repeat for event in self._events])
+        return memoryview(self._repeats)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    @overload
+    def __getitem__(self, index: int) -> KeyEvent:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[KeyEvent]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[KeyEvent, Sequence[KeyEvent]]:
+        return self._events[index]
+
+    def __iter__(self) -> Iterator[KeyEvent]:
+        return iter(self._events)
+
+    def __repr__(self) -> str:
+        return f'EventBatch({list(self._events)!r})'
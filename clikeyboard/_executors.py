@@ -0,0 +1,249 @@
+from collections import deque
+from enum import Enum
+from queue import SimpleQueue
+from threading import Lock, Thread
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from .event import KeyEvent
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from ._rate_limits import RateLimitStats
+
+
+Handler = Callable[[KeyEvent], None]
+# Called after a handler has run, with the exception it raised or None.
+Outcome = Callable[[Handler, KeyEvent, Optional[Exception]], None]
+
+
+class ExecutionPolicy(str, Enum):
+    '''Where a handler runs.'''
+
+    value: str
+
+    # On the thread dispatching events.
+    INLINE = 'inline'
+    # On a thread pool shared by handlers of the listener.
+    POOL = 'pool'
+    # On a worker thread dedicated to the handler.
+    SERIAL = 'serial'
+
+
+class ExecutorStats:
+    '''
+    Time events waited between dispatch and the start of a handler.
+
+    Inline handlers start immediately, so only pool and serial handlers are measured.
+    '''
+
+    __slots__ = ('count', 'total_wait_ns', 'max_wait_ns', '_lock')
+
+    def __init__(self, count: int = 0, total_wait_ns: int = 0, max_wait_ns: int = 0) -> None:
+        '''
+        Args:
+            count (int): Number of handler invocations.
+            total_wait_ns (int): Sum of wait times in nanoseconds.
+            max_wait_ns (int): Longest wait time in nanoseconds.
+        '''
+
+        self.count = count
+        self.total_wait_ns = total_wait_ns
+        self.max_wait_ns = max_wait_ns
+        self._lock = Lock()
+
+    @property
+    def mean_wait_ns(self) -> float:
+        return self.total_wait_ns / self.count if self.count else 0.0
+
+    def record(self, wait_ns: int) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_wait_ns += wait_ns
+            if wait_ns > self.max_wait_ns:
+                self.max_wait_ns = wait_ns
+
+    def snapshot(self) -> 'ExecutorStats':
+        with self._lock:
+            return ExecutorStats(self.count, self.total_wait_ns, self.max_wait_ns)
+
+    def __repr__(self) -> str:
+        return (
+            f'ExecutorStats(count={self.count}, mean_wait_ns={self.mean_wait_ns:.0f}, '
+            f'max_wait_ns={self.max_wait_ns})'
+        )
+
+
+class Worker:
+    '''
+    Handler running off the dispatching thread.
+
+    Events are handled one at a time in the order they were dispatched. Worker
+    compares equal to the wrapped handler, so it can be removed like one.
+    '''
+
+    __slots__ = ('handler', '_stats', '_outcome', '_latest')
+
+    def __init__(
+        self,
+        handler: Handler,
+        stats: ExecutorStats,
+        outcome: Outcome,
+        latest: Optional['RateLimitStats'] = None
+    ) -> None:
+        '''
+        Args:
+            handler (Handler): Handler to run.
+            stats (ExecutorStats): Where to record wait times.
+            outcome (Outcome): Called after each run.
+            latest (Optional[RateLimitStats]): Keep only the newest waiting event, and count
+                the replaced ones in these stats. Every event is handled if None.
+        '''
+
+        self.handler = handler
+        self._stats = stats
+        self._outcome = outcome
+        self._latest = latest
+
+    def __call__(self, event: KeyEvent) -> None:
+        raise NotImplementedError()
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Worker):
+            return self is other
+        return bool(self.handler == other)
+
+    def __hash__(self) -> int:
+        return hash(self.handler)
+
+    def close(self) -> None:
+        '''Stop accepting events. Already dispatched events are still handled.'''
+
+    def stop(self) -> None:
+        '''Release threads of the worker until the next event. Already dispatched events are still handled.'''
+
+    def _run(self, event: KeyEvent, dispatched_at: int) -> None:
+        self._stats.record(perf_counter_ns() - dispatched_at)
+        try:
+            self.handler(event)
+        except Exception as error:
+            # Keep handling later events.
+            self._outcome(self.handler, event, error)
+        else:
+            self._outcome(self.handler, event, None)
+
+
+class PooledWorker(Worker):
+    '''Worker running handler on a shared executor.'''
+
+    __slots__ = ('_executor', '_pending', '_lock', '_scheduled')
+
+    def __init__(
+        self,
+        handler: Handler,
+        stats: ExecutorStats,
+        outcome: Outcome,
+        executor: Callable[[], 'Executor'],
+        latest: Optional['RateLimitStats'] = None
+    ) -> None:
+        '''
+        Args:
+            handler (Handler): Handler to run.
+            stats (ExecutorStats): Where to record wait times.
+            outcome (Outcome): Called after each run.
+            executor (Callable[[], Executor]): Gets the shared executor, which may be replaced
+                after it has been shut down.
+            latest (Optional[RateLimitStats]): Keep only the newest waiting event, and count
+                the replaced ones in these stats. Every event is handled if None.
+        '''
+
+        super().__init__(handler, stats, outcome, latest)
+        self._executor = executor
+        self._pending: deque[tuple[KeyEvent, int]] = deque()
+        self._lock = Lock()
+        self._scheduled = False
+
+    def __call__(self, event: KeyEvent) -> None:
+        with self._lock:
+            if self._latest is not None and self._pending:
+                self._latest.suppressed += 1
+                self._pending.clear()
+            self._pending.append((event, perf_counter_ns()))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._executor().submit(self._drain)
+
+    def _drain(self) -> None:
+        # Only one drain per worker is scheduled at a time, which keeps events in order.
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._scheduled = False
+                    return
+                event, dispatched_at = self._pending.popleft()
+            self._run(event, dispatched_at)
+
+
+class SerialWorker(Worker):
+    '''Worker running handler on its own thread.'''
+
+    __slots__ = ('_queue', '_thread', '_waiting', '_lock', '_closed')
+
+    def __init__(
+        self,
+        handler: Handler,
+        stats: ExecutorStats,
+        outcome: Outcome,
+        latest: Optional['RateLimitStats'] = None
+    ) -> None:
+        super().__init__(handler, stats, outcome, latest)
+        # The newest event when only it is kept. The queue then holds an empty tuple in its place.
+        self._waiting: Optional[tuple[KeyEvent, int]] = None
+        self._lock = Lock()
+        self._closed = False
+        self._start()
+
+    def _start(self) -> None:
+        # Each thread has its own queue, so a stopping thread never takes events of the next one.
+        self._queue: SimpleQueue[Optional[tuple[KeyEvent, int]]] = SimpleQueue()
+        self._thread: Optional[Thread] = Thread(target=self._work, args=(self._queue,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __call__(self, event: KeyEvent) -> None:
+        if self._thread is None and not self._closed:
+            self._start()
+        if self._latest is None:
+            self._queue.put((event, perf_counter_ns()))
+            return
+
+        with self._lock:
+            replaced = self._waiting is not None
+            self._waiting = (event, perf_counter_ns())
+        if replaced:
+            self._latest.suppressed += 1
+        else:
+            self._queue.put(())  # type: ignore[arg-type]
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread = None
+
+    def _work(self, queue: 'SimpleQueue[Optional[tuple[KeyEvent, int]]]') -> None:
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            if not item:
+                with self._lock:
+                    item, self._waiting = self._waiting, None
+                if item is None:
+                    continue
+            self._run(*item)
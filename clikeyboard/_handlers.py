@@ -0,0 +1,599 @@
+import sys
+from threading import Lock
+from time import perf_counter_ns
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, Sequence, TypeVar, Union
+
+from .event import KeyEvent
+from .keys import Keys
+from ._batch import EventBatch
+from ._executors import ExecutionPolicy, ExecutorStats, Handler, PooledWorker, SerialWorker, Worker
+from ._instrumentation import Instrumentation
+from ._rate_limits import RateLimit, RateLimiter, RateLimitPolicy, RateLimitStats, Timers, limit
+from ._sequences import DEFAULT_SEQUENCE_TIMEOUT, SequenceMatcher, SequenceNode, split_keys
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+
+AsyncHandler = Callable[[KeyEvent], Awaitable[None]]
+BatchHandler = Callable[[Sequence[KeyEvent]], None]
+# Called with an exception raised by a handler, the handler, and its event (or batch of events).
+ErrorHook = Callable[[Exception, Callable[..., Any], Union[KeyEvent, Sequence[KeyEvent]]], None]
+
+
+def report_error(error: Exception, handler: Callable[..., Any], event: Union[KeyEvent, Sequence[KeyEvent]]) -> None:
+    '''Default error hook, which reports the exception like an uncaught one.'''
+
+    sys.excepthook(type(error), error, error.__traceback__)
+
+
+class HandlerStats:
+    '''Failures of a handler.'''
+
+    __slots__ = ('failures', 'consecutive_failures', 'disabled')
+
+    def __init__(self, failures: int = 0, consecutive_failures: int = 0, disabled: bool = False) -> None:
+        '''
+        Args:
+            failures (int): Number of exceptions raised by the handler.
+            consecutive_failures (int): Number of exceptions raised since the handler last returned normally.
+            disabled (bool): Whether the handler has been removed for failing too many times in a row.
+        '''
+
+        self.failures = failures
+        self.consecutive_failures = consecutive_failures
+        self.disabled = disabled
+
+    def __repr__(self) -> str:
+        return (
+            f'HandlerStats(failures={self.failures}, consecutive_failures={self.consecutive_failures}, '
+            f'disabled={self.disabled})'
+        )
+
+
+class Handlers:
+    '''
+    Immutable snapshot of registered handlers.
+
+    Registry replaces the whole snapshot on registration, so dispatch can read
+    it without locking.
+    '''
+
+    __slots__ = ('by_key', 'for_any', 'for_batch', 'sequences', 'keys', 'interest')
+
+    def __init__(
+        self,
+        by_key: dict[str, tuple[Handler, ...]],
+        for_any: tuple[Handler, ...],
+        for_batch: tuple[BatchHandler, ...],
+        sequences: SequenceNode,
+        keys: Optional[frozenset[str]] = None
+    ) -> None:
+        '''
+        Args:
+            by_key (dict[str, tuple[Handler, ...]]): Handlers of each key.
+            for_any (tuple[Handler, ...]): Handlers of every key.
+            for_batch (tuple[BatchHandler, ...]): Handlers of batches.
+            sequences (SequenceNode): Root of the prefix tree of key sequences.
+            keys (Optional[frozenset[str]]): Keys of by_key, if known from the previous snapshot.
+        '''
+
+        self.by_key = by_key
+        self.for_any = for_any
+        self.for_batch = for_batch
+        self.sequences = sequences
+        # Keys which have handlers. Passed on from snapshot to snapshot, and only
+        # changed when a key gets its first handler or loses its last one.
+        self.keys = frozenset(by_key) if keys is None else keys
+        # Keys to make events of, so that the parser can drop the others before making events.
+        # None if every key matters: a sequence has to see the keys breaking it, too.
+        self.interest: Optional[frozenset[str]] = (
+            None if for_any or for_batch or sequences.children else self.keys
+        )
+
+    def added(self, handler: Handler, key: str) -> 'Handlers':
+        if key == Keys.ANY:
+            return Handlers(self.by_key, self.for_any + (handler,), self.for_batch, self.sequences, self.keys)
+
+        by_key = dict(self.by_key)
+        by_key[key] = by_key.get(key, ()) + (handler,)
+        keys = self.keys if key in self.keys else self.keys | {key}
+        return Handlers(by_key, self.for_any, self.for_batch, self.sequences, keys)
+
+    def removed(self, handler: Handler, key: str, exact: bool = False) -> 'Handlers':
+        without = _without_entry if exact else _without
+        if key == Keys.ANY:
+            return Handlers(self.by_key, without(self.for_any, handler), self.for_batch, self.sequences, self.keys)
+
+        by_key = dict(self.by_key)
+        handlers = without(by_key.get(key, ()), handler)
+        keys = self.keys
+        if handlers:
+            by_key[key] = handlers
+        elif key in by_key:
+            del by_key[key]
+            keys = keys - {key}
+        return Handlers(by_key, self.for_any, self.for_batch, self.sequences, keys)
+
+    def batch_added(self, handler: BatchHandler) -> 'Handlers':
+        return Handlers(self.by_key, self.for_any, self.for_batch + (handler,), self.sequences, self.keys)
+
+    def batch_removed(self, handler: BatchHandler) -> 'Handlers':
+        return Handlers(self.by_key, self.for_any, _without(self.for_batch, handler), self.sequences, self.keys)
+
+    def sequence_added(self, handler: Handler, keys: tuple[str, ...], timeout: float) -> 'Handlers':
+        return Handlers(
+            self.by_key, self.for_any, self.for_batch, self.sequences.added(keys, handler, timeout), self.keys
+        )
+
+    def sequence_removed(self, handler: Handler, keys: tuple[str, ...], exact: bool = False) -> 'Handlers':
+        return Handlers(
+            self.by_key, self.for_any, self.for_batch, self.sequences.removed(keys, handler, exact), self.keys
+        )
+
+    def bound(self) -> list[Callable[..., Any]]:
+        '''Every handler bound to a key, batch or sequence, as it is wrapped.'''
+
+        bound: list[Callable[..., Any]] = [h for hs in self.by_key.values() for h in hs]
+        bound.extend(self.for_any)
+        bound.extend(self.for_batch)
+        nodes = [self.sequences]
+        while nodes:
+            node = nodes.pop()
+            bound.extend(node.handlers)
+            nodes.extend(node.children.values())
+        return bound
+
+    def without(self, handler: Callable[..., Any]) -> 'Handlers':
+        '''Remove handler from every key, batch and sequence.'''
+
+        by_key: dict[str, tuple[Handler, ...]] = {}
+        for key, handlers in self.by_key.items():
+            handlers = _without(handlers, handler)
+            if handlers:
+                by_key[key] = handlers
+        return Handlers(
+            by_key,
+            _without(self.for_any, handler),
+            _without(self.for_batch, handler),  # type: ignore[arg-type]
+            self.sequences.without(handler)
+        )
+
+
+_T = TypeVar('_T')
+
+
+def _without(handlers: tuple[_T, ...], handler: _T) -> tuple[_T, ...]:
+    return tuple(h for h in handlers if h != handler)
+
+
+def _without_entry(handlers: tuple[_T, ...], entry: _T) -> tuple[_T, ...]:
+    '''Remove one occurrence of entry itself, leaving other bindings of the same handler.'''
+
+    for i, h in enumerate(handlers):
+        if h is entry:
+            return handlers[:i] + handlers[i + 1:]
+    return handlers
+
+
+def _close(bound: Sequence[Callable[..., Any]], handler: Callable[..., Any]) -> None:
+    '''Close workers and rate limiters of handler which have been removed.'''
+
+    for h in bound:
+        if isinstance(h, (Worker, RateLimiter)) and h == handler:
+            h.close()
+
+
+class Registry:
+    '''
+    Handlers bound to keys.
+
+    An exception raised by a handler is passed to the error hook, and other
+    handlers and later events are dispatched as usual.
+    '''
+
+    def __init__(
+        self,
+        instrumentation: Optional[Instrumentation] = None,
+        on_error: ErrorHook = report_error,
+        max_failures: Optional[int] = None
+    ) -> None:
+        '''
+        Args:
+            instrumentation (Optional[Instrumentation]): Where to record latency. Disabled if None.
+            on_error (ErrorHook): Called with exceptions raised by handlers.
+                Reports them like uncaught ones by default.
+            max_failures (Optional[int]): Remove a handler once it raises this many times in a row. Disabled if None.
+        '''
+
+        self._instrumentation = instrumentation
+        self._on_error = on_error
+        self._max_failures = max_failures
+        self._handler_stats: dict[Callable[..., Any], HandlerStats] = {}
+        # Consecutive failures of handlers which failed last time, checked after every call while not empty.
+        self._failing: dict[Callable[..., Any], int] = {}
+        self._failures_lock = Lock()
+        self._rate_limit_stats: dict[Callable[..., Any], RateLimitStats] = {}
+        self._handlers = Handlers({}, (), (), SequenceNode({}, ()))
+        self._handlers_lock = Lock()
+        self._pool: Optional['ThreadPoolExecutor'] = None
+        self._executor_stats = {
+            ExecutionPolicy.POOL: ExecutorStats(),
+            ExecutionPolicy.SERIAL: ExecutorStats()
+        }
+        self._sequence_matcher = SequenceMatcher()
+        self._timers = Timers()
+
+    @property
+    def executor_stats(self) -> dict[ExecutionPolicy, ExecutorStats]:
+        '''A snapshot of wait times of handlers running off the dispatching thread, per policy.'''
+
+        return {policy: stats.snapshot() for policy, stats in self._executor_stats.items()}
+
+    @property
+    def handler_stats(self) -> dict[Callable[..., Any], HandlerStats]:
+        '''A snapshot of failures of each handler which has ever raised an exception.'''
+
+        with self._failures_lock:
+            return {
+                handler: HandlerStats(stats.failures, stats.consecutive_failures, stats.disabled)
+                for handler, stats in self._handler_stats.items()
+            }
+
+    @property
+    def rate_limit_stats(self) -> dict[Callable[..., Any], RateLimitStats]:
+        '''A snapshot of events received and suppressed by each handler ever added with a rate limit.'''
+
+        with self._handlers_lock:
+            return {
+                handler: RateLimitStats(stats.received, stats.suppressed)
+                for handler, stats in self._rate_limit_stats.items()
+            }
+
+    def add_handler(
+        self,
+        handler: Handler,
+        key: str = Keys.ANY,
+        execution: ExecutionPolicy = ExecutionPolicy.INLINE,
+        rate_limit: Optional[RateLimit] = None
+    ) -> Handler:
+        '''
+        Add handler invoked when key pressed.
+
+        Each handler receives events in order whatever its execution policy is.
+
+        Args:
+            handler (Handler): Handler to invoke.
+            key (str): String indicating key. `Keys.ANY` matches every key.
+            execution (ExecutionPolicy): Where handler runs.
+            rate_limit (Optional[RateLimit]): How often handler may be invoked. Every event invokes it if None.
+                Delayed invocations are run on the dispatching thread by timers of the listener.
+
+        Returns:
+            Handler: The entry bound to key, which removes only this binding when passed to `_remove_entry`.
+
+        Raises:
+            ValueError: If handler is a coroutine function and execution isn't INLINE.
+        '''
+
+        self._reset_failures(handler)
+        with self._handlers_lock:
+            if rate_limit is None:
+                wrapped = self._wrap(handler, execution)
+            else:
+                wrapped = self._limit(handler, execution, rate_limit)
+            self._handlers = self._handlers.added(wrapped, key)
+        return wrapped
+
+    def remove_handler(self, handler: Handler, key: str = Keys.ANY) -> None:
+        '''
+        Remove all occurrences of handler bound to key.
+
+        It is safe to call from a handler. Removed handlers may still receive
+        the event being dispatched.
+        '''
+
+        with self._handlers_lock:
+            handlers = self._handlers
+            if key == Keys.ANY:
+                bound = handlers.for_any
+            else:
+                bound = handlers.by_key.get(key, ())
+
+            self._handlers = handlers.removed(handler, key)
+
+        _close(bound, handler)
+
+    def _remove_entry(self, entry: Handler, key: str = Keys.ANY) -> None:
+        '''Remove the binding `add_handler` returned, leaving other bindings of the same handler.'''
+
+        with self._handlers_lock:
+            self._handlers = self._handlers.removed(entry, key, exact=True)
+
+        _close((entry,), entry)
+
+    def add_batch_handler(self, handler: BatchHandler) -> None:
+        '''
+        Add handler invoked once per read with all events parsed from it.
+
+        Args:
+            handler (BatchHandler): Handler to invoke with an `EventBatch`.
+        '''
+
+        self._reset_failures(handler)
+        with self._handlers_lock:
+            self._handlers = self._handlers.batch_added(handler)
+
+    def remove_batch_handler(self, handler: BatchHandler) -> None:
+        '''Remove all occurrences of batch handler.'''
+
+        with self._handlers_lock:
+            self._handlers = self._handlers.batch_removed(handler)
+
+    def add_sequence(
+        self,
+        keys: Union[str, Sequence[str]],
+        handler: Handler,
+        timeout: float = DEFAULT_SEQUENCE_TIMEOUT,
+        execution: ExecutionPolicy = ExecutionPolicy.INLINE
+    ) -> Handler:
+        '''
+        Add handler invoked when keys are pressed one after another.
+
+        All sequences share one prefix tree, so matching costs the same per key
+        whatever the number of sequences. If a sequence is a prefix of another
+        (e.g. 'g' and 'g g'), the shorter one is invoked once the longer one can
+        no longer match, which may take up to the timeout of the longer one.
+
+        Args:
+            keys (Union[str, Sequence[str]]): Keys separated by spaces (e.g. 'ctrl+x ctrl+s'), or a sequence of keys.
+            handler (Handler): Handler to invoke with the event of the last key.
+            timeout (float): Maximum seconds between two keys of the sequence.
+            execution (ExecutionPolicy): Where handler runs.
+
+        Returns:
+            Handler: The entry bound to keys, which removes only this binding when passed to `_remove_sequence_entry`.
+
+        Raises:
+            ValueError: If handler is a coroutine function and execution isn't INLINE.
+        '''
+
+        keys = split_keys(keys)
+        self._reset_failures(handler)
+        with self._handlers_lock:
+            wrapped = self._wrap(handler, execution)
+            self._handlers = self._handlers.sequence_added(wrapped, keys, timeout)
+        return wrapped
+
+    def remove_sequence(self, keys: Union[str, Sequence[str]], handler: Handler) -> None:
+        '''Remove all occurrences of handler bound to the key sequence.'''
+
+        keys = split_keys(keys)
+        with self._handlers_lock:
+            node: Optional[SequenceNode] = self._handlers.sequences
+            for key in keys:
+                node = node.children.get(key) if node is not None else None
+            bound = node.handlers if node is not None else ()
+
+            self._handlers = self._handlers.sequence_removed(handler, keys)
+
+        _close(bound, handler)
+
+    def _remove_sequence_entry(self, keys: Union[str, Sequence[str]], entry: Handler) -> None:
+        '''Remove the binding `add_sequence` returned, leaving other bindings of the same handler.'''
+
+        keys = split_keys(keys)
+        with self._handlers_lock:
+            self._handlers = self._handlers.sequence_removed(entry, keys, exact=True)
+
+        _close((entry,), entry)
+
+    def _wrap(
+        self,
+        handler: Handler,
+        execution: ExecutionPolicy,
+        latest: Optional[RateLimitStats] = None
+    ) -> Handler:
+        if execution is not ExecutionPolicy.INLINE:
+            # Imported on first use, as it is slow to import.
+            import inspect
+            if inspect.iscoroutinefunction(handler):
+                # It would return coroutines which nothing awaits.
+                raise ValueError(f'Coroutine function handlers must be INLINE, not {execution.value}.')
+
+        if execution is ExecutionPolicy.POOL:
+            return PooledWorker(handler, self._executor_stats[execution], self._outcome, self._get_pool, latest)
+        if execution is ExecutionPolicy.SERIAL:
+            return SerialWorker(handler, self._executor_stats[execution], self._outcome, latest)
+        return handler
+
+    def _get_pool(self) -> 'ThreadPoolExecutor':
+        '''Get the thread pool shared by pool handlers, creating it on first use.'''
+
+        pool = self._pool
+        if pool is None:
+            with self._handlers_lock:
+                if self._pool is None:
+                    # Imported on first use, as it is slow to import.
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._pool = ThreadPoolExecutor(thread_name_prefix='clikeyboard')
+                pool = self._pool
+        return pool
+
+    def _limit(self, handler: Handler, execution: ExecutionPolicy, rate_limit: RateLimit) -> Handler:
+        # Bindings of the same handler share counters.
+        stats = self._rate_limit_stats.get(handler)
+        if stats is None:
+            stats = self._rate_limit_stats[handler] = RateLimitStats()
+        latest = stats if rate_limit.policy is RateLimitPolicy.LATEST else None
+        return limit(self._wrap(handler, execution, latest), rate_limit, stats, self._timers, self._invoke_handler)
+
+    def _dispatch(self, events: list[KeyEvent]) -> None:
+        '''Invoke batch handlers with events, and then handlers for each event.'''
+
+        if self._instrumentation is not None:
+            self._dispatch_instrumented(events, self._instrumentation)
+            return
+
+        batch_handlers = self._handlers.for_batch
+        if batch_handlers:
+            batch = EventBatch(events)
+            for batch_handler in batch_handlers:
+                self._invoke_handler(batch_handler, batch)  # type: ignore[arg-type]
+        for event in events:
+            self._invoke_handlers(event)
+        self._match_sequences(events)
+
+    def _dispatch_instrumented(self, events: list[KeyEvent], instrumentation: Instrumentation) -> None:
+        record = instrumentation.record_handler_duration
+        invoke = self._invoke_handler
+
+        batch = EventBatch(events)
+        for batch_handler in self._handlers.for_batch:
+            started_at = perf_counter_ns()
+            invoke(batch_handler, batch)  # type: ignore[arg-type]
+            record(perf_counter_ns() - started_at)
+
+        for event in events:
+            handlers = self._handlers
+            for handler in handlers.by_key.get(event.key, ()) + handlers.for_any:
+                started_at = perf_counter_ns()
+                invoke(handler, event)
+                record(perf_counter_ns() - started_at)
+        self._match_sequences(events)
+
+    def _match_sequences(self, events: list[KeyEvent]) -> None:
+        root = self._handlers.sequences
+        if not root.children and self._sequence_matcher.deadline is None:
+            return
+
+        feed = self._sequence_matcher.feed
+        for event in events:
+            for _ in range(event.repeat):
+                feed(root, event, self._fire)
+
+    def _next_deadline(self) -> Optional[float]:
+        '''`time.monotonic()` when `_expire` should be called next, or None.'''
+
+        deadline = self._sequence_matcher.deadline
+        timer = self._timers.deadline
+        if timer is None:
+            return deadline
+        return timer if deadline is None else min(deadline, timer)
+
+    def _expire(self, now: float) -> None:
+        '''Invoke handlers whose timers are due.'''
+
+        self._sequence_matcher.expire(self._handlers.sequences, now, self._fire)
+        self._timers.expire(now)
+
+    def _fire(self, handlers: tuple[Handler, ...], event: KeyEvent) -> None:
+        for handler in handlers:
+            self._invoke_handler(handler, event)
+
+    def _invoke_handlers(self, event: KeyEvent) -> None:
+        # `_invoke_handler` is inlined, as this runs for every event.
+        handlers = self._handlers
+        failing = self._failing
+        for handler in handlers.by_key.get(event.key, ()):
+            try:
+                handler(event)
+            except Exception as error:
+                self._outcome(handler, event, error)
+                continue
+            if failing:
+                self._outcome(handler, event, None)
+        for handler in handlers.for_any:
+            try:
+                handler(event)
+            except Exception as error:
+                self._outcome(handler, event, error)
+                continue
+            if failing:
+                self._outcome(handler, event, None)
+
+    def _invoke_handler(self, handler: Handler, event: KeyEvent) -> None:
+        try:
+            handler(event)
+        except Exception as error:
+            self._outcome(handler, event, error)
+            return
+        if self._failing:
+            self._outcome(handler, event, None)
+
+    def _outcome(self, handler: Callable[..., Any], event: Any, error: Optional[Exception]) -> None:
+        '''Count a failure of handler, or the end of its failures, and apply the circuit breaker.'''
+
+        if error is None and isinstance(handler, RateLimiter):
+            # It reports the outcome of each invocation of its handler itself.
+            return
+        while isinstance(handler, (Worker, RateLimiter)):
+            # Count failures of the handler as it was added.
+            handler = handler.handler
+
+        if error is None:
+            if handler in self._failing:
+                with self._failures_lock:
+                    if self._failing.pop(handler, None) is not None:
+                        self._handler_stats[handler].consecutive_failures = 0
+            return
+
+        with self._failures_lock:
+            stats = self._handler_stats.get(handler)
+            if stats is None:
+                stats = self._handler_stats[handler] = HandlerStats()
+            stats.failures += 1
+            # A disabled handler may still fail on the event being dispatched.
+            disable = False
+            if not stats.disabled:
+                stats.consecutive_failures += 1
+                self._failing[handler] = stats.consecutive_failures
+                disable = self._max_failures is not None and stats.consecutive_failures >= self._max_failures
+                if disable:
+                    stats.disabled = True
+                    del self._failing[handler]
+
+        try:
+            self._on_error(error, handler, event)
+        except Exception as hook_error:
+            report_error(hook_error, self._on_error, event)
+
+        if disable:
+            self._disable(handler)
+
+    def _disable(self, handler: Callable[..., Any]) -> None:
+        with self._handlers_lock:
+            bound = self._handlers.bound()
+            self._handlers = self._handlers.without(handler)
+
+        _close(bound, handler)
+
+    def _close(self) -> None:
+        '''
+        Release threads of pool and serial handlers, once events are no longer dispatched.
+
+        Handlers stay registered, and their threads start again with the next event.
+        Handlers still running finish on their own.
+        '''
+
+        with self._handlers_lock:
+            bound = self._handlers.bound()
+            pool, self._pool = self._pool, None
+
+        for handler in bound:
+            while isinstance(handler, RateLimiter):
+                handler = handler.handler
+            if isinstance(handler, Worker):
+                handler.stop()
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _reset_failures(self, handler: Callable[..., Any]) -> None:
+        '''Give a handler being added again a fresh start after it has been disabled.'''
+
+        if handler in self._handler_stats:
+            with self._failures_lock:
+                stats = self._handler_stats[handler]
+                if stats.disabled:
+                    stats.consecutive_failures = 0
+                    stats.disabled = False
@@ -0,0 +1,89 @@
+import errno
+import os
+from typing import Callable, Optional, Protocol, runtime_checkable
+
+
+READ_SIZE = 1024
+
+
+def read_fd(fd: int) -> bytes:
+    '''
+    Read available input from a file descriptor.
+
+    Args:
+        fd (int): A readable file descriptor.
+
+    Returns:
+        bytes: Read input, or b'' at its end.
+    '''
+
+    try:
+        return os.read(fd, READ_SIZE)
+    except OSError as e:
+        # A pty raises EIO once the other side has been closed.
+        if e.errno != errno.EIO:
+            raise
+        return b''
+
+
+def drain_fd(fd: int) -> None:
+    '''Read a non-blocking file descriptor (e.g. a self-pipe) until it is empty.'''
+
+    try:
+        while os.read(fd, READ_SIZE):
+            pass
+    except BlockingIOError:
+        pass
+
+
+class Input(Protocol):
+    '''Source of raw key input used by listener.'''
+
+    def enable(self) -> Callable[[], None]:
+        '''
+        Prepare the terminal for reading keys.
+
+        Returns:
+            Callable[[], None]: A callable that will restore terminal to previous state.
+        '''
+        ...
+
+    def listen(self, handler: Callable[[list[str]], None], timeout: Optional[float] = None) -> None:
+        '''
+        Wait until input arrives or `wakeup` is called, and pass read input to handler.
+
+        Args:
+            handler (Callable[[list[str]], None]): A callable fired when key pressed.
+            timeout (Optional[float]): Maximum seconds to wait. Waits forever if None.
+        '''
+        ...
+
+    def wakeup(self) -> None:
+        '''Interrupt a blocking `listen` call.'''
+        ...
+
+    def close(self) -> None:
+        '''Release resources acquired by `enable`. The input may be enabled again.'''
+        ...
+
+
+@runtime_checkable
+class SelectableInput(Input, Protocol):
+    '''Input backed by a file descriptor, which can be watched by an event loop.'''
+
+    @property
+    def at_eof(self) -> bool:
+        '''Whether the end of input has been reached.'''
+        ...
+
+    def fileno(self) -> int:
+        ...
+
+    def read(self) -> str:
+        '''
+        Read available input without waiting. Call only when the file descriptor is readable.
+
+        Returns:
+            str: Read input. May be empty.
+        '''
+        ...
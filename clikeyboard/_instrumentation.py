@@ -0,0 +1,89 @@
+class Histogram:
+    '''
+    Histogram of durations in nanoseconds.
+
+    Buckets are powers of two, so recording is a few integer operations. Bucket
+    `i` holds durations in `[2 ** (i - 1), 2 ** i)` nanoseconds.
+    '''
+
+    __slots__ = ('counts', 'count', 'total_ns', 'max_ns')
+
+    def __init__(self) -> None:
+        self.counts: list[int] = [0] * 64
+        self.count: int = 0
+        self.total_ns: int = 0
+        self.max_ns: int = 0
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+    def record(self, ns: int) -> None:
+        if ns < 0:
+            ns = 0
+        self.counts[min(ns.bit_length(), 63)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, percent: float) -> int:
+        '''
+        Estimate a percentile.
+
+        Args:
+            percent (float): Percentile in [0, 100].
+
+        Returns:
+            int: Upper bound in nanoseconds of the bucket containing the percentile.
+        '''
+
+        if not self.count:
+            return 0
+
+        rank = self.count * percent / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(1 << i, self.max_ns)
+        return self.max_ns
+
+    def __repr__(self) -> str:
+        return (
+            f'Histogram(count={self.count}, mean_ns={self.mean_ns:.0f}, '
+            f'p50_ns={self.percentile(50)}, p99_ns={self.percentile(99)}, max_ns={self.max_ns})'
+        )
+
+
+class Instrumentation:
+    '''
+    Latency of each stage of the input pipeline.
+
+    Pass an instance to a listener to enable measurement. Timestamps come from
+    `time.monotonic_ns()`. Subclasses may override `record_*` methods to act as
+    hooks, e.g. to export measurements.
+    '''
+
+    def __init__(self) -> None:
+        # From reading input to the end of parsing it, per read.
+        self.read_to_parse = Histogram()
+        # From the end of parsing to the dequeue by the processing thread, per read.
+        self.parse_to_dequeue = Histogram()
+        # Time spent in each handler call on the dispatching thread.
+        self.handler_duration = Histogram()
+
+    def record_read_to_parse(self, ns: int) -> None:
+        self.read_to_parse.record(ns)
+
+    def record_parse_to_dequeue(self, ns: int) -> None:
+        self.parse_to_dequeue.record(ns)
+
+    def record_handler_duration(self, ns: int) -> None:
+        self.handler_duration.record(ns)
+
+    def __repr__(self) -> str:
+        return (
+            f'Instrumentation(read_to_parse={self.read_to_parse!r}, '
+            f'parse_to_dequeue={self.parse_to_dequeue!r}, handler_duration={self.handler_duration!r})'
+        )
@@ -0,0 +1,56 @@
+from threading import Lock
+
+from .keys import Keys
+
+
+# Id of escape sequences reported as they are, which aren't interned.
+NO_KEY_ID = -1
+
+# Every `Keys` member and then every printable ASCII character has a fixed id in
+# that order, which is the same in every process of a version of this package.
+# Other keys (e.g. non-ASCII characters and decoded names like 'ctrl+alt+f5') get
+# the next free id when they are first seen, so their ids differ between processes.
+_keys: list[str] = list(Keys) + list(map(chr, range(0x20, 0x7f)))
+_ids: dict[str, int] = {key: i for i, key in enumerate(_keys)}
+_lock = Lock()
+
+# Ids below this are pinned, i.e. the same in every process.
+PINNED_KEY_IDS = len(_keys)
+
+
+def intern_key(key: str) -> int:
+    '''
+    Get the small integer id of a key.
+
+    Args:
+        key (str): A key name.
+
+    Returns:
+        int: The id, or `NO_KEY_ID` for a raw escape sequence, so that input can't grow the table without bound.
+    '''
+
+    key_id = _ids.get(key)
+    if key_id is not None:
+        return key_id
+    if len(key) > 1 and key[0] in '\x1b\x9b':
+        return NO_KEY_ID
+
+    with _lock:
+        key_id = _ids.get(key)
+        if key_id is None:
+            key_id = _ids[key] = len(_keys)
+            _keys.append(key)
+    return key_id
+
+
+def key_from_id(key_id: int) -> str:
+    '''
+    Get the key of an id returned by `intern_key`.
+
+    Raises:
+        IndexError: If the id hasn't been assigned.
+    '''
+
+    if key_id < 0:
+        raise IndexError(f'Key id {key_id} is not assigned.')
+    return _keys[key_id]
@@ -1,30 +1,96 @@
 import atexit
-import platform
-from queue import Queue
-from threading import Event, Lock, Thread
-from typing import Callable, Optional
-
-from .event import KeyEvent
+import sys
+from threading import Event, Lock, Thread, current_thread
+from types import TracebackType
+from time import monotonic, monotonic_ns
+from typing import Callable, Optional, Type
+
+from ._handlers import ErrorHook, Handler, Registry, report_error
+from ._input import Input
+from ._instrumentation import Instrumentation
 from ._parser import Parser
-
-
-if platform.system() == 'Windows':
-    from ._windows import listen, enable_virtual_terminal_sequences
-    _restore = enable_virtual_terminal_sequences()
-    atexit.register(_restore)
-else:
-    raise NotImplementedError()
-
-
-Handler = Callable[[KeyEvent], None]
-
-
-class Listener:
-
-    def __init__(self) -> None:
+from ._queue import EventQueue, OverflowPolicy, QueueStats
+from ._recording import Recorder
+
+
+# Seconds to wait for the rest of an escape sequence before treating it as typed keys.
+_ESCAPE_TIMEOUT = 0.1
+
+
+def default_input(mouse: bool = False, paste: bool = False) -> Input:
+    '''
+    Create input of the terminal of this process.
+
+    The backend is imported here rather than with this module, so importing
+    the package loads no platform library and changes no terminal state.
+
+    Args:
+        mouse (bool): Whether to report mouse input.
+        paste (bool): Whether to turn on bracketed paste mode.
+
+    Returns:
+        Input: The input.
+    '''
+
+    if sys.platform == 'win32':
+        from ._windows import WindowsInput
+        return WindowsInput(mouse, paste)
+
+    from ._posix import PosixInput
+    return PosixInput(mouse=mouse, paste=paste)
+
+
+class Listener(Registry):
+
+    def __init__(
+        self,
+        input: Optional[Input] = None,
+        maxsize: int = 0,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+        coalesce_repeats: bool = False,
+        instrumentation: Optional[Instrumentation] = None,
+        recorder: Optional[Recorder] = None,
+        mouse: bool = False,
+        paste: bool = False,
+        paste_limit: Optional[int] = None,
+        paste_chunk_size: Optional[int] = None,
+        on_error: ErrorHook = report_error,
+        max_failures: Optional[int] = None
+    ) -> None:
+        '''
+        Args:
+            input (Optional[Input]): Input to listen. Defaults to the terminal of this process.
+            maxsize (int): Maximum number of events waiting for handlers. Unbounded if 0 or less.
+            overflow (OverflowPolicy): What to do when too many events are waiting.
+            coalesce_repeats (bool): Whether to deliver runs of the same key within one read
+                as a single event with `repeat` count.
+            instrumentation (Optional[Instrumentation]): Where to record latency. Disabled if None.
+            recorder (Optional[Recorder]): Where to record raw input. Disabled if None.
+            mouse (bool): Whether the default input reports mouse input as `MouseEvent`.
+                Motion within one read is coalesced into the last position.
+            paste (bool): Whether the default input turns on bracketed paste mode, so a paste
+                is delivered as a `PasteEvent` instead of a key per character.
+            paste_limit (Optional[int]): Maximum characters kept from a paste. Unlimited if None.
+            paste_chunk_size (Optional[int]): Deliver pastes in events of about this many characters
+                as they arrive, rather than in one event. Disabled if None.
+            on_error (ErrorHook): Called with exceptions raised by handlers.
+                Reports them like uncaught ones by default.
+            max_failures (Optional[int]): Remove a handler once it raises this many times in a row. Disabled if None.
+        '''
+
+        super().__init__(instrumentation, on_error, max_failures)
+        self._recorder = recorder
+        self._mouse = mouse
+        self._paste = paste
+        self._paste_limit = paste_limit
+        self._paste_chunk_size = paste_chunk_size
+        self._input: Optional[Input] = input
+        # The default input is created on start, and dropped by `close`.
+        self._owns_input = input is None
+        self._restore: Optional[Callable[[], None]] = None
         self._running: bool = False
-        self._handlers: list[Handler] = []
-        self._queue: Queue[KeyEvent] = Queue()
+        self._queue = EventQueue(maxsize, overflow)
+        self._coalesce_repeats = coalesce_repeats
         self._lock = Lock()
         self._stop_event = Event()
         self._listening_thread: Optional[Thread] = None
@@ -37,10 +103,17 @@ class Listener:
             if self._running:
                 return
 
-            self._running = True
             self._stop_event.clear()
+            self._queue.open()
 
-            self._listening_thread = Thread(target=self._listen)
+            if self._input is None:
+                self._input = default_input(self._mouse, self._paste)
+            # Not running until the input is enabled, so a failed start can be retried.
+            self._restore = self._input.enable()
+            atexit.register(self._restore)
+            self._running = True
+
+            self._listening_thread = Thread(target=self._listen, args=(self._input,))
             self._listening_thread.daemon = True
             self._listening_thread.start()
 
@@ -49,7 +122,12 @@ class Listener:
             self._processing_thread.start()
 
     def stop(self) -> None:
-        '''Stop running listener.'''
+        '''
+        Stop running listener. It can be started again.
+
+        Both threads are woken up rather than polled, so this returns as soon as a
+        handler being run returns. Events waiting for handlers are discarded.
+        '''
 
         with self._lock:
             if not self._running:
@@ -57,46 +135,98 @@ class Listener:
 
             self._running = False
             self._stop_event.set()
+            self._queue.close()
+            if self._input is not None:
+                self._input.wakeup()
 
-            if self._listening_thread is not None:
-                self._listening_thread.join()
-            if self._processing_thread is not None:
-                self._processing_thread.join()
+            for thread in (self._listening_thread, self._processing_thread):
+                # A handler may stop the listener from the processing thread.
+                if thread is not None and thread is not current_thread():
+                    thread.join()
 
             self._listening_thread = None
             self._processing_thread = None
 
-    def add_handler(self, handler: Handler) -> None:
-        with self._lock:
-            self._handlers.append(handler)
+            if self._restore is not None:
+                atexit.unregister(self._restore)
+                self._restore()
+                self._restore = None
 
-    def remove_handler(self, handler: Handler) -> None:
-        '''Remove all handlers from list.'''
+    def close(self) -> None:
+        '''
+        Stop listener, and release resources of its input (e.g. the wakeup pipe) and
+        threads of its handlers. It can be started again.
+        '''
 
+        self.stop()
+        self._close()
         with self._lock:
-            while handler in self._handlers:
-                self._handlers.remove(handler)
+            if self._input is not None:
+                self._input.close()
+                if self._owns_input:
+                    self._input = None
+
+    def __enter__(self) -> 'Listener':
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        self.close()
 
-    def _listen(self) -> None:
-        parser = Parser()
+    @property
+    def queue_stats(self) -> QueueStats:
+        '''A snapshot of counters of events waiting for handlers.'''
+
+        return self._queue.stats
+
+    def _listen(self, input: Input) -> None:
+        parser = Parser(self._coalesce_repeats, self._mouse, self._paste_limit, self._paste_chunk_size)
+        received = False
 
         def put_queue(keys: list[str]) -> None:
-            for event in parser.parse(''.join(keys)):
-                self._queue.put(event)
+            nonlocal received
+            received = True
+            read_at = monotonic_ns()
+            data = ''.join(keys)
+            if self._recorder is not None:
+                self._recorder.record(data, read_at)
+            # Keys nobody listens for are dropped by the parser, and often the whole read with them.
+            parser.interest = self._handlers.interest
+            events = list(parser.parse(data, read_at))
+            if self._instrumentation is not None:
+                self._instrumentation.record_read_to_parse(monotonic_ns() - read_at)
+            if events:
+                self._queue.put(events)
 
         while not self._stop_requested():
-            listen(put_queue)
+            if not parser.pending:
+                input.listen(put_queue)
+                continue
+
+            received = False
+            input.listen(put_queue, _ESCAPE_TIMEOUT)
+            if not received:
+                parser.interest = self._handlers.interest
+                events = list(parser.flush())
+                if events:
+                    self._queue.put(events)
 
     def _process(self) -> None:
         while not self._stop_requested():
-            event = self._queue.get()
-            self._invoke_handlers(event)
-            self._queue.task_done()
-
-    def _invoke_handlers(self, event: KeyEvent) -> None:
-        with self._lock:
-            for handler in self._handlers:
-                handler(event)
+            deadline = self._next_deadline()
+            batch = self._queue.get(None if deadline is None else max(deadline - monotonic(), 0))
+            if batch is not None:
+                events, queued_at = batch
+                if self._instrumentation is not None:
+                    self._instrumentation.record_parse_to_dequeue(monotonic_ns() - queued_at)
+                self._dispatch(events)
+            if deadline is not None:
+                self._expire(monotonic())
 
     def _stop_requested(self) -> bool:
         return self._stop_event.is_set()
@@ -0,0 +1,36 @@
+import os
+from typing import Callable, Sequence
+
+
+# DEC private modes reporting mouse presses, releases and motion as SGR sequences.
+MOUSE_MODES = (1000, 1003, 1006)
+# DEC private mode wrapping pasted text in ESC[200~ and ESC[201~.
+BRACKETED_PASTE_MODE = 2004
+
+
+def enable_private_modes(fd: int, modes: Sequence[int]) -> Callable[[], None]:
+    '''
+    Turn on DEC private modes of the terminal (e.g. mouse tracking).
+
+    Args:
+        fd (int): A file descriptor of the terminal output.
+        modes (Sequence[int]): Mode numbers.
+
+    Returns:
+        Callable[[], None]: A callable that will turn the modes off.
+    '''
+
+    if not modes:
+        return lambda: None
+
+    os.write(fd, ''.join(f'\x1b[?{mode}h' for mode in modes).encode())
+
+    def restore() -> None:
+        '''Turn the modes off.'''
+
+        try:
+            os.write(fd, ''.join(f'\x1b[?{mode}l' for mode in reversed(modes)).encode())
+        except OSError:
+            pass
+
+    return restore
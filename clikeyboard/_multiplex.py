@@ -0,0 +1,309 @@
+import codecs
+import os
+import selectors
+from threading import Event, Lock, RLock, Thread
+from time import monotonic, monotonic_ns
+from typing import Hashable, Optional, Protocol, Union
+
+from .event import KeyEvent, with_source
+from ._handlers import ErrorHook, Registry, report_error
+from ._input import drain_fd, read_fd
+from ._instrumentation import Instrumentation
+from ._listener import _ESCAPE_TIMEOUT
+from ._parser import Parser
+
+
+class HasFileno(Protocol):
+    def fileno(self) -> int:
+        ...
+
+
+class Source(Registry):
+    '''
+    Input multiplexed by `MultiplexListener`, with its own parser state and handlers.
+
+    Handlers run on the thread of the listener, so a slow one delays every
+    source of it unless it runs with another execution policy.
+    '''
+
+    def __init__(
+        self,
+        fd: int,
+        id: Hashable,
+        parser: Parser,
+        instrumentation: Optional[Instrumentation] = None,
+        on_error: ErrorHook = report_error,
+        max_failures: Optional[int] = None
+    ) -> None:
+        '''
+        Args:
+            fd (int): A file descriptor to read.
+            id (Hashable): Id set to `KeyEvent.source` of events read from fd.
+            parser (Parser): Parser of input read from fd.
+            instrumentation (Optional[Instrumentation]): Where to record latency. Disabled if None.
+            on_error (ErrorHook): Called with exceptions raised by handlers.
+            max_failures (Optional[int]): Remove a handler once it raises this many times in a row. Disabled if None.
+        '''
+
+        super().__init__(instrumentation, on_error, max_failures)
+        self._fd = fd
+        self._id = id
+        self._parser = parser
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        # `time.monotonic()` when a pending escape sequence is emitted as typed keys.
+        self._flush_at: Optional[float] = None
+        self._eof = False
+
+    @property
+    def id(self) -> Hashable:
+        return self._id
+
+    @property
+    def at_eof(self) -> bool:
+        '''Whether the end of input has been reached. The source is removed from its listener then.'''
+
+        return self._eof
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def _read(self) -> None:
+        '''Read available input and dispatch events parsed from it.'''
+
+        try:
+            data = read_fd(self._fd)
+        except BlockingIOError:
+            return
+
+        read_at = monotonic_ns()
+        parser = self._parser
+        parser.interest = self._handlers.interest
+        events = list(parser.parse(self._decoder.decode(data, final=not data), read_at))
+        if not data:
+            self._eof = True
+            events.extend(parser.flush())
+        if self._instrumentation is not None:
+            self._instrumentation.record_read_to_parse(monotonic_ns() - read_at)
+
+        self._flush_at = monotonic() + _ESCAPE_TIMEOUT if parser.pending else None
+        if events:
+            self._stamp(events)
+            self._dispatch(events)
+
+    def _next_deadline(self) -> Optional[float]:
+        deadline = super()._next_deadline()
+        if self._flush_at is None:
+            return deadline
+        return self._flush_at if deadline is None else min(deadline, self._flush_at)
+
+    def _expire(self, now: float) -> None:
+        if self._flush_at is not None and now >= self._flush_at:
+            self._flush_at = None
+            self._parser.interest = self._handlers.interest
+            events = list(self._parser.flush())
+            if events:
+                self._stamp(events)
+                self._dispatch(events)
+        super()._expire(now)
+
+    def _stamp(self, events: list[KeyEvent]) -> None:
+        source = self._id
+        for i, event in enumerate(events):
+            events[i] = with_source(event, source)
+
+
+class MultiplexListener:
+    '''
+    Listener of many inputs (e.g. ptys, sockets or pipes) on one thread.
+
+    Inputs are watched with selectors (epoll on Linux), so the listener uses a
+    single thread however many sources it has, and no CPU while they are idle.
+    Each source has its own parser state and handlers. To use several cores
+    for handlers which release the GIL, spread sources over a few listeners.
+
+    Inputs are read as they are. Putting a terminal into raw mode is left to
+    the owner of the input.
+    '''
+
+    def __init__(
+        self,
+        instrumentation: Optional[Instrumentation] = None,
+        on_error: ErrorHook = report_error,
+        max_failures: Optional[int] = None
+    ) -> None:
+        '''
+        Args:
+            instrumentation (Optional[Instrumentation]): Where to record latency of all sources. Disabled if None.
+            on_error (ErrorHook): Called with exceptions raised by handlers of all sources.
+                Reports them like uncaught ones by default.
+            max_failures (Optional[int]): Remove a handler of a source once it raises this many times in a row.
+                Disabled if None.
+        '''
+
+        self._instrumentation = instrumentation
+        self._on_error = on_error
+        self._max_failures = max_failures
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_reader, self._wakeup_writer = os.pipe()
+        os.set_blocking(self._wakeup_reader, False)
+        os.set_blocking(self._wakeup_writer, False)
+        self._selector.register(self._wakeup_reader, selectors.EVENT_READ)
+        # Held while sources are read, so a removed source is never read afterwards.
+        self._sources_lock = RLock()
+        self._sources: dict[int, Source] = {}
+        # Sources waiting for a timer, so only they are scanned for deadlines.
+        self._timed: set[Source] = set()
+        self._lock = Lock()
+        self._running = False
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+        self._closed = False
+
+    @property
+    def sources(self) -> tuple[Source, ...]:
+        return tuple(self._sources.values())
+
+    def add_source(
+        self,
+        fd: Union[int, HasFileno],
+        id: Hashable = None,
+        coalesce_repeats: bool = False,
+        coalesce_motion: bool = False,
+        paste_limit: Optional[int] = None,
+        paste_chunk_size: Optional[int] = None
+    ) -> Source:
+        '''
+        Start watching input. It is safe to call while the listener is running.
+
+        Args:
+            fd (Union[int, HasFileno]): A file descriptor, or an object with `fileno()`, to read.
+            id (Hashable): Id set to `KeyEvent.source` of its events. Defaults to the file descriptor.
+            coalesce_repeats (bool): Whether to deliver runs of the same key within one read
+                as a single event with `repeat` count.
+            coalesce_motion (bool): Whether to coalesce mouse motion within one read into the last position.
+            paste_limit (Optional[int]): Maximum characters kept from a paste. Unlimited if None.
+            paste_chunk_size (Optional[int]): Deliver pastes in events of about this many characters
+                as they arrive, rather than in one event. Disabled if None.
+
+        Returns:
+            Source: The source, to which handlers are added.
+        '''
+
+        if not isinstance(fd, int):
+            fd = fd.fileno()
+
+        parser = Parser(coalesce_repeats, coalesce_motion, paste_limit, paste_chunk_size)
+        source = Source(
+            fd, fd if id is None else id, parser, self._instrumentation, self._on_error, self._max_failures
+        )
+        with self._sources_lock:
+            if fd in self._sources:
+                raise ValueError(f'File descriptor {fd} is already watched.')
+            self._selector.register(fd, selectors.EVENT_READ, source)
+            self._sources[fd] = source
+        return source
+
+    def remove_source(self, source: Source) -> None:
+        '''
+        Stop watching input. Once this returns, the input is no longer read, so it may be closed.
+
+        Pending timers of the source (e.g. a partially typed key sequence) are discarded,
+        and threads of its handlers are released.
+        '''
+
+        with self._sources_lock:
+            self._remove(source)
+        self._wakeup()
+
+    def start(self) -> None:
+        '''Start listener if it hasn't started.'''
+
+        with self._lock:
+            if self._running:
+                return
+
+            self._running = True
+            self._stop_event.clear()
+            self._thread = Thread(target=self._listen)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self) -> None:
+        '''Stop running listener. Sources stay registered, so it can start again.'''
+
+        with self._lock:
+            if not self._running:
+                return
+
+            self._running = False
+            self._stop_event.set()
+            self._wakeup()
+            if self._thread is not None:
+                self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        '''Stop listener and release its resources, including threads of handlers. Sources themselves are left open.'''
+
+        self.stop()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        with self._sources_lock:
+            for source in list(self._sources.values()):
+                self._remove(source)
+        self._selector.close()
+        os.close(self._wakeup_reader)
+        os.close(self._wakeup_writer)
+
+    def _listen(self) -> None:
+        while not self._stop_event.is_set():
+            with self._sources_lock:
+                deadline = min((d for d in map(Source._next_deadline, self._timed) if d is not None), default=None)
+            ready = self._selector.select(None if deadline is None else max(deadline - monotonic(), 0))
+
+            with self._sources_lock:
+                for key, _ in ready:
+                    source = key.data
+                    if source is None:
+                        drain_fd(self._wakeup_reader)
+                    elif self._sources.get(key.fd) is source:
+                        self._read(source)
+
+                if self._timed:
+                    now = monotonic()
+                    for source in list(self._timed):
+                        source._expire(now)
+                        self._update_timed(source)
+
+    def _read(self, source: Source) -> None:
+        source._read()
+        if source.at_eof:
+            self._remove(source)
+        else:
+            self._update_timed(source)
+
+    def _update_timed(self, source: Source) -> None:
+        if source._next_deadline() is None:
+            self._timed.discard(source)
+        elif source._fd in self._sources:
+            self._timed.add(source)
+
+    def _remove(self, source: Source) -> None:
+        if self._sources.get(source._fd) is not source:
+            return
+
+        del self._sources[source._fd]
+        self._timed.discard(source)
+        source._close()
+        try:
+            self._selector.unregister(source._fd)
+        except (KeyError, ValueError):
+            pass  # The file descriptor has been closed already.
+
+    def _wakeup(self) -> None:
+        try:
+            os.write(self._wakeup_writer, b'\0')
+        except BlockingIOError:
+            pass  # Pipe is full, so the listener will wake up anyway.
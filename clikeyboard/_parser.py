@@ -1,42 +1,448 @@
-from typing import Generator
+from typing import Callable, Generator, Iterator, Optional
 
-from .event import KeyEvent
-from ._ansi_sequences import ANSI_SEQUENCES
+from .event import KeyEvent, MouseAction, MouseEvent, PasteEvent, shared_key_event
+from .keys import Keys
+from ._ansi_sequences import (
+    ANSI_SEQUENCES, CSI, PASTE_END, PASTE_START, SGR_MOUSE, SS3, common_sequences, decode_csi, decode_sgr_mouse,
+    decode_ss3
+)
 
 
-_ESC = '\x1b'
-_get_ansi_sequence = ANSI_SEQUENCES.get
+# Longest control sequence to collect before giving up on it.
+_MAX_SEQUENCE_LENGTH = 64
+
+
+class _Node:
+    '''Node of a prefix tree of escape sequences.'''
+
+    __slots__ = ('children', 'keys', 'decode', 'collect')
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.keys: Optional[tuple[str, ...]] = None
+        # Set on the node collecting a control sequence. Parameter characters are
+        # collected, and the whole sequence is decoded at its final character.
+        self.decode: Optional[Callable[[str], Optional[tuple[str, ...]]]] = None
+        # Set on nodes of control sequences: the node to collect the sequence in
+        # once it leaves the tree.
+        self.collect: Optional[_Node] = None
+
+
+def _compile(
+    sequences: dict[str, tuple[str, ...]],
+    introducers: dict[str, Callable[[str], Optional[tuple[str, ...]]]]
+) -> _Node:
+    '''
+    Build a prefix tree from sequences.
+
+    Args:
+        sequences (dict[str, tuple[str, ...]]): Mapping of sequences to keys.
+        introducers (dict[str, Callable[[str], Optional[tuple[str, ...]]]]): Mapping of
+            control sequence introducers to decoders of whole sequences.
+
+    Returns:
+        _Node: Root of the tree.
+    '''
+
+    root = _Node()
+
+    def insert(sequence: str) -> _Node:
+        node = root
+        for character in sequence:
+            child = node.children.get(character)
+            if child is None:
+                child = node.children[character] = _Node()
+            node = child
+        return node
+
+    def set_collect(node: _Node, collect: _Node) -> None:
+        node.collect = collect
+        for child in node.children.values():
+            set_collect(child, collect)
+
+    for sequence, keys in sequences.items():
+        insert(sequence).keys = keys
+    for sequence, decode in introducers.items():
+        collect = _Node()
+        collect.decode = decode
+        set_collect(insert(sequence), collect)
+    return root
+
+
+# Built by the first parser, so importing the package decodes no sequences.
+_root: Optional[_Node] = None
+
+
+def _get_root() -> _Node:
+    '''Get the prefix tree shared by parsers, building it on first use.'''
+
+    global _root
+
+    if _root is None:
+        # Common control sequences are matched in the tree, as that is faster than decoding them.
+        _root = _compile({**ANSI_SEQUENCES, **common_sequences()}, {CSI: decode_csi, SS3: decode_ss3})
+    return _root
 
 
 class Parser():
+    '''
+    Incremental parser of terminal input.
+
+    Each character is walked through the prefix tree once, and a sequence split
+    across several `parse` calls is kept pending until it completes. A pending
+    sequence that never completes (e.g. a lone escape key) is emitted by `flush`.
+    Common control sequences are in the tree, and other CSI and SS3 sequences
+    are collected once they leave it and decoded from their parameters.
+
+    Bracketed paste is located with `str.find` instead, and its text is joined
+    once into a `PasteEvent`, even if it spans many `parse` calls.
+
+    Keys outside `interest` are dropped before their events are made, but they
+    still end a pending sequence.
+    '''
+
+    def __init__(
+        self,
+        coalesce_repeats: bool = False,
+        coalesce_motion: bool = False,
+        paste_limit: Optional[int] = None,
+        paste_chunk_size: Optional[int] = None,
+        interest: Optional[frozenset[str]] = None
+    ) -> None:
+        '''
+        Args:
+            coalesce_repeats (bool): Whether to collapse runs of the same key within
+                one `parse` call into a single event with `repeat` count.
+            coalesce_motion (bool): Whether to collapse runs of mouse motion within
+                one `parse` call into the last one.
+            paste_limit (Optional[int]): Maximum characters kept from a paste. The rest
+                is discarded and the event is marked truncated. Unlimited if None.
+            paste_chunk_size (Optional[int]): Deliver a paste in events of about this many
+                characters as it arrives, rather than in one event at its end. Disabled if None.
+            interest (Optional[frozenset[str]]): Keys to make events of. Every key if None.
+        '''
+
+        self._coalesce_repeats = coalesce_repeats
+        self._coalesce_motion = coalesce_motion
+        self._paste_limit = paste_limit
+        self._paste_chunk_size = paste_chunk_size
+        self._interest = interest
+        self._root = _get_root()
+        self._node: _Node = self._root
+        self._sequence: str = ''
+        self._match: Optional[tuple[str, ...]] = None
+        self._match_length: int = 0
+        self._timestamp: Optional[int] = None
+        # Text of the paste being received, or None outside paste.
+        self._paste: Optional[list[str]] = None
+        self._paste_size: int = 0
+        self._paste_received: int = 0
+        self._paste_truncated: bool = False
+        self._paste_timestamp: Optional[int] = None
+        # End of input which may be the start of the paste end marker.
+        self._paste_tail: str = ''
+
+    @property
+    def pending(self) -> bool:
+        '''Whether an incomplete sequence is waiting for more input.'''
+
+        return self._node is not self._root
+
+    @property
+    def interest(self) -> Optional[frozenset[str]]:
+        '''Keys to make events of, or None for every key. It may be replaced between `parse` calls.'''
+
+        return self._interest
+
+    @interest.setter
+    def interest(self, interest: Optional[frozenset[str]]) -> None:
+        self._interest = interest
+
+    def _wants(self, key: str) -> bool:
+        return self._interest is None or key in self._interest
+
+    def parse(self, data: str, timestamp: Optional[int] = None) -> Iterator[KeyEvent]:
+        '''
+        Parse input.
+
+        Args:
+            data (str): Input read from terminal.
+            timestamp (Optional[int]): `time.monotonic_ns()` when data was read.
+                Events from a sequence split across reads get the time of its first read.
+
+        Yields:
+            KeyEvent: Parsed events.
+        '''
+
+        if self._paste is None and PASTE_START not in data and not self._may_start_paste():
+            return self._coalesce(self._parse(data, timestamp))
+        return self._coalesce(self._parse_pasted(data, timestamp))
+
+    def _may_start_paste(self) -> bool:
+        '''Whether the pending sequence may be the start of a paste start marker.'''
+
+        return self._node is not self._root and PASTE_START.startswith(self._sequence)
+
+    def _parse_pasted(self, data: str, timestamp: Optional[int]) -> Generator[KeyEvent, None, None]:
+        '''Parse input containing (a part of) bracketed paste.'''
+
+        while data:
+            if self._paste is not None:
+                data = yield from self._parse_paste(data)
+                continue
+
+            if self._may_start_paste():
+                # The start marker is split across reads.
+                rest = len(PASTE_START) - len(self._sequence)
+                if data[:rest] == PASTE_START[len(self._sequence):]:
+                    paste_timestamp = self._timestamp
+                    self._reset()
+                    self._start_paste(paste_timestamp)
+                    data = data[rest:]
+                    continue
+
+            start = data.find(PASTE_START)
+            if start < 0:
+                yield from self._parse(data, timestamp)
+                return
+
+            yield from self._parse(data[:start], timestamp)
+            # A sequence left incomplete is cut short by the marker.
+            yield from self._flush()
+            self._start_paste(timestamp)
+            data = data[start + len(PASTE_START):]
+
+    def _start_paste(self, timestamp: Optional[int]) -> None:
+        self._paste = []
+        self._paste_size = 0
+        self._paste_received = 0
+        self._paste_truncated = False
+        self._paste_timestamp = timestamp
+
+    def _parse_paste(self, data: str) -> Generator[KeyEvent, None, str]:
+        '''
+        Collect pasted text up to the end marker.
 
-    def parse(self, data: str) -> Generator[KeyEvent, None, None]:
-
-        pos = 0
-        data_size = len(data)
-
-        def read1() -> str:
-            nonlocal pos
-            character = data[pos]
-            pos += 1
-            return character
-
-        while pos < data_size:
-            character = read1()
-
-            if character == _ESC and pos != data_size:
-                sequence: str = character
-                while True:
-                    sequence += read1()
-                    keys = _get_ansi_sequence(sequence, None)
-                    if keys is not None:
-                        for key in keys:
-                            yield KeyEvent(key=key)
-                        break
+        Returns:
+            str: Input after the end marker.
+        '''
+
+        if self._paste_tail:
+            data = self._paste_tail + data
+            self._paste_tail = ''
+
+        end = data.find(PASTE_END)
+        if end < 0:
+            # Keep what may be the start of the end marker for the next call.
+            escape = data.rfind('\x1b', max(len(data) - len(PASTE_END) + 1, 0))
+            if escape >= 0 and PASTE_END.startswith(data[escape:]):
+                self._paste_tail = data[escape:]
+                data = data[:escape]
+            yield from self._append_paste(data)
+            return ''
+
+        # Text before the marker goes out with the final event, rather than in a chunk
+        # followed by an empty final event.
+        yield from self._append_paste(data[:end], final=True)
+        paste = self._paste
+        assert paste is not None
+        self._paste = None
+        if self._wants(Keys.BRACKETED_PASTE):
+            yield PasteEvent(''.join(paste), True, self._paste_truncated, self._paste_timestamp)
+        return data[end + len(PASTE_END):]
+
+    def _append_paste(self, text: str, final: bool = False) -> Generator[KeyEvent, None, None]:
+        paste = self._paste
+        assert paste is not None
+
+        if self._paste_limit is not None:
+            room = self._paste_limit - self._paste_received
+            if len(text) > room:
+                text = text[:max(room, 0)]
+                self._paste_truncated = True
+        if not text or not self._wants(Keys.BRACKETED_PASTE):
+            return
+
+        paste.append(text)
+        self._paste_size += len(text)
+        self._paste_received += len(text)
+
+        if not final and self._paste_chunk_size is not None and self._paste_size >= self._paste_chunk_size:
+            yield PasteEvent(''.join(paste), False, self._paste_truncated, self._paste_timestamp)
+            paste.clear()
+            self._paste_size = 0
+
+    def _parse(self, data: str, timestamp: Optional[int]) -> Generator[KeyEvent, None, None]:
+        interest = self._interest
+        root = self._root
+        get_root_child = root.children.get
+        for character in data:
+            if self._node is root:
+                child = get_root_child(character)
+                if child is None:
+                    if interest is None or character in interest:
+                        yield KeyEvent(character, 1, timestamp) if timestamp is not None else shared_key_event(character)
+                    continue
+                if child.children:
+                    self._timestamp = timestamp
+            elif self._node.decode is not None:
+                yield from self._collect(character)
+                continue
+            else:
+                child = self._node.children.get(character)
+                if child is None:
+                    collect = self._node.collect
+                    if collect is not None:
+                        # Not a common control sequence, so decode it from its parameters.
+                        self._node = collect
+                        yield from self._collect(character)
+                    else:
+                        # Dead end, so fall back to the longest sequence matched so far.
+                        yield from self._resolve(character)
+                    continue
+
+            if child.children:
+                self._node = child
+                self._sequence += character
+                if child.keys is not None:
+                    self._match = child.keys
+                    self._match_length = len(self._sequence)
+                continue
+
+            if self._node is root:
+                key_timestamp = timestamp
             else:
-                keys = _get_ansi_sequence(character, None)
-                if keys is not None:
-                    for key in keys:
-                        yield KeyEvent(key=key)
-                else:
-                    yield KeyEvent(key=character)
+                key_timestamp = self._timestamp
+                self._reset()
+
+            if child.keys is not None:
+                for key in child.keys:
+                    if interest is None or key in interest:
+                        yield _key_event(key, key_timestamp)
+
+    def _collect(self, character: str) -> Generator[KeyEvent, None, None]:
+        '''Collect a character of a CSI or SS3 sequence, and decode it at its final character.'''
+
+        # Collect parameter and intermediate characters (Linux console prefixes F1-F5 with another '[').
+        if (
+            (' ' <= character <= '?' or (character == '[' and self._sequence == CSI))
+            and len(self._sequence) < _MAX_SEQUENCE_LENGTH
+        ):
+            self._sequence += character
+            return
+
+        events = self._decode(character)
+        if events is None:
+            # Not a control sequence, so fall back to the keys typed.
+            yield from self._resolve(character)
+            return
+
+        self._reset()
+        yield from events
+
+    def _decode(self, character: str) -> Optional[list[KeyEvent]]:
+        '''Decode the pending control sequence ending with character, or return None if it is malformed.'''
+
+        if not '@' <= character <= '~' or len(self._sequence) >= _MAX_SEQUENCE_LENGTH:
+            return None
+
+        sequence = self._sequence + character
+        if character in 'Mm' and sequence.startswith(SGR_MOUSE):
+            event = decode_sgr_mouse(sequence, self._timestamp)
+            if event is None:
+                return [_key_event(sequence, self._timestamp)] if self._wants(sequence) else []
+            return [event] if self._wants(Keys.MOUSE) else []
+
+        keys = self._node.decode(sequence)  # type: ignore[misc]
+        if keys is None:
+            return None
+        return [_key_event(key, self._timestamp) for key in keys if self._wants(key)]
+
+    def flush(self) -> Iterator[KeyEvent]:
+        '''
+        Emit pending sequence as if no more input follows.
+
+        Yields:
+            KeyEvent: Parsed events.
+        '''
+
+        return self._coalesce(self._flush())
+
+    def _coalesce(self, events: Iterator[KeyEvent]) -> Iterator[KeyEvent]:
+        if self._coalesce_motion:
+            events = _coalesce_motion(events)
+        if self._coalesce_repeats:
+            events = _coalesce_repeats(events)
+        return events
+
+    def _flush(self) -> Generator[KeyEvent, None, None]:
+        if self.pending:
+            yield from self._resolve('')
+
+    def _resolve(self, rest: str) -> Generator[KeyEvent, None, None]:
+        sequence = self._sequence
+        match = self._match
+        match_length = self._match_length
+        timestamp = self._timestamp
+        self._reset()
+
+        if match is None:
+            if self._wants(sequence[0]):
+                yield _key_event(sequence[0], timestamp)
+            match_length = 1
+        else:
+            for key in match:
+                if self._wants(key):
+                    yield _key_event(key, timestamp)
+
+        yield from self._parse(sequence[match_length:] + rest, timestamp)
+        if not rest:
+            yield from self._flush()
+
+    def _reset(self) -> None:
+        self._node = self._root
+        self._sequence = ''
+        self._match = None
+        self._match_length = 0
+        self._timestamp = None
+
+
+def _key_event(key: str, timestamp: Optional[int]) -> KeyEvent:
+    return KeyEvent(key, 1, timestamp) if timestamp is not None else shared_key_event(key)
+
+
+def _coalesce_repeats(events: Iterator[KeyEvent]) -> Generator[KeyEvent, None, None]:
+    previous: Optional[KeyEvent] = None
+    repeat = 0
+
+    for event in events:
+        if previous is not None and event.key == previous.key and type(event) is KeyEvent:
+            repeat += event.repeat
+            continue
+
+        if previous is not None:
+            yield previous if repeat == previous.repeat else KeyEvent(previous.key, repeat, previous.timestamp)
+        previous = event
+        repeat = event.repeat
+
+    if previous is not None:
+        yield previous if repeat == previous.repeat else KeyEvent(previous.key, repeat, previous.timestamp)
+
+
+def _coalesce_motion(events: Iterator[KeyEvent]) -> Generator[KeyEvent, None, None]:
+    motion: Optional[MouseEvent] = None
+
+    for event in events:
+        if isinstance(event, MouseEvent) and event.action is MouseAction.MOVE:
+            if motion is not None and (motion.button is not event.button or motion.modifiers != event.modifiers):
+                yield motion
+            motion = event
+            continue
+
+        if motion is not None:
+            yield motion
+            motion = None
+        yield event
+
+    if motion is not None:
+        yield motion
@@ -0,0 +1,197 @@
+import atexit
+from collections import deque
+from io import UnsupportedOperation
+from time import monotonic, monotonic_ns
+from types import TracebackType
+from typing import Callable, Optional, Sequence, Type
+
+from .event import KeyEvent
+from ._input import Input, SelectableInput
+from ._listener import _ESCAPE_TIMEOUT, default_input
+from ._parser import Parser
+
+
+class Poller:
+    '''
+    Keys read and parsed on the calling thread, for loops which poll input
+    (e.g. once per frame) rather than having handlers invoked.
+
+    There are no threads or queues between the input and the caller. A call
+    finding no input creates no events or buffers, and `poll_events` then returns
+    a shared empty tuple. It still asks the input whether it is readable, which
+    on POSIX is a `select` call returning a new (empty) list of ready inputs:
+    checking without it, e.g. with FIONREAD, would miss the end of input.
+    '''
+
+    def __init__(
+        self,
+        input: Optional[Input] = None,
+        coalesce_repeats: bool = False,
+        mouse: bool = False,
+        paste: bool = False,
+        paste_limit: Optional[int] = None,
+        paste_chunk_size: Optional[int] = None
+    ) -> None:
+        '''
+        Args:
+            input (Optional[Input]): Input to read. Defaults to the terminal of this process.
+            coalesce_repeats (bool): Whether to deliver runs of the same key within one read
+                as a single event with `repeat` count.
+            mouse (bool): Whether the default input reports mouse input as `MouseEvent`.
+                Motion within one read is coalesced into the last position.
+            paste (bool): Whether the default input turns on bracketed paste mode.
+            paste_limit (Optional[int]): Maximum characters kept from a paste. Unlimited if None.
+            paste_chunk_size (Optional[int]): Deliver pastes in events of about this many characters
+                as they arrive, rather than in one event. Disabled if None.
+        '''
+
+        self._mouse = mouse
+        self._paste = paste
+        self._input: Optional[Input] = input
+        # The default input is created on start, and dropped by `close`.
+        self._owns_input = input is None
+        self._restore: Optional[Callable[[], None]] = None
+        # Whether the input is a `SelectableInput`, which is slow to check.
+        self._selectable = False
+        self._parser = Parser(coalesce_repeats, mouse, paste_limit, paste_chunk_size)
+        # Events parsed but not returned yet.
+        self._events: deque[KeyEvent] = deque()
+        # `time.monotonic()` when the pending escape sequence is given up on and flushed.
+        self._flush_at: Optional[float] = None
+        # Bound once, so that polling doesn't create a method object on every call.
+        self._on_input = self._feed
+
+    def start(self) -> None:
+        '''Prepare the terminal for reading keys, if it hasn't been.'''
+
+        if self._restore is not None:
+            return
+        if self._input is None:
+            self._input = default_input(self._mouse, self._paste)
+        self._restore = self._input.enable()
+        atexit.register(self._restore)
+        self._selectable = isinstance(self._input, SelectableInput)
+
+    def close(self) -> None:
+        '''Restore the terminal, and release resources of the input. It can be started again.'''
+
+        if self._restore is not None:
+            atexit.unregister(self._restore)
+            self._restore()
+            self._restore = None
+        if self._input is not None:
+            self._input.close()
+            if self._owns_input:
+                self._input = None
+
+    def __enter__(self) -> 'Poller':
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        self.close()
+
+    def fileno(self) -> int:
+        '''
+        File descriptor of the input, for waiting with `select` or an event loop.
+
+        Call `poll_events` once it is readable, and also after `next_timeout` passes.
+
+        Raises:
+            io.UnsupportedOperation: If the input has no file descriptor (e.g. on Windows).
+        '''
+
+        input = self._started_input()
+        if not self._selectable:
+            raise UnsupportedOperation('Input has no file descriptor.')
+        return input.fileno()  # type: ignore[attr-defined]
+
+    @property
+    def next_timeout(self) -> Optional[float]:
+        '''
+        Seconds until `poll_events` has to be called even if no input arrives,
+        for a pending escape sequence (e.g. a lone escape key). None if there is nothing to wait for.
+        '''
+
+        if self._events:
+            return 0.0
+        if self._flush_at is None:
+            return None
+        return max(self._flush_at - monotonic(), 0.0)
+
+    def poll_events(self) -> Sequence[KeyEvent]:
+        '''
+        Read and parse available input without waiting.
+
+        With nothing to read, this costs a system call checking the input and the
+        list it returns, but makes no events.
+
+        Returns:
+            Sequence[KeyEvent]: Events in order. Empty if no key has been pressed.
+        '''
+
+        self._fill(0)
+        if not self._events:
+            return ()
+        events = list(self._events)
+        self._events.clear()
+        return events
+
+    def read_key(self, timeout: Optional[float] = None) -> Optional[KeyEvent]:
+        '''
+        Get the next event, waiting until a key is pressed.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait. Waits forever if None.
+
+        Returns:
+            Optional[KeyEvent]: The event, or None if timed out or the end of input has been reached.
+        '''
+
+        deadline = None if timeout is None else monotonic() + timeout
+        while not self._events:
+            if self._at_eof():
+                self._flush()
+                break
+            if deadline is None:
+                self._fill(None)
+                continue
+            remaining = deadline - monotonic()
+            self._fill(max(remaining, 0))
+            if remaining <= 0:
+                break
+        return self._events.popleft() if self._events else None
+
+    def _started_input(self) -> Input:
+        assert self._input is not None and self._restore is not None, 'Poller is not started.'
+        return self._input
+
+    def _at_eof(self) -> bool:
+        return self._selectable and self._input.at_eof  # type: ignore[union-attr]
+
+    def _fill(self, timeout: Optional[float]) -> None:
+        '''Wait for input up to timeout, and parse it.'''
+
+        if self._flush_at is not None:
+            # Wake up to give up on the pending sequence in time.
+            wait = max(self._flush_at - monotonic(), 0)
+            timeout = wait if timeout is None else min(timeout, wait)
+
+        self._started_input().listen(self._on_input, timeout)
+
+        if self._flush_at is not None and monotonic() >= self._flush_at:
+            self._flush()
+
+    def _feed(self, keys: list[str]) -> None:
+        parser = self._parser
+        self._events.extend(parser.parse(''.join(keys), monotonic_ns()))
+        self._flush_at = monotonic() + _ESCAPE_TIMEOUT if parser.pending else None
+
+    def _flush(self) -> None:
+        self._flush_at = None
+        self._events.extend(self._parser.flush())
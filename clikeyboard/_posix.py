@@ -0,0 +1,184 @@
+import codecs
+import os
+import selectors
+import sys
+import termios
+import tty
+from typing import Callable, Optional
+
+from ._input import drain_fd, read_fd
+from ._modes import BRACKETED_PASTE_MODE, MOUSE_MODES, enable_private_modes
+
+
+def enable_raw_mode(fd: int) -> Callable[[], None]:
+    '''
+    Put the terminal into raw (cbreak-like) mode.
+
+    Echo, line buffering and CR to NL translation are disabled, while signal
+    keys (e.g. Ctrl+C) keep working as they do on Windows.
+
+    Args:
+        fd (int): A file descriptor of the terminal.
+
+    Returns:
+        Callable[[], None]: A callable that will restore terminal to previous state.
+    '''
+
+    if not os.isatty(fd):
+        return lambda: None
+
+    previous_mode = termios.tcgetattr(fd)
+
+    mode = termios.tcgetattr(fd)
+    mode[tty.IFLAG] &= ~(termios.ICRNL | termios.IXON)
+    mode[tty.LFLAG] &= ~(termios.ICANON | termios.ECHO | termios.IEXTEN)
+    mode[tty.CC][termios.VMIN] = 1
+    mode[tty.CC][termios.VTIME] = 0
+    termios.tcsetattr(fd, termios.TCSANOW, mode)
+
+    def restore() -> None:
+        '''Restore terminal mode to previous settings.'''
+
+        try:
+            termios.tcsetattr(fd, termios.TCSANOW, previous_mode)
+        except termios.error:
+            pass
+
+    return restore
+
+
+class PosixInput:
+    '''
+    Terminal input read from a file descriptor.
+
+    Waiting is done with selectors (epoll on Linux) on the input and on a
+    self-pipe, so an idle listener consumes no CPU and `wakeup` can interrupt
+    it immediately. They are created by `enable` and released by `close`, so
+    the input can be enabled again after it is closed.
+    '''
+
+    def __init__(self, fd: Optional[int] = None, mouse: bool = False, paste: bool = False) -> None:
+        '''
+        Args:
+            fd (Optional[int]): A file descriptor to read. Defaults to stdin.
+            mouse (bool): Whether to turn on mouse tracking of the terminal.
+            paste (bool): Whether to turn on bracketed paste mode of the terminal.
+        '''
+
+        self._fd: int = sys.stdin.fileno() if fd is None else fd
+        self._mouse = mouse
+        self._paste = paste
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._wakeup_reader = -1
+        self._wakeup_writer = -1
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._eof = False
+
+    @property
+    def at_eof(self) -> bool:
+        '''Whether the end of input has been reached.'''
+
+        return self._eof
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def enable(self) -> Callable[[], None]:
+        '''
+        Prepare the terminal for reading keys.
+
+        Returns:
+            Callable[[], None]: A callable that will restore terminal to previous state.
+        '''
+
+        if self._selector is None:
+            self._wakeup_reader, self._wakeup_writer = os.pipe()
+            os.set_blocking(self._wakeup_reader, False)
+            os.set_blocking(self._wakeup_writer, False)
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._wakeup_reader, selectors.EVENT_READ)
+            if not self._eof:
+                self._selector.register(self._fd, selectors.EVENT_READ)
+
+        restore_mode = enable_raw_mode(self._fd)
+
+        modes: list[int] = []
+        if self._mouse:
+            modes.extend(MOUSE_MODES)
+        if self._paste:
+            modes.append(BRACKETED_PASTE_MODE)
+        if not modes or not os.isatty(self._fd):
+            return restore_mode
+
+        # Written to the terminal being read, which may not be the one of stdout.
+        try:
+            restore_modes = enable_private_modes(self._fd, modes)
+        except OSError:
+            # Opened for reading only, so the terminal can't be asked to report them.
+            return restore_mode
+
+        def restore() -> None:
+            restore_modes()
+            restore_mode()
+
+        return restore
+
+    def listen(self, handler: Callable[[list[str]], None], timeout: Optional[float] = None) -> None:
+        '''
+        Wait until input arrives or `wakeup` is called, and pass read input to handler.
+        Call only while enabled.
+
+        Args:
+            handler (Callable[[list[str]], None]): A callable fired when key pressed.
+            timeout (Optional[float]): Maximum seconds to wait. Waits forever if None.
+        '''
+
+        assert self._selector is not None, 'Input is not enabled.'
+        for key, _ in self._selector.select(timeout):
+            if key.fd == self._wakeup_reader:
+                drain_fd(self._wakeup_reader)
+                continue
+
+            data = self.read()
+            if data:
+                handler([data])
+
+    def wakeup(self) -> None:
+        '''Interrupt a blocking `listen` call.'''
+
+        if self._selector is None:
+            return
+        try:
+            os.write(self._wakeup_writer, b'\0')
+        except BlockingIOError:
+            pass  # Pipe is full, so listen will wake up anyway.
+
+    def close(self) -> None:
+        if self._selector is None:
+            return
+        self._selector.close()
+        self._selector = None
+        os.close(self._wakeup_reader)
+        os.close(self._wakeup_writer)
+        self._wakeup_reader = self._wakeup_writer = -1
+
+    def read(self) -> str:
+        '''
+        Read available input without waiting. Call only when the file descriptor is readable.
+
+        Returns:
+            str: Read input. May be empty.
+        '''
+
+        data = read_fd(self._fd)
+        if not data:
+            self._on_eof()
+
+        return self._decoder.decode(data, final=not data)
+
+    def _on_eof(self) -> None:
+        # Stop watching the input, otherwise select would return immediately forever.
+        if not self._eof:
+            self._eof = True
+            if self._selector is not None:
+                self._selector.unregister(self._fd)
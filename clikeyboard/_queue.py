@@ -0,0 +1,224 @@
+from collections import deque
+from enum import Enum
+from threading import Condition, Lock
+from time import monotonic_ns
+from typing import Optional
+
+from .event import KeyEvent
+
+
+class OverflowPolicy(str, Enum):
+    '''What to do when an event is put on a full queue.'''
+
+    value: str
+
+    # Wait until the queue has room. No event is lost.
+    BLOCK = 'block'
+    # Discard the oldest queued event.
+    DROP_OLDEST = 'drop-oldest'
+    # Discard the new event.
+    DROP_NEWEST = 'drop-newest'
+    # Merge the new event into the last queued one if they have the same key
+    # (adding up `repeat`), otherwise wait.
+    COALESCE = 'coalesce'
+
+
+class QueueStats:
+    '''Counters of an event queue.'''
+
+    __slots__ = ('enqueued', 'dropped', 'coalesced', 'high_water')
+
+    def __init__(self, enqueued: int = 0, dropped: int = 0, coalesced: int = 0, high_water: int = 0) -> None:
+        '''
+        Args:
+            enqueued (int): Number of events put on the queue.
+            dropped (int): Number of events discarded by DROP_OLDEST or DROP_NEWEST.
+            coalesced (int): Number of events merged by COALESCE.
+            high_water (int): Largest number of events queued at once.
+        '''
+
+        self.enqueued = enqueued
+        self.dropped = dropped
+        self.coalesced = coalesced
+        self.high_water = high_water
+
+    def __repr__(self) -> str:
+        return (
+            f'QueueStats(enqueued={self.enqueued}, dropped={self.dropped}, '
+            f'coalesced={self.coalesced}, high_water={self.high_water})'
+        )
+
+
+class EventQueue:
+    '''
+    FIFO queue of event batches with an optional capacity.
+
+    Each batch holds the events parsed from one read, so a read costs one queue
+    operation. Capacity and counters are measured in events. Batches are stamped
+    with `time.monotonic_ns()` when queued.
+    '''
+
+    def __init__(self, maxsize: int = 0, overflow: OverflowPolicy = OverflowPolicy.BLOCK) -> None:
+        '''
+        Args:
+            maxsize (int): Maximum number of queued events. Unbounded if 0 or less.
+            overflow (OverflowPolicy): What to do when the queue is full.
+        '''
+
+        self._batches: deque[tuple[list[KeyEvent], int]] = deque()
+        self._size = 0
+        self._maxsize = maxsize
+        self._overflow = overflow
+        self._lock = Lock()
+        self._not_empty = Condition(self._lock)
+        self._not_full = Condition(self._lock)
+        self._stats = QueueStats()
+        self._closed = False
+
+    @property
+    def stats(self) -> QueueStats:
+        '''A snapshot of counters.'''
+
+        with self._lock:
+            stats = self._stats
+            return QueueStats(stats.enqueued, stats.dropped, stats.coalesced, stats.high_water)
+
+    def put(self, events: list[KeyEvent]) -> None:
+        '''
+        Queue events as a batch.
+
+        Args:
+            events (list[KeyEvent]): Events parsed from one read.
+        '''
+
+        with self._lock:
+            if self._closed:
+                return
+            if 0 < self._maxsize < self._size + len(events):
+                events = self._make_room(events)
+            if events and not self._closed:
+                self._append(events)
+
+    def get(self, timeout: Optional[float] = None) -> Optional[tuple[list[KeyEvent], int]]:
+        '''
+        Remove and return the oldest batch, waiting until one is available.
+
+        Args:
+            timeout (Optional[float]): Maximum seconds to wait. Waits forever if None.
+
+        Returns:
+            Optional[tuple[list[KeyEvent], int]]: Events and `time.monotonic_ns()` when they were queued,
+                or None if timed out or closed.
+        '''
+
+        with self._lock:
+            if not self._batches and not self._not_empty.wait_for(lambda: self._batches or self._closed, timeout):
+                return None
+            if self._closed:
+                return None
+
+            batch = self._batches.popleft()
+            self._size -= len(batch[0])
+            self._not_full.notify()
+            return batch
+
+    def close(self) -> None:
+        '''Discard queued events, and wake up and return from all waiting calls.'''
+
+        with self._lock:
+            self._closed = True
+            self._batches.clear()
+            self._size = 0
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def open(self) -> None:
+        '''Accept events again after `close`.'''
+
+        with self._lock:
+            self._closed = False
+
+    def _append(self, events: list[KeyEvent]) -> None:
+        self._batches.append((events, monotonic_ns()))
+        self._size += len(events)
+
+        stats = self._stats
+        stats.enqueued += len(events)
+        if self._size > stats.high_water:
+            stats.high_water = self._size
+
+        self._not_empty.notify()
+
+    def _make_room(self, events: list[KeyEvent]) -> list[KeyEvent]:
+        '''
+        Apply overflow policy to a queue which cannot hold all events.
+
+        Returns:
+            list[KeyEvent]: Events which should still be queued.
+        '''
+
+        overflow = self._overflow
+        maxsize = self._maxsize
+
+        if overflow is OverflowPolicy.DROP_OLDEST:
+            if len(events) > maxsize:
+                self._stats.dropped += len(events) - maxsize
+                events = events[-maxsize:]
+            self._drop_oldest(self._size + len(events) - maxsize)
+            return events
+
+        if overflow is OverflowPolicy.DROP_NEWEST:
+            room = maxsize - self._size
+            self._stats.dropped += len(events) - room
+            return events[:room]
+
+        if overflow is OverflowPolicy.COALESCE:
+            events = self._coalesce(events)
+
+        # Queue what fits, and wait until handlers make room for the rest.
+        while self._size + len(events) > maxsize and not self._closed:
+            room = maxsize - self._size
+            if room > 0:
+                self._append(events[:room])
+                events = events[room:]
+            self._not_full.wait()
+        return events
+
+    def _drop_oldest(self, count: int) -> None:
+        while count > 0:
+            oldest, queued_at = self._batches[0]
+            if len(oldest) <= count:
+                self._batches.popleft()
+                dropped = len(oldest)
+            else:
+                self._batches[0] = (oldest[count:], queued_at)
+                dropped = count
+
+            self._size -= dropped
+            self._stats.dropped += dropped
+            count -= dropped
+
+    def _coalesce(self, events: list[KeyEvent]) -> list[KeyEvent]:
+        '''Merge leading events with the same key as the last queued event into it.'''
+
+        if not self._batches:
+            return events
+
+        batch = self._batches[-1][0]
+        last = batch[-1]
+        repeat = last.repeat
+
+        merged = 0
+        if type(last) is not KeyEvent:
+            return events
+
+        for event in events:
+            if event.key != last.key or type(event) is not KeyEvent:
+                break
+            repeat += event.repeat
+            merged += 1
+
+        if merged:
+            batch[-1] = KeyEvent(last.key, repeat, last.timestamp)
+            self._stats.coalesced += merged
+        return events[merged:]
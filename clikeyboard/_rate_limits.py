@@ -0,0 +1,269 @@
+from enum import Enum
+from heapq import heappop, heappush
+from itertools import count
+from time import monotonic
+from typing import Any, Callable, Optional
+
+from .event import KeyEvent
+from ._executors import Handler, Worker
+
+# Invokes a handler on the dispatching thread, reporting its exception like dispatch does.
+Invoke = Callable[[Handler, KeyEvent], None]
+
+
+class RateLimitPolicy(str, Enum):
+    '''How often a rate limited handler is invoked.'''
+
+    value: str
+
+    # Once keys stop for the interval, with the last event.
+    DEBOUNCE = 'debounce'
+    # With the first event after keys have stopped for the interval. Later events are dropped.
+    DEBOUNCE_LEADING = 'debounce_leading'
+    # At most once per interval. The last event dropped in an interval is delivered at its end.
+    THROTTLE = 'throttle'
+    # With the newest event only. Events dispatched together, or waiting for a busy
+    # pool or serial handler, are replaced by the newest one. The interval is unused.
+    LATEST = 'latest'
+
+
+class RateLimit:
+    '''Rate limit of a handler.'''
+
+    __slots__ = ('_policy', '_interval')
+
+    def __init__(self, policy: RateLimitPolicy, interval: float = 0.0) -> None:
+        '''
+        Args:
+            policy (RateLimitPolicy): How often the handler is invoked.
+            interval (float): Seconds of the policy.
+
+        Raises:
+            ValueError: If interval is negative, or not positive for a policy which uses it.
+        '''
+
+        if interval < 0 or (interval == 0 and policy is not RateLimitPolicy.LATEST):
+            raise ValueError(f'Interval of {policy.value} must be positive, not {interval}.')
+        self._policy = policy
+        self._interval = interval
+
+    @property
+    def policy(self) -> RateLimitPolicy:
+        return self._policy
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def __repr__(self) -> str:
+        return f'RateLimit({self._policy.value}, interval={self._interval})'
+
+
+class RateLimitStats:
+    '''Events received by a rate limited handler, and those it wasn't invoked with.'''
+
+    __slots__ = ('received', 'suppressed')
+
+    def __init__(self, received: int = 0, suppressed: int = 0) -> None:
+        '''
+        Args:
+            received (int): Number of events dispatched to the handler.
+            suppressed (int): Number of them dropped or replaced by a later one.
+        '''
+
+        self.received = received
+        self.suppressed = suppressed
+
+    @property
+    def invoked(self) -> int:
+        '''Number of events the handler has been (or is about to be) invoked with.'''
+
+        return self.received - self.suppressed
+
+    def __repr__(self) -> str:
+        return f'RateLimitStats(received={self.received}, suppressed={self.suppressed})'
+
+
+def _read_at(event: KeyEvent) -> float:
+    '''`time.monotonic()` when the input of event was read, or now if unknown.'''
+
+    return monotonic() if event.timestamp is None else event.timestamp / 1e9
+
+
+class Timers:
+    '''
+    Deadlines of rate limiters of a listener, shared in one heap.
+
+    Used from the dispatching thread only, which runs due timers through the
+    same hook as sequence timeouts, so no timer thread is needed. A limiter has
+    at most one live deadline, and an entry replaced by a later one is skipped.
+    '''
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, RateLimiter]] = []
+        # Breaks ties, as limiters aren't ordered.
+        self._counter = count()
+
+    @property
+    def deadline(self) -> Optional[float]:
+        '''`time.monotonic()` of the earliest timer, or None.'''
+
+        heap = self._heap
+        while heap and heap[0][2]._due != heap[0][0]:
+            heappop(heap)
+        return heap[0][0] if heap else None
+
+    def schedule(self, limiter: 'RateLimiter', due: float) -> None:
+        limiter._due = due
+        heappush(self._heap, (due, next(self._counter), limiter))
+
+    def expire(self, now: float) -> None:
+        '''Run timers due by now.'''
+
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            due, _, limiter = heappop(heap)
+            if limiter._due == due:
+                limiter._due = None
+                limiter._expire(now)
+
+
+class RateLimiter:
+    '''
+    Handler invoked according to a rate limit.
+
+    The handler is invoked through `invoke`, which reports its outcome, so the
+    limiter itself never raises. It compares equal to the wrapped handler, so it
+    can be removed like one. Each policy is a subclass, created by `limit`.
+    Intervals are measured from `KeyEvent.timestamp` when events have one.
+    '''
+
+    __slots__ = ('handler', '_interval', '_stats', '_timers', '_invoke', '_pending', '_last', '_due', '_closed')
+
+    def __init__(self, handler: Handler, interval: float, stats: RateLimitStats, timers: Timers, invoke: Invoke) -> None:
+        self.handler = handler
+        self._interval = interval
+        self._stats = stats
+        self._timers = timers
+        self._invoke = invoke
+        # Event to invoke handler with when the timer expires.
+        self._pending: Optional[KeyEvent] = None
+        # `time.monotonic()` when the last event was read for debounce, or of the last invocation for throttle.
+        self._last: Optional[float] = None
+        self._due: Optional[float] = None
+        self._closed = False
+
+    def __call__(self, event: KeyEvent) -> None:
+        raise NotImplementedError()
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, RateLimiter):
+            return self is other
+        return bool(self.handler == other)
+
+    def __hash__(self) -> int:
+        return hash(self.handler)
+
+    def close(self) -> None:
+        '''Drop the pending event, and close the wrapped worker.'''
+
+        self._closed = True
+        self._pending = None
+        if isinstance(self.handler, Worker):
+            self.handler.close()
+
+    def _replace_pending(self, event: KeyEvent) -> None:
+        if self._pending is not None:
+            self._stats.suppressed += 1
+        self._pending = event
+
+    def _expire(self, now: float) -> None:
+        event = self._pending
+        self._pending = None
+        if event is not None and not self._closed:
+            self._invoke(self.handler, event)
+
+
+class _Debounce(RateLimiter):
+    __slots__ = ()
+
+    def __call__(self, event: KeyEvent) -> None:
+        self._stats.received += 1
+        self._replace_pending(event)
+        self._timers.schedule(self, _read_at(event) + self._interval)
+
+
+class _LeadingDebounce(RateLimiter):
+    __slots__ = ()
+
+    def __call__(self, event: KeyEvent) -> None:
+        self._stats.received += 1
+        now = _read_at(event)
+        last = self._last
+        self._last = now
+        if last is None or now - last >= self._interval:
+            self._invoke(self.handler, event)
+        else:
+            self._stats.suppressed += 1
+
+
+class _Throttle(RateLimiter):
+    __slots__ = ()
+
+    def __call__(self, event: KeyEvent) -> None:
+        self._stats.received += 1
+        if self._due is not None:
+            # Already waiting for the end of the interval.
+            self._replace_pending(event)
+            return
+
+        now = _read_at(event)
+        last = self._last
+        if last is None or now - last >= self._interval:
+            self._last = now
+            self._invoke(self.handler, event)
+            return
+        self._pending = event
+        self._timers.schedule(self, last + self._interval)
+
+    def _expire(self, now: float) -> None:
+        if self._pending is not None:
+            self._last = now
+        super()._expire(now)
+
+
+class _Latest(RateLimiter):
+    __slots__ = ()
+
+    def __call__(self, event: KeyEvent) -> None:
+        self._stats.received += 1
+        self._replace_pending(event)
+        if self._due is None:
+            # Due at once, so it runs when dispatch of the events at hand is done.
+            self._timers.schedule(self, _read_at(event))
+
+
+_LIMITERS: dict[RateLimitPolicy, type[RateLimiter]] = {
+    RateLimitPolicy.DEBOUNCE: _Debounce,
+    RateLimitPolicy.DEBOUNCE_LEADING: _LeadingDebounce,
+    RateLimitPolicy.THROTTLE: _Throttle,
+    RateLimitPolicy.LATEST: _Latest
+}
+
+
+def limit(handler: Handler, rate_limit: RateLimit, stats: RateLimitStats, timers: Timers, invoke: Invoke) -> RateLimiter:
+    '''
+    Wrap handler with a rate limiter.
+
+    Args:
+        handler (Handler): Handler to invoke, which may be a worker.
+        rate_limit (RateLimit): How often to invoke it.
+        stats (RateLimitStats): Where to count events.
+        timers (Timers): Timers of the dispatching thread.
+        invoke (Invoke): Invokes handler on the dispatching thread.
+
+    Returns:
+        RateLimiter: The limiter.
+    '''
+
+    return _LIMITERS[rate_limit.policy](handler, rate_limit.interval, stats, timers, invoke)
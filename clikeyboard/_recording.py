@@ -0,0 +1,253 @@
+'''
+Record and replay raw terminal input.
+
+A recording is a header followed by one record per read:
+
+    header:  b'CKBREC' version(1 byte)
+    record:  delay(varint) size(varint) data(size bytes)
+
+`delay` is nanoseconds since the previous record (or since recording started),
+`data` is the read input encoded in UTF-8, and varints are unsigned LEB128.
+'''
+
+from threading import Event
+from time import monotonic_ns, sleep
+from typing import BinaryIO, Callable, Iterator, Optional
+
+from ._handlers import Registry
+from ._parser import Parser
+
+
+_MAGIC = b'CKBREC'
+_VERSION = 1
+
+
+def _write_varint(file: BinaryIO, value: int) -> None:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    file.write(out)
+
+
+def _read_varint(file: BinaryIO) -> Optional[int]:
+    '''Returns None at the end of file.'''
+
+    value = 0
+    shift = 0
+    while True:
+        byte = file.read(1)
+        if not byte:
+            if shift:
+                raise ValueError('Truncated recording.')
+            return None
+        value |= (byte[0] & 0x7f) << shift
+        if byte[0] < 0x80:
+            return value
+        shift += 7
+
+
+class Recorder:
+    '''Writer of raw input read by a listener.'''
+
+    def __init__(self, file: BinaryIO) -> None:
+        '''
+        Args:
+            file (BinaryIO): A file opened for binary writing.
+        '''
+
+        self._file = file
+        self._last_timestamp = monotonic_ns()
+        file.write(_MAGIC + bytes([_VERSION]))
+
+    def __enter__(self) -> 'Recorder':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def record(self, data: str, timestamp: int) -> None:
+        '''
+        Append a read.
+
+        Args:
+            data (str): Read input.
+            timestamp (int): `time.monotonic_ns()` when data was read.
+        '''
+
+        encoded = data.encode('utf-8', 'surrogatepass')
+        _write_varint(self._file, max(timestamp - self._last_timestamp, 0))
+        _write_varint(self._file, len(encoded))
+        self._file.write(encoded)
+        self._last_timestamp = timestamp
+
+    def close(self) -> None:
+        self._file.flush()
+
+
+def read_recording(file: BinaryIO) -> Iterator[tuple[int, str]]:
+    '''
+    Read records.
+
+    Args:
+        file (BinaryIO): A file opened for binary reading.
+
+    Yields:
+        tuple[int, str]: Delay in nanoseconds since the previous record, and read input.
+    '''
+
+    header = file.read(len(_MAGIC) + 1)
+    if header[:len(_MAGIC)] != _MAGIC:
+        raise ValueError('Not a recording.')
+    if header[len(_MAGIC)] != _VERSION:
+        raise ValueError(f'Unsupported recording version {header[len(_MAGIC)]}.')
+
+    while True:
+        delay = _read_varint(file)
+        if delay is None:
+            return
+        size = _read_varint(file)
+        if size is None:
+            raise ValueError('Truncated recording.')
+        data = file.read(size)
+        if len(data) != size:
+            raise ValueError('Truncated recording.')
+        yield delay, data.decode('utf-8', 'surrogatepass')
+
+
+class ReplayInput:
+    '''
+    Input replaying a recording, to drive a listener with recorded input.
+
+    Delays between reads are divided by speed. After the last record, `listen`
+    only waits for `wakeup`.
+    '''
+
+    def __init__(self, file: BinaryIO, speed: Optional[float] = 1.0) -> None:
+        '''
+        Args:
+            file (BinaryIO): A recording opened for binary reading.
+            speed (Optional[float]): 1.0 replays in real time, 2.0 twice as fast.
+                None replays as fast as possible.
+        '''
+
+        self._records = read_recording(file)
+        self._speed = speed
+        self._wakeup = Event()
+        self._next: Optional[tuple[int, str]] = next(self._records, None)
+        # Replay is scheduled from the first listen call.
+        self._due: Optional[int] = None
+
+    @property
+    def at_eof(self) -> bool:
+        '''Whether all records have been replayed.'''
+
+        return self._next is None
+
+    def enable(self) -> Callable[[], None]:
+        return lambda: None
+
+    def listen(self, handler: Callable[[list[str]], None], timeout: Optional[float] = None) -> None:
+        '''
+        Wait until the next record is due or `wakeup` is called, and pass the record to handler.
+
+        Args:
+            handler (Callable[[list[str]], None]): A callable fired when key pressed.
+            timeout (Optional[float]): Maximum seconds to wait. Waits forever if None.
+        '''
+
+        if self._next is None:
+            self._wait(timeout)
+            return
+
+        if self._due is None:
+            self._due = monotonic_ns() + self._scale(self._next[0])
+
+        delay = (self._due - monotonic_ns()) / 1e9
+        if delay > 0:
+            if self._wait(delay if timeout is None else min(delay, timeout)) or monotonic_ns() < self._due:
+                return
+
+        data = self._next[1]
+        self._next = next(self._records, None)
+        if self._next is not None:
+            self._due += self._scale(self._next[0])
+        handler([data])
+
+    def wakeup(self) -> None:
+        '''Interrupt a blocking `listen` call.'''
+
+        self._wakeup.set()
+
+    def close(self) -> None:
+        pass
+
+    def _wait(self, timeout: Optional[float]) -> bool:
+        woken = self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        return woken
+
+    def _scale(self, delay: int) -> int:
+        return 0 if self._speed is None else int(delay / self._speed)
+
+
+def replay(file: BinaryIO, registry: Registry, speed: Optional[float] = None) -> int:
+    '''
+    Parse a recording and dispatch the events to handlers on the calling thread.
+
+    As fast as possible, this measures throughput of a handler set. Events are
+    stamped with their recorded read times (divided by speed), and timers of
+    sequences and rate limits run at those times, so handlers see the same gaps
+    between keys at any speed.
+
+    Args:
+        file (BinaryIO): A recording opened for binary reading.
+        registry (Registry): Listener whose handlers receive events.
+        speed (Optional[float]): 1.0 replays in real time, 2.0 twice as fast.
+            None replays as fast as possible.
+
+    Returns:
+        int: Number of dispatched events.
+    '''
+
+    parser = Parser()
+    dispatch = registry._dispatch
+    count = 0
+    scale = 1.0 if speed is None else speed
+    read_at = monotonic_ns()
+
+    for delay, data in read_recording(file):
+        read_at += int(delay / scale)
+        if speed is not None:
+            _sleep_until(read_at)
+        _run_timers(registry, read_at / 1e9, speed)
+
+        events = list(parser.parse(data, read_at))
+        if events:
+            dispatch(events)
+            count += len(events)
+
+    events = list(parser.flush())
+    if events:
+        dispatch(events)
+        count += len(events)
+    _run_timers(registry, None, speed)
+    return count
+
+
+def _run_timers(registry: Registry, now: Optional[float], speed: Optional[float]) -> None:
+    '''Run timers of registry due by now, or all of them if None, each at its deadline.'''
+
+    deadline = registry._next_deadline()
+    while deadline is not None and (now is None or deadline <= now):
+        if speed is not None:
+            _sleep_until(int(deadline * 1e9))
+        registry._expire(deadline)
+        deadline = registry._next_deadline()
+
+
+def _sleep_until(timestamp: int) -> None:
+    wait = timestamp - monotonic_ns()
+    if wait > 0:
+        sleep(wait / 1e9)
@@ -0,0 +1,414 @@
+'''
+Shared-memory ring buffer delivering key events to other processes.
+
+The buffer is a header followed by fixed-size slots:
+
+    header:  b'CKBRING' version(1 byte) capacity(u32) slot_size(u32) written(u64)
+    slot:    sequence(u64) timestamp(i64) source(i64) repeat(u32) kind(u8) flags(u8)
+             key_id(u16) size(u16) payload(size bytes)
+
+`written` is the number of events published so far, and `sequence` is the
+number of the event in the slot plus one (0 while it is being written).
+`key_id` is the id of the key from `intern_key` plus one if it is pinned (the
+same in every process), or 0 if the key is the UTF-8 text in payload. Mouse
+events keep their position and button in payload, and pastes are split into
+slots, the last of which has the LAST flag.
+'''
+
+import struct
+import sys
+from threading import Event, Lock, Thread
+from time import monotonic, sleep
+from typing import TYPE_CHECKING, Optional, Sequence
+
+from .event import KeyEvent, MouseAction, MouseButton, MouseEvent, PasteEvent
+from .keys import Modifiers
+from ._handlers import ErrorHook, Registry, report_error
+from ._instrumentation import Instrumentation
+from ._interning import PINNED_KEY_IDS, intern_key, key_from_id
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+
+_MAGIC = b'CKBRING'
+_VERSION = 2
+
+_HEADER = struct.Struct('<7sBIIQ')
+_WRITTEN = struct.Struct('<Q')
+_WRITTEN_OFFSET = 16
+_HEADER_SIZE = 64
+
+_SLOT_HEADER = struct.Struct('<QqqIBBHH')
+_SLOT_SIZE = 128
+_PAYLOAD_SIZE = _SLOT_SIZE - _SLOT_HEADER.size
+_SLOT = struct.Struct(f'<QqqIBBHH{_PAYLOAD_SIZE}s')
+_SEQUENCE = struct.Struct('<Q')
+# Positions are signed, as events made by hand may be outside the window.
+_MOUSE = struct.Struct('<iiBBB')
+
+_KIND_KEY = 0
+_KIND_MOUSE = 1
+_KIND_PASTE = 2
+
+_HAS_TIMESTAMP = 0x01
+_HAS_SOURCE = 0x02
+# The last slot of an event.
+_LAST = 0x04
+_FINAL = 0x08
+_TRUNCATED = 0x10
+
+_BUTTONS: tuple[MouseButton, ...] = tuple(MouseButton)
+_BUTTON_IDS = {button: i for i, button in enumerate(_BUTTONS)}
+_ACTIONS: tuple[MouseAction, ...] = tuple(MouseAction)
+_ACTION_IDS = {action: i for i, action in enumerate(_ACTIONS)}
+
+
+def _attach(name: str) -> 'SharedMemory':
+    '''Open existing shared memory without taking over its lifetime.'''
+
+    from multiprocessing import resource_tracker
+    from multiprocessing.shared_memory import SharedMemory
+
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name, track=False)  # type: ignore[call-arg]
+
+    # Before Python 3.13, opening registers the memory with the resource tracker,
+    # which unlinks it when the tracker exits. A tracker inherited from the creator
+    # (e.g. by a multiprocessing child) is shared with it, so that is harmless, but
+    # a tracker started for this process must forget the memory.
+    own_tracker = getattr(resource_tracker._resource_tracker, '_fd', None) is None  # type: ignore[attr-defined]
+    memory = SharedMemory(name)
+    if own_tracker and sys.platform != 'win32':
+        resource_tracker.unregister(memory._name, 'shared_memory')  # type: ignore[attr-defined]
+    return memory
+
+
+def _character_end(data: bytes) -> int:
+    '''Length of the longest prefix of UTF-8 data fitting in a slot, not splitting characters.'''
+
+    if len(data) <= _PAYLOAD_SIZE:
+        return len(data)
+    end = _PAYLOAD_SIZE
+    # Back off to the start of a character.
+    while data[end] & 0xc0 == 0x80:
+        end -= 1
+    return end
+
+
+def _split_paste(text: str) -> list[bytes]:
+    '''Encode text in chunks fitting in a slot, not splitting characters.'''
+
+    data = text.encode('utf-8', 'surrogatepass')
+    chunks: list[bytes] = []
+    while len(data) > _PAYLOAD_SIZE:
+        end = _character_end(data)
+        chunks.append(data[:end])
+        data = data[end:]
+    chunks.append(data)
+    return chunks
+
+
+class EventRing:
+    '''
+    Producer side of a shared-memory ring buffer of key events.
+
+    Events are packed into fixed-size slots instead of being pickled, and the
+    producer never waits for consumers: when they fall behind by more than the
+    capacity, the oldest events are overwritten and counted as dropped by them.
+    Every consumer receives every event.
+
+    Publishing is not synchronized, so events must be put from one thread,
+    e.g. as a batch handler of a listener.
+    '''
+
+    def __init__(self, capacity: int = 4096, name: Optional[str] = None) -> None:
+        '''
+        Args:
+            capacity (int): Number of slots.
+            name (Optional[str]): Name of the shared memory. Generated if None.
+        '''
+
+        from multiprocessing.shared_memory import SharedMemory
+
+        if capacity <= 0:
+            raise ValueError('Capacity must be positive.')
+
+        self._capacity = capacity
+        self._memory = SharedMemory(name, create=True, size=_HEADER_SIZE + capacity * _SLOT_SIZE)
+        self._buffer = self._memory.buf
+        _HEADER.pack_into(self._buffer, 0, _MAGIC, _VERSION, capacity, _SLOT_SIZE, 0)
+        self._written = 0
+
+    @property
+    def name(self) -> str:
+        '''Name of the shared memory, passed to `RingConsumer` in other processes.'''
+
+        return self._memory.name
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def put(self, events: Sequence[KeyEvent]) -> None:
+        '''
+        Publish events. Can be added to a listener as a batch handler.
+
+        Args:
+            events (Sequence[KeyEvent]): Events to publish.
+        '''
+
+        buffer = self._buffer
+        capacity = self._capacity
+        written = self._written
+        pack_slot = _SLOT.pack_into
+        pack_sequence = _SEQUENCE.pack_into
+
+        for event in events:
+            timestamp = event.timestamp
+            source = event.source
+            flags = _LAST
+            if timestamp is None:
+                timestamp = 0
+            else:
+                flags |= _HAS_TIMESTAMP
+            if type(source) is int:
+                flags |= _HAS_SOURCE
+            else:
+                source = 0
+
+            if type(event) is not KeyEvent:
+                written = self._put_slots(event, written, timestamp, source, flags)
+                continue
+
+            key = event.key
+            # Keys with pinned ids are sent without payload.
+            key_id = intern_key(key) + 1
+            if 0 < key_id <= PINNED_KEY_IDS:
+                payload = b''
+            else:
+                key_id = 0
+                # A key longer than a slot is truncated.
+                payload = key.encode('utf-8', 'surrogatepass')
+                payload = payload[:_character_end(payload)]
+            offset = _HEADER_SIZE + written % capacity * _SLOT_SIZE
+            written += 1
+            # The sequence is 0 until the whole slot has been written.
+            pack_slot(buffer, offset, 0, timestamp, source, event.repeat, _KIND_KEY, flags, key_id, len(payload), payload)
+            pack_sequence(buffer, offset, written)
+
+        self._written = written
+        _WRITTEN.pack_into(buffer, _WRITTEN_OFFSET, written)
+
+    def _put_slots(self, event: KeyEvent, written: int, timestamp: int, source: int, flags: int) -> int:
+        '''Write a mouse or paste event, and return the number of slots written in total.'''
+
+        if isinstance(event, MouseEvent):
+            chunks = [_MOUSE.pack(event.x, event.y, _BUTTON_IDS[event.button], _ACTION_IDS[event.action], event.modifiers)]
+            kind = _KIND_MOUSE
+        elif isinstance(event, PasteEvent):
+            chunks = _split_paste(event.text)
+            kind = _KIND_PASTE
+            if event.final:
+                flags |= _FINAL
+            if event.truncated:
+                flags |= _TRUNCATED
+        else:
+            raise TypeError(f'Unsupported event: {event!r}')
+
+        last = len(chunks) - 1
+        for i, payload in enumerate(chunks):
+            offset = _HEADER_SIZE + written % self._capacity * _SLOT_SIZE
+            written += 1
+            _SLOT.pack_into(
+                self._buffer, offset, 0, timestamp, source, 1, kind,
+                flags if i == last else flags & ~_LAST, 0, len(payload), payload
+            )
+            _SEQUENCE.pack_into(self._buffer, offset, written)
+        return written
+
+    def close(self) -> None:
+        '''Stop publishing and release the shared memory. Consumers keep their mappings.'''
+
+        self._buffer.release()
+        self._memory.close()
+        self._memory.unlink()
+
+
+class RingConsumer(Registry):
+    '''
+    Consumer side of `EventRing`, in any process, with the handler API of a listener.
+
+    Shared memory has no portable way to wake another process, so the consumer
+    polls it, sleeping for the poll interval while it is empty.
+    '''
+
+    def __init__(
+        self,
+        name: str,
+        poll_interval: float = 0.001,
+        instrumentation: Optional[Instrumentation] = None,
+        on_error: ErrorHook = report_error,
+        max_failures: Optional[int] = None
+    ) -> None:
+        '''
+        Args:
+            name (str): Name of the shared memory of the ring.
+            poll_interval (float): Seconds to sleep while no event is available.
+            instrumentation (Optional[Instrumentation]): Where to record latency. Disabled if None.
+            on_error (ErrorHook): Called with exceptions raised by handlers.
+                Reports them like uncaught ones by default.
+            max_failures (Optional[int]): Remove a handler once it raises this many times in a row. Disabled if None.
+        '''
+
+        super().__init__(instrumentation, on_error, max_failures)
+        self._memory = _attach(name)
+        self._buffer = self._memory.buf
+        magic, version, capacity, slot_size, written = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or version != _VERSION or slot_size != _SLOT_SIZE:
+            self._memory.close()
+            raise ValueError(f'{name} is not a ring of key events.')
+
+        self._capacity: int = capacity
+        # Events published before the consumer attached are not delivered.
+        self._read: int = written
+        self._dropped = 0
+        self._paste: list[bytes] = []
+        self._poll_interval = poll_interval
+        self._lock = Lock()
+        self._running = False
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def dropped(self) -> int:
+        '''Number of slots overwritten before they were read.'''
+
+        return self._dropped
+
+    def start(self) -> None:
+        '''Start consumer if it hasn't started.'''
+
+        with self._lock:
+            if self._running:
+                return
+
+            self._running = True
+            self._stop_event.clear()
+            self._thread = Thread(target=self._process)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self) -> None:
+        '''Stop running consumer.'''
+
+        with self._lock:
+            if not self._running:
+                return
+
+            self._running = False
+            self._stop_event.set()
+            if self._thread is not None:
+                self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        '''Stop consumer, release threads of its handlers and detach from the shared memory.'''
+
+        self.stop()
+        self._close()
+        self._buffer.release()
+        self._memory.close()
+
+    def poll(self) -> int:
+        '''
+        Dispatch events published since the last call, without waiting.
+
+        Returns:
+            int: Number of dispatched events.
+        '''
+
+        events = self._take()
+        if events:
+            self._dispatch(events)
+        return len(events)
+
+    def _process(self) -> None:
+        while not self._stop_event.is_set():
+            if not self.poll():
+                deadline = self._next_deadline()
+                timeout = self._poll_interval
+                if deadline is not None:
+                    timeout = min(timeout, max(deadline - monotonic(), 0))
+                sleep(timeout)
+            if self._next_deadline() is not None:
+                self._expire(monotonic())
+
+    def _take(self) -> list[KeyEvent]:
+        buffer = self._buffer
+        capacity = self._capacity
+        written: int = _WRITTEN.unpack_from(buffer, _WRITTEN_OFFSET)[0]
+        read = self._read
+        if written - read > capacity:
+            self._lose(written - capacity - read)
+            read = written - capacity
+
+        unpack_slot = _SLOT_HEADER.unpack_from
+        unpack_sequence = _SEQUENCE.unpack_from
+        events: list[KeyEvent] = []
+        append = events.append
+        while read < written:
+            offset = _HEADER_SIZE + read % capacity * _SLOT_SIZE
+            sequence, timestamp, source, repeat, kind, flags, key_id, size = unpack_slot(buffer, offset)
+            if key_id:
+                payload = None
+            else:
+                start = offset + _SLOT_HEADER.size
+                payload = bytes(buffer[start:start + size])
+            if sequence != read + 1 or unpack_sequence(buffer, offset)[0] != sequence:
+                # Overwritten while being read, so skip to the oldest event still there.
+                latest: int = _WRITTEN.unpack_from(buffer, _WRITTEN_OFFSET)[0]
+                oldest = max(latest - capacity + 1, read + 1)
+                self._lose(oldest - read)
+                read = oldest
+                written = max(written, latest)
+                continue
+
+            read += 1
+            if kind == _KIND_KEY:
+                event: Optional[KeyEvent] = KeyEvent(
+                    key_from_id(key_id - 1) if payload is None else payload.decode('utf-8', 'surrogatepass'),
+                    repeat,
+                    timestamp if flags & _HAS_TIMESTAMP else None
+                )
+            else:
+                event = self._decode(timestamp, kind, flags, payload or b'')
+                if event is None:
+                    continue
+            if flags & _HAS_SOURCE:
+                event._source = source  # type: ignore[union-attr]
+            append(event)  # type: ignore[arg-type]
+
+        self._read = read
+        return events
+
+    def _decode(self, timestamp: int, kind: int, flags: int, payload: bytes) -> Optional[KeyEvent]:
+        '''Decode a mouse event, or a paste once its last slot is read.'''
+
+        event_timestamp = timestamp if flags & _HAS_TIMESTAMP else None
+
+        if kind == _KIND_MOUSE:
+            x, y, button, action, modifiers = _MOUSE.unpack(payload)
+            return MouseEvent(x, y, _BUTTONS[button], _ACTIONS[action], Modifiers(modifiers), event_timestamp)
+
+        self._paste.append(payload)
+        if not flags & _LAST:
+            return None
+        text = b''.join(self._paste).decode('utf-8', 'surrogatepass')
+        self._paste = []
+        return PasteEvent(text, bool(flags & _FINAL), bool(flags & _TRUNCATED), event_timestamp)
+
+    def _lose(self, count: int) -> None:
+        self._dropped += count
+        # A paste missing some chunks can't be delivered.
+        self._paste = []
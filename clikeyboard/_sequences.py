@@ -0,0 +1,211 @@
+from time import monotonic
+from typing import Callable, Optional, Sequence, Union
+
+from .event import KeyEvent
+from ._executors import Handler
+
+
+# Seconds allowed between keys of a sequence by default.
+DEFAULT_SEQUENCE_TIMEOUT = 1.0
+
+Fire = Callable[[tuple[Handler, ...], KeyEvent], None]
+
+
+def split_keys(keys: Union[str, Sequence[str]]) -> tuple[str, ...]:
+    '''
+    Normalize keys of a sequence binding.
+
+    Args:
+        keys (Union[str, Sequence[str]]): Keys separated by spaces (e.g. 'ctrl+x ctrl+s'), or a sequence of keys.
+
+    Returns:
+        tuple[str, ...]: Keys.
+    '''
+
+    result = tuple(keys.split()) if isinstance(keys, str) else tuple(keys)
+    if not result:
+        raise ValueError('A key sequence needs at least one key.')
+    return result
+
+
+class SequenceNode:
+    '''
+    Immutable node of a prefix tree of key sequences.
+
+    Registration copies the nodes on the path it changes, so a published tree is
+    never modified and can be walked without locking.
+    '''
+
+    __slots__ = ('children', 'bindings', 'handlers', 'min_timeout', 'max_timeout', 'wait')
+
+    def __init__(self, children: dict[str, 'SequenceNode'], bindings: tuple[tuple[Handler, float], ...]) -> None:
+        '''
+        Args:
+            children (dict[str, SequenceNode]): Nodes of the next keys.
+            bindings (tuple[tuple[Handler, float], ...]): Handlers of sequences ending here, with their timeouts.
+        '''
+
+        self.children = children
+        self.bindings = bindings
+        self.handlers = tuple(handler for handler, _ in bindings)
+        # Seconds to wait for the next key of a longer sequence.
+        self.wait = max((child.max_timeout for child in children.values()), default=0.0)
+        self.min_timeout = min((timeout for _, timeout in bindings), default=0.0)
+        self.max_timeout = max([self.wait] + [timeout for _, timeout in bindings])
+
+    def handlers_within(self, gap: float) -> tuple[Handler, ...]:
+        '''Handlers of sequences ending here whose timeout allows gap seconds between keys.'''
+
+        if gap <= self.min_timeout:
+            return self.handlers
+        return tuple(handler for handler, timeout in self.bindings if gap <= timeout)
+
+    def added(self, keys: tuple[str, ...], handler: Handler, timeout: float) -> 'SequenceNode':
+        if not keys:
+            return SequenceNode(self.children, self.bindings + ((handler, timeout),))
+
+        children = dict(self.children)
+        children[keys[0]] = children.get(keys[0], _EMPTY).added(keys[1:], handler, timeout)
+        return SequenceNode(children, self.bindings)
+
+    def removed(self, keys: tuple[str, ...], handler: Handler, exact: bool = False) -> 'SequenceNode':
+        '''Remove handler from the sequence of keys, or only the one binding of entry handler itself if exact.'''
+
+        if not keys:
+            if exact:
+                for i, (h, _) in enumerate(self.bindings):
+                    if h is handler:
+                        return SequenceNode(self.children, self.bindings[:i] + self.bindings[i + 1:])
+                return self
+            return SequenceNode(self.children, tuple(b for b in self.bindings if b[0] != handler))
+
+        child = self.children.get(keys[0])
+        if child is None:
+            return self
+
+        children = dict(self.children)
+        child = child.removed(keys[1:], handler, exact)
+        if child.children or child.bindings:
+            children[keys[0]] = child
+        else:
+            del children[keys[0]]
+        return SequenceNode(children, self.bindings)
+
+    def without(self, handler: Handler) -> 'SequenceNode':
+        '''Remove handler from every sequence.'''
+
+        children: dict[str, SequenceNode] = {}
+        for key, child in self.children.items():
+            child = child.without(handler)
+            if child.children or child.bindings:
+                children[key] = child
+        return SequenceNode(children, tuple(b for b in self.bindings if b[0] != handler))
+
+
+_EMPTY = SequenceNode({}, ())
+
+
+class SequenceMatcher:
+    '''
+    Progress of matching key sequences. Used from the dispatching thread only.
+
+    Each key costs one dict lookup whatever the number of sequences. When a
+    sequence is also the prefix of a longer one (e.g. 'g' and 'g g'), the
+    shorter one fires if the next key doesn't continue the longer one within
+    its timeout.
+
+    The longest time between two keys so far is kept, and a sequence only
+    matches if it is within its own timeout, even if a longer timeout of
+    another sequence sharing the prefix kept the match going. Time is measured
+    from `KeyEvent.timestamp` when events have one.
+    '''
+
+    def __init__(self) -> None:
+        self._node: Optional[SequenceNode] = None
+        self._events: list[KeyEvent] = []
+        # Handlers of the longest complete sequence in events, and its length.
+        self._fallback: Optional[tuple[tuple[Handler, ...], int]] = None
+        # `time.monotonic()` when the last key in events was read, and the longest time between two of them.
+        self._last = 0.0
+        self._gap = 0.0
+        self.deadline: Optional[float] = None
+
+    def feed(self, root: SequenceNode, event: KeyEvent, fire: Fire) -> None:
+        '''
+        Advance with a pressed key.
+
+        Args:
+            root (SequenceNode): The current tree.
+            event (KeyEvent): Pressed key.
+            fire (Fire): A callable invoking handlers of a matched sequence.
+        '''
+
+        # When the key was read rather than now, so that waiting in a queue or
+        # replaying faster doesn't change the gaps between keys.
+        now = monotonic() if event.timestamp is None else event.timestamp / 1e9
+        if self._node is None:
+            node = root
+            gap = 0.0
+        else:
+            node = self._node
+            gap = max(self._gap, now - self._last)
+        child = node.children.get(event.key)
+
+        if child is None or gap > child.max_timeout:
+            # No sequence continues with this key in time.
+            if self._node is not None:
+                self._resolve(root, [event], fire)
+            return
+
+        if not child.children:
+            self._reset()
+            fire(child.handlers_within(gap), event)
+            return
+
+        self._node = child
+        self._events.append(event)
+        self._last = now
+        self._gap = gap
+        handlers = child.handlers_within(gap)
+        if handlers:
+            self._fallback = (handlers, len(self._events))
+        self.deadline = now + child.wait
+
+    def expire(self, root: SequenceNode, now: float, fire: Fire) -> None:
+        '''
+        Give up waiting for the next key once the deadline has passed.
+
+        Args:
+            root (SequenceNode): The current tree.
+            now (float): `time.monotonic()`.
+            fire (Fire): A callable invoking handlers of a matched sequence.
+        '''
+
+        if self.deadline is not None and now >= self.deadline:
+            self._resolve(root, [], fire)
+
+    def _resolve(self, root: SequenceNode, rest: list[KeyEvent], fire: Fire) -> None:
+        '''Fire the longest complete sequence, and match the keys after it again.'''
+
+        events = self._events
+        fallback = self._fallback
+        self._reset()
+
+        if fallback is None:
+            # No sequence starts with the first key, so retry from the second one.
+            rest = events[1:] + rest
+        else:
+            handlers, length = fallback
+            fire(handlers, events[length - 1])
+            rest = events[length:] + rest
+
+        for event in rest:
+            self.feed(root, event, fire)
+
+    def _reset(self) -> None:
+        self._node = None
+        self._events = []
+        self._fallback = None
+        self._last = 0.0
+        self._gap = 0.0
+        self.deadline = None
@@ -1,9 +1,11 @@
 import msvcrt
 import sys
 from ctypes import Structure, Union, WinDLL, byref
-from ctypes.wintypes import BOOL, CHAR, DWORD, HANDLE, SHORT, UINT, WCHAR, WORD
+from ctypes.wintypes import BOOL, CHAR, DWORD, HANDLE, LPCWSTR, LPVOID, SHORT, UINT, WCHAR, WORD
 from typing import IO, Any, Callable, Optional
 
+from ._modes import BRACKETED_PASTE_MODE, enable_private_modes
+
 # Adapted from Textual https://github.com/Textualize/textual/blob/main/src/textual/drivers/win32.py.
 # See ./Textual_LICENSE.
 
@@ -96,6 +98,7 @@ class INPUT_RECORD(Structure):
 
 
 _WAIT_TIMEOUT = 0x00000102
+_INFINITE = 0xFFFFFFFF
 
 # Console input modes
 _ENABLE_ECHO_INPUT = 0x0004
@@ -120,6 +123,31 @@ _STD_OUTPUT_HANDLE = -11
 
 _MAX_EVENTS = 1024
 _KEY_EVENT = 0x0001
+_MOUSE_EVENT = 0x0002
+
+# Mouse button states
+_FROM_LEFT_1ST_BUTTON_PRESSED = 0x0001
+_RIGHTMOST_BUTTON_PRESSED = 0x0002
+_FROM_LEFT_2ND_BUTTON_PRESSED = 0x0004
+
+# Mouse event flags
+_MOUSE_MOVED = 0x0001
+_MOUSE_WHEELED = 0x0004
+_MOUSE_HWHEELED = 0x0008
+
+# Control key states
+_RIGHT_ALT_PRESSED = 0x0001
+_LEFT_ALT_PRESSED = 0x0002
+_RIGHT_CTRL_PRESSED = 0x0004
+_LEFT_CTRL_PRESSED = 0x0008
+_SHIFT_PRESSED = 0x0010
+
+# SGR button codes of button states.
+_SGR_BUTTONS = (
+    (_FROM_LEFT_1ST_BUTTON_PRESSED, 0),
+    (_FROM_LEFT_2ND_BUTTON_PRESSED, 1),
+    (_RIGHTMOST_BUTTON_PRESSED, 2)
+)
 
 _kernel32 = WinDLL('kernel32', use_last_error=True)
 
@@ -130,12 +158,20 @@ _ReadConsoleInputW = _kernel32.ReadConsoleInputW
 _WaitForMultipleObjects = _kernel32.WaitForMultipleObjects
 _SetConsoleMode = _kernel32.SetConsoleMode
 _GetConsoleMode = _kernel32.GetConsoleMode
+_CreateEventW = _kernel32.CreateEventW
+_CreateEventW.argtypes = [LPVOID, BOOL, BOOL, LPCWSTR]
+_CreateEventW.restype = HANDLE
+_SetEvent = _kernel32.SetEvent
+_SetEvent.argtypes = [HANDLE]
+_CloseHandle = _kernel32.CloseHandle
+_CloseHandle.argtypes = [HANDLE]
 
 _hIn = _GetStdHandle(_STD_INPUT_HANDLE)
 _arrtype = INPUT_RECORD * _MAX_EVENTS
 _input_records = _arrtype()
 _read_count = DWORD(0)
 _keys: list[str] = []
+_mouse_buttons = 0
 
 
 def _wait_for_handles(handles: list[HANDLE], timeout: int = 0) -> Optional[HANDLE]:
@@ -154,15 +190,18 @@ def _wait_for_handles(handles: list[HANDLE], timeout: int = 0) -> Optional[HANDL
         return handles[ret]
 
 
-def listen(handler: Callable[[list[str]], None]) -> None:
+def listen(handler: Callable[[list[str]], None], timeout: int = _INFINITE, wakeup: Optional[HANDLE] = None) -> None:
     '''
     Listen key press events.
 
     Args:
         handler (Callable[[list[str]], None]): A callable fired when key pressed.
+        timeout (int): Maximum milliseconds to wait.
+        wakeup (Optional[HANDLE]): An event object which interrupts waiting when set.
     '''
 
-    if _wait_for_handles([_hIn], 200) is None:
+    handles = [_hIn] if wakeup is None else [_hIn, wakeup]
+    if _wait_for_handles(handles, timeout) in (None, wakeup):
         return
 
     _ReadConsoleInputW(
@@ -178,12 +217,69 @@ def listen(handler: Callable[[list[str]], None]) -> None:
         if event_type == _KEY_EVENT:
             key_event = input_record.Event.KeyEvent
             key = key_event.uChar.UnicodeChar
-            if key_event.bKeyDown or key == '\x1b':
+            if key_event.bKeyDown:
+                # A held key may be reported once with a repeat count.
+                _keys.append(key * max(key_event.wRepeatCount, 1))
+            elif key == '\x1b':
                 _keys.append(key)
+        elif event_type == _MOUSE_EVENT:
+            sequence = _mouse_sequence(input_record.Event.MouseEvent)
+            if sequence is not None:
+                _keys.append(sequence)
 
     handler(_keys[:])
 
 
+def _mouse_sequence(mouse_event: MOUSE_EVENT_RECORD) -> Optional[str]:
+    '''
+    Translate a console mouse event into an SGR mouse report, so it is parsed like one from a terminal.
+
+    Returns:
+        Optional[str]: The report, or None if nothing changed.
+    '''
+
+    global _mouse_buttons
+
+    state = mouse_event.dwControlKeyState
+    modifiers = 0
+    if state & _SHIFT_PRESSED:
+        modifiers |= 4
+    if state & (_LEFT_ALT_PRESSED | _RIGHT_ALT_PRESSED):
+        modifiers |= 8
+    if state & (_LEFT_CTRL_PRESSED | _RIGHT_CTRL_PRESSED):
+        modifiers |= 16
+
+    buttons = mouse_event.dwButtonState & 0xffff
+    flags = mouse_event.dwEventFlags
+    final = 'M'
+
+    if flags & (_MOUSE_WHEELED | _MOUSE_HWHEELED):
+        # The high word is the signed wheel delta, positive when rotated forward or to the right.
+        forward = mouse_event.dwButtonState >> 16 < 0x8000
+        if flags & _MOUSE_WHEELED:
+            code = 64 if forward else 65
+        else:
+            code = 67 if forward else 66
+    elif flags & _MOUSE_MOVED:
+        code = 32 + _sgr_button(buttons, 3)
+    else:
+        pressed = buttons & ~_mouse_buttons
+        released = _mouse_buttons & ~buttons
+        _mouse_buttons = buttons
+        if pressed:
+            code = _sgr_button(pressed, -1)
+        elif released:
+            code = _sgr_button(released, -1)
+            final = 'm'
+        else:
+            return None
+        if code < 0:
+            return None  # Buttons beyond the third.
+
+    position = mouse_event.dwMousePosition
+    return f'\x1b[<{code | modifiers};{position.X + 1};{position.Y + 1}{final}'
+
+
 def _set_console_mode(file: IO[Any], mode: int) -> bool:
     '''
     Set the console mode for a given file (stdout or stdin).
@@ -222,10 +318,22 @@ def _get_console_mode(file: IO[Any]) -> int:
     return mode.value
 
 
-def enable_virtual_terminal_sequences() -> Callable[[], None]:
+def _sgr_button(buttons: int, default: int) -> int:
+    for state, code in _SGR_BUTTONS:
+        if buttons & state:
+            return code
+    return default
+
+
+def enable_virtual_terminal_sequences(mouse: bool = False, paste: bool = False) -> Callable[[], None]:
     '''
     Enable virtual terminal sequences.
 
+    Args:
+        mouse (bool): Whether to also report mouse input. Quick edit mode is
+            turned off, as it would take mouse input over.
+        paste (bool): Whether to turn on bracketed paste mode.
+
     Returns:
         Callable[[], None]: A callable that will restore terminal to previous state.
 
@@ -238,11 +346,78 @@ def enable_virtual_terminal_sequences() -> Callable[[], None]:
     current_console_mode_in = _get_console_mode(terminal_in)
     current_console_mode_out = _get_console_mode(terminal_out)
 
+    restore_modes: Callable[[], None] = lambda: None
+
     def restore() -> None:
         '''Restore console mode to previous settings.'''
 
+        restore_modes()
         _set_console_mode(terminal_in, current_console_mode_in)
         _set_console_mode(terminal_out, current_console_mode_out)
 
-    _set_console_mode(terminal_in, current_console_mode_in | _ENABLE_VIRTUAL_TERMINAL_INPUT)
+    mode_in = current_console_mode_in | _ENABLE_VIRTUAL_TERMINAL_INPUT
+    if mouse:
+        mode_in = (mode_in | _ENABLE_MOUSE_INPUT | _ENABLE_EXTENDED_FLAGS) & ~_ENABLE_QUICK_EDIT_MODE
+    _set_console_mode(terminal_in, mode_in)
+
+    if paste:
+        # The console interprets the mode sequence only with virtual terminal processing.
+        _set_console_mode(terminal_out, current_console_mode_out | _ENABLE_VIRTUAL_TERMINAL_PROCESSING)
+        restore_modes = enable_private_modes(terminal_out.fileno(), (BRACKETED_PASTE_MODE,))
     return restore
+
+
+class WindowsInput:
+    '''
+    Console input of this process.
+
+    Waiting is done on the console input and on an event object, so `wakeup`
+    can interrupt it immediately. The event object is created by `enable` and
+    released by `close`.
+    '''
+
+    def __init__(self, mouse: bool = False, paste: bool = False) -> None:
+        '''
+        Args:
+            mouse (bool): Whether to report mouse input.
+            paste (bool): Whether to turn on bracketed paste mode.
+        '''
+
+        self._mouse = mouse
+        self._paste = paste
+        self._wakeup_event: Optional[HANDLE] = None
+
+    def enable(self) -> Callable[[], None]:
+        '''
+        Prepare the console for reading keys.
+
+        Returns:
+            Callable[[], None]: A callable that will restore console to previous state.
+        '''
+
+        if self._wakeup_event is None:
+            # Auto-reset, so a wakeup interrupts one wait.
+            self._wakeup_event = _CreateEventW(None, False, False, None)
+        return enable_virtual_terminal_sequences(self._mouse, self._paste)
+
+    def listen(self, handler: Callable[[list[str]], None], timeout: Optional[float] = None) -> None:
+        '''
+        Wait until input arrives or `wakeup` is called, and pass read input to handler.
+
+        Args:
+            handler (Callable[[list[str]], None]): A callable fired when key pressed.
+            timeout (Optional[float]): Maximum seconds to wait. Waits forever if None.
+        '''
+
+        listen(handler, _INFINITE if timeout is None else int(timeout * 1000), self._wakeup_event)
+
+    def wakeup(self) -> None:
+        '''Interrupt a blocking `listen` call.'''
+
+        if self._wakeup_event is not None:
+            _SetEvent(self._wakeup_event)
+
+    def close(self) -> None:
+        if self._wakeup_event is not None:
+            _CloseHandle(self._wakeup_event)
+            self._wakeup_event = None
@@ -1,3 +1,18 @@
+from enum import Enum
+from typing import Hashable, Optional
+
+from .keys import Keys, Modifiers
+from ._interning import intern_key
+
+
+_PREFIXES = (
+    ('ctrl+', Modifiers.CONTROL),
+    ('alt+', Modifiers.ALT),
+    ('shift+', Modifiers.SHIFT),
+    ('meta+', Modifiers.META),
+)
+
+
 class Event:
     __slots__ = ()
 
@@ -5,11 +20,219 @@ class Event:
 class KeyEvent(Event):
     '''Event with key press.'''
 
-    __slots__ = ('_key',)
+    __slots__ = ('_key', '_repeat', '_timestamp', '_source')
 
-    def __init__(self, key: str) -> None:
+    def __init__(self, key: str, repeat: int = 1, timestamp: Optional[int] = None) -> None:
         self._key: str = key
+        self._repeat: int = repeat
+        self._timestamp: Optional[int] = timestamp
+        self._source: Hashable = None
 
     @property
     def key(self) -> str:
         return self._key
+
+    @property
+    def repeat(self) -> int:
+        '''Number of consecutive presses of the key this event stands for.'''
+
+        return self._repeat
+
+    @property
+    def timestamp(self) -> Optional[int]:
+        '''`time.monotonic_ns()` when the input of the key was read, or None if unknown.'''
+
+        return self._timestamp
+
+    @property
+    def key_id(self) -> int:
+        '''Small integer id of the key, or `NO_KEY_ID` if it isn't interned (see `intern_key`).'''
+
+        return intern_key(self._key)
+
+    @property
+    def source(self) -> Hashable:
+        '''Id of the source the key was read from with `MultiplexListener`, or None.'''
+
+        return self._source
+
+    @property
+    def modifiers(self) -> Modifiers:
+        '''Modifier keys in the key name (e.g. CONTROL | SHIFT for 'ctrl+shift+left').'''
+
+        key = self._key
+        modifiers = Modifiers.NONE
+        for prefix, modifier in _PREFIXES:
+            if key.startswith(prefix) and len(key) > len(prefix):
+                modifiers |= modifier
+                key = key[len(prefix):]
+        return modifiers
+
+
+# Shared events of interned keys without timestamp. Bounded, as raw escape
+# sequences aren't interned.
+_flyweights: dict[str, KeyEvent] = {}
+
+
+def shared_key_event(key: str) -> KeyEvent:
+    '''
+    Get an event of key with no timestamp, reusing one instance per interned key.
+
+    Events are immutable, so sharing them saves allocation in long running sessions.
+
+    Args:
+        key (str): Pressed key.
+
+    Returns:
+        KeyEvent: The event.
+    '''
+
+    event = _flyweights.get(key)
+    if event is None:
+        event = KeyEvent(key)
+        if intern_key(key) >= 0:
+            _flyweights[key] = event
+    return event
+
+
+def with_source(event: KeyEvent, source: Hashable) -> KeyEvent:
+    '''
+    Set the source of an event, copying it first if it is shared by `shared_key_event`.
+
+    Args:
+        event (KeyEvent): An event no handler has received yet.
+        source (Hashable): Id of the source.
+
+    Returns:
+        KeyEvent: The event with the source.
+    '''
+
+    if _flyweights.get(event._key) is event:
+        event = KeyEvent(event._key, event._repeat, event._timestamp)
+    event._source = source
+    return event
+
+
+class MouseButton(str, Enum):
+    '''Button of a mouse event.'''
+
+    value: str
+
+    LEFT = 'left'
+    MIDDLE = 'middle'
+    RIGHT = 'right'
+    # Motion without any button held.
+    NONE = 'none'
+    WHEEL_UP = 'wheel-up'
+    WHEEL_DOWN = 'wheel-down'
+    WHEEL_LEFT = 'wheel-left'
+    WHEEL_RIGHT = 'wheel-right'
+
+
+class MouseAction(str, Enum):
+    '''What happened to the mouse.'''
+
+    value: str
+
+    PRESS = 'press'
+    RELEASE = 'release'
+    # Motion, with the button held if any (i.e. dragging).
+    MOVE = 'move'
+    # Wheel rotation. The direction is the button.
+    SCROLL = 'scroll'
+
+
+class MouseEvent(KeyEvent):
+    '''
+    Event with mouse input. Its key is `Keys.MOUSE`.
+
+    Positions are zero-based cells from the top left of the terminal.
+    '''
+
+    __slots__ = ('_x', '_y', '_button', '_action', '_modifiers')
+
+    def __init__(
+        self,
+        x: int,
+        y: int,
+        button: MouseButton,
+        action: MouseAction,
+        modifiers: Modifiers = Modifiers.NONE,
+        timestamp: Optional[int] = None
+    ) -> None:
+        super().__init__(Keys.MOUSE, 1, timestamp)
+        self._x = x
+        self._y = y
+        self._button = button
+        self._action = action
+        self._modifiers = modifiers
+
+    @property
+    def x(self) -> int:
+        '''Column.'''
+
+        return self._x
+
+    @property
+    def y(self) -> int:
+        '''Row.'''
+
+        return self._y
+
+    @property
+    def button(self) -> MouseButton:
+        return self._button
+
+    @property
+    def action(self) -> MouseAction:
+        return self._action
+
+    @property
+    def modifiers(self) -> Modifiers:
+        '''Modifier keys held.'''
+
+        return self._modifiers
+
+    def __repr__(self) -> str:
+        return (
+            f'MouseEvent(x={self._x}, y={self._y}, button={self._button.value}, '
+            f'action={self._action.value}, modifiers={self._modifiers!r})'
+        )
+
+
+class PasteEvent(KeyEvent):
+    '''
+    Event with text pasted in bracketed paste mode. Its key is `Keys.BRACKETED_PASTE`.
+
+    A paste is a single event, unless the listener streams pastes in chunks.
+    '''
+
+    __slots__ = ('_text', '_final', '_truncated')
+
+    def __init__(self, text: str, final: bool = True, truncated: bool = False, timestamp: Optional[int] = None) -> None:
+        super().__init__(Keys.BRACKETED_PASTE, 1, timestamp)
+        self._text = text
+        self._final = final
+        self._truncated = truncated
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @property
+    def final(self) -> bool:
+        '''
+        Whether this is the last chunk of the paste. It has text unless the end of the
+        paste was read after the text before it had been delivered.
+        '''
+
+        return self._final
+
+    @property
+    def truncated(self) -> bool:
+        '''Whether text beyond the size limit has been discarded so far.'''
+
+        return self._truncated
+
+    def __repr__(self) -> str:
+        return f'PasteEvent(size={len(self._text)}, final={self._final}, truncated={self._truncated})'
@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntFlag
 
 
 # Adapted from Textual https://github.com/Textualize/textual/blob/main/src/textual/keys.py.
@@ -196,3 +196,16 @@ class Keys(str, Enum):
     SHIFT_CONTROL_RIGHT = CONTROL_SHIFT_RIGHT
     SHIFT_CONTROL_HOME = CONTROL_SHIFT_HOME
     SHIFT_CONTROL_END = CONTROL_SHIFT_END
+
+    # Key of every `MouseEvent`.
+    MOUSE = VT100_MOUSE_EVENT
+
+
+class Modifiers(IntFlag):
+    '''Modifier keys held with a key, as encoded by xterm.'''
+
+    NONE = 0
+    SHIFT = 1
+    ALT = 2
+    CONTROL = 4
+    META = 8